@@ -29,10 +29,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Primero para contar también las consultas de sesión y autenticación
+    'gestion_vuelos.instrumentacion.InstrumentacionSQLMiddleware',
+    'gestion_vuelos.metricas.MetricasMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Después de sesión y autenticación: marca en la sesión a quien escribió
+    'gestion_vuelos.replicas.FijacionPrimarioMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -57,15 +62,34 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'aerolinea_project.wsgi.application'
+# Con un servidor ASGI (uvicorn, daphne) las vistas async de navegación de
+# vuelos atienden muchos requests concurrentes por proceso; todo el stack de
+# middleware es compatible con async para no volver a un hilo por request
+ASGI_APPLICATION = 'aerolinea_project.asgi.application'
 
 # Database - SQLite local
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Esperar el lock de escritura en vez de fallar con "database is locked"
+        'OPTIONS': {'timeout': 20},
     }
 }
 
+# Réplica de solo lectura para reportes, listados y exportaciones (ver
+# gestion_vuelos.replicas). En local, otro archivo SQLite que
+# `manage.py sincronizar_replica` copia desde el primario.
+if os.environ.get('DB_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DB_REPLICA'],
+        'OPTIONS': {'timeout': 20},
+    }
+DATABASE_ROUTERS = ['gestion_vuelos.replicas.RouterReplica']
+# Segundos que las lecturas de un usuario van al primario después de que escribe
+REPLICA_FIJACION_SEGUNDOS = int(os.environ.get('REPLICA_FIJACION_SEGUNDOS', '10'))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -90,9 +114,50 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Pases de abordar ya dibujados (ver gestion_vuelos.pases). Fuera de
+# MEDIA_ROOT: tienen datos personales y se sirven solo desde la vista.
+PASES_DIR = Path(os.environ.get('PASES_DIR', BASE_DIR / 'pases_abordar'))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Carga el perfil junto con el usuario de la sesión (ver gestion_vuelos.roles).
+# ModelBackend sigue en la lista: las sesiones abiertas antes guardan ese
+# backend y sin él sus usuarios quedarían deslogueados.
+AUTHENTICATION_BACKENDS = [
+    'gestion_vuelos.roles.ModelBackendConPerfil',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Cache: en memoria del proceso por defecto. Con varios procesos (gunicorn,
+# etc.) definir CACHE_DIR para que compartan en disco las páginas cacheadas
+# y los contadores de versión que las invalidan.
+if os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'aerolinea',
+        }
+    }
+
+# Instrumentación de SQL (ver gestion_vuelos.instrumentacion): fracción de
+# los requests medidos y cuántas mediciones recientes guarda cada proceso.
+# En desarrollo se mide todo; en producción uno de cada cien, salvo que
+# SQL_MUESTREO=1 se pida explícitamente para diagnosticar.
+SQL_MUESTREO = float(os.environ.get('SQL_MUESTREO', '1' if DEBUG else '0.01'))
+SQL_CAPACIDAD = 500
+
+# Direcciones que pueden leer /metrics sin sesión de admin (el scraper de
+# Prometheus), separadas por comas. Por defecto ninguna: solo los admins.
+METRICAS_IPS_PERMITIDAS = [ip for ip in os.environ.get('METRICAS_IPS', '').split(',') if ip]
+
 # Login URLs
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
@@ -0,0 +1,19 @@
+"""
+Settings para correr los tests con primario y réplica en dos archivos
+SQLite distintos:
+
+    python manage.py test gestion_vuelos.tests --settings=aerolinea_project.settings_test
+
+La réplica de test no es un espejo del primario: los tests la llenan con
+`manage.py sincronizar_replica`, así que una lectura mal ruteada no
+encuentra las filas escritas después de la copia.
+"""
+from .settings import *  # noqa: F401,F403
+
+DATABASES['default']['TEST'] = {'NAME': BASE_DIR / 'test_primario.sqlite3'}
+DATABASES['replica'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': BASE_DIR / 'db_replica.sqlite3',
+    'OPTIONS': {'timeout': 20},
+    'TEST': {'NAME': BASE_DIR / 'test_replica.sqlite3'},
+}
@@ -1,5 +1,6 @@
-from django.contrib import admin
-from .models import Avion, Asiento, Vuelo, Pasajero, Reserva, Boleto, PerfilUsuario, Paquete
+from django.contrib import admin, messages
+from .models import Avion, Asiento, AsientoVuelo, Vuelo, Pasajero, Reserva, Boleto, PerfilUsuario, Paquete, Aeropuerto
+from . import services
 
 
 @admin.register(Avion)
@@ -14,11 +15,33 @@ class AsientoAdmin(admin.ModelAdmin):
     list_filter = ('avion', 'tipo', 'estado')
 
 
+@admin.register(AsientoVuelo)
+class AsientoVueloAdmin(admin.ModelAdmin):
+    list_display = ('vuelo', 'asiento', 'estado')
+    list_select_related = ('vuelo', 'asiento__avion')
+    list_filter = ('estado',)
+    search_fields = ('vuelo__codigo_vuelo',)
+    raw_id_fields = ('vuelo', 'asiento')
+
+
+@admin.register(Aeropuerto)
+class AeropuertoAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'codigo_iata', 'nombre_normalizado')
+    search_fields = ('nombre', 'codigo_iata')
+
+
 @admin.register(Vuelo)
 class VueloAdmin(admin.ModelAdmin):
-    list_display = ('codigo_vuelo', 'origen', 'destino', 'fecha_salida', 'estado', 'precio_base', 'avion')
+    list_display = ('codigo_vuelo', 'origen', 'destino', 'fecha_salida', 'estado', 'precio_base', 'avion', 'asientos_vendidos')
+    list_select_related = ('avion',)
     list_filter = ('estado', 'origen', 'destino')
     search_fields = ('codigo_vuelo', 'origen', 'destino')
+    actions = ['emitir_boletos']
+
+    @admin.action(description='Emitir boletos de las reservas confirmadas o pagadas')
+    def emitir_boletos(self, request, queryset):
+        emitidos = services.emitir_boletos(list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f'{emitidos} boleto(s) emitido(s).', messages.SUCCESS)
 
 
 @admin.register(Pasajero)
@@ -36,7 +59,7 @@ class ReservaAdmin(admin.ModelAdmin):
 
 @admin.register(Boleto)
 class BoletoAdmin(admin.ModelAdmin):
-    list_display = ('codigo_barra', 'reserva', 'estado', 'fecha_emision')
+    list_display = ('codigo_barra', 'reserva', 'estado', 'fecha_emision', 'fecha_uso')
     list_filter = ('estado',)
     search_fields = ('codigo_barra', 'reserva__codigo_reserva')
 
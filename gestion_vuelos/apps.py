@@ -5,3 +5,6 @@ class GestionVuelosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gestion_vuelos'
     verbose_name = 'Gestión de Vuelos'
+
+    def ready(self):
+        from . import signals  # noqa: F401
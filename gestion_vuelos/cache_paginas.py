@@ -0,0 +1,133 @@
+"""
+Cache de páginas públicas y de fragmentos, invalidada por versión.
+
+Cada grupo de datos ('vuelos', 'reservas', 'paquetes') tiene un contador en
+la cache que las señales incrementan al confirmarse cualquier cambio. Las
+claves de página y de fragmento incluyen esos contadores: al cambiar un
+dato, las entradas viejas dejan de leerse y expiran solas. El TTL solo
+cubre lo que no genera escrituras (un vuelo que ya salió deja de listarse).
+"""
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+
+from . import metricas
+from .roles import ausuario
+
+TTL_PAGINA = 5 * 60
+TTL_FRAGMENTO = 60 * 60
+
+
+def _clave_version(grupo):
+    return f'version:{grupo}'
+
+
+def versiones(*grupos):
+    """Versión actual combinada de los grupos, para usar dentro de una clave"""
+    claves = [_clave_version(grupo) for grupo in grupos]
+    valores = cache.get_many(claves)
+    for clave in claves:
+        if clave not in valores:
+            # Arrancar en un valor nuevo: si el contador fue desalojado, no
+            # vuelve a coincidir con versiones que quedaron en la cache
+            cache.add(clave, time.time_ns())
+            valores[clave] = cache.get(clave)
+    return '.'.join(str(valores[clave]) for clave in claves)
+
+
+async def aversiones(*grupos):
+    """versiones() para las vistas async"""
+    claves = [_clave_version(grupo) for grupo in grupos]
+    valores = await cache.aget_many(claves)
+    for clave in claves:
+        if clave not in valores:
+            await cache.aadd(clave, time.time_ns())
+            valores[clave] = await cache.aget(clave)
+    return '.'.join(str(valores[clave]) for clave in claves)
+
+
+def incrementar_version(grupo):
+    clave = _clave_version(grupo)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.add(clave, time.time_ns())
+
+
+def contexto_tarjetas():
+    """Variables para `{% cache ttl_tarjetas 'tarjeta_lista' vuelo.id ... version_vuelos %}`"""
+    return {'ttl_tarjetas': TTL_FRAGMENTO, 'version_vuelos': versiones('vuelos')}
+
+
+async def acontexto_tarjetas():
+    return {'ttl_tarjetas': TTL_FRAGMENTO, 'version_vuelos': await aversiones('vuelos')}
+
+
+def cache_pagina_publica(*grupos):
+    """
+    Sirve desde la cache las respuestas GET para visitantes anónimos. La
+    clave depende de la URL completa, el día local (los listados cuentan los
+    vuelos de hoy) y las versiones de `grupos`. Acepta vistas sync y async.
+    """
+    def decorador(vista):
+        if iscoroutinefunction(vista):
+            return _cache_pagina_async(vista, grupos)
+
+        @wraps(vista)
+        def envuelta(request, *args, **kwargs):
+            if (request.method != 'GET' or request.user.is_authenticated
+                    or len(messages.get_messages(request))):
+                return vista(request, *args, **kwargs)
+            clave = _clave_pagina(vista, request, versiones(*grupos))
+            cacheada = cache.get(clave)
+            _contar(cacheada)
+            if cacheada is not None:
+                contenido, tipo = cacheada
+                return HttpResponse(contenido, content_type=tipo)
+            respuesta = vista(request, *args, **kwargs)
+            if _se_puede_guardar(respuesta):
+                cache.set(clave, (respuesta.content, respuesta['Content-Type']), TTL_PAGINA)
+            return respuesta
+        return envuelta
+    return decorador
+
+
+def _cache_pagina_async(vista, grupos):
+    @wraps(vista)
+    async def envuelta(request, *args, **kwargs):
+        # Resolver el usuario también carga la sesión, de donde leen los mensajes
+        usuario = await ausuario(request)
+        if request.method != 'GET' or usuario.is_authenticated or len(messages.get_messages(request)):
+            return await vista(request, *args, **kwargs)
+        clave = _clave_pagina(vista, request, await aversiones(*grupos))
+        cacheada = await cache.aget(clave)
+        _contar(cacheada)
+        if cacheada is not None:
+            contenido, tipo = cacheada
+            return HttpResponse(contenido, content_type=tipo)
+        respuesta = await vista(request, *args, **kwargs)
+        if _se_puede_guardar(respuesta):
+            await cache.aset(clave, (respuesta.content, respuesta['Content-Type']), TTL_PAGINA)
+        return respuesta
+    return envuelta
+
+
+def _clave_pagina(vista, request, version):
+    url = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'pagina:{vista.__name__}:{version}:{timezone.localdate()}:{url}'
+
+
+def _contar(cacheada):
+    metricas.incrementar('aerolinea_cache_total', cache='pagina',
+                         resultado='acierto' if cacheada is not None else 'fallo')
+
+
+def _se_puede_guardar(respuesta):
+    # Nunca guardar respuestas que fijan cookies (p. ej. el token CSRF)
+    return respuesta.status_code == 200 and not respuesta.streaming and not respuesta.cookies
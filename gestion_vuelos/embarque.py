@@ -0,0 +1,132 @@
+"""
+Control de embarque: escaneo de boletos en la puerta del vuelo.
+
+Cada escaneo es una lectura por `codigo_barra` (único, indexado) y un
+UPDATE condicional `emitido -> usado` sobre la fila: si dos lectores pasan
+el mismo boleto a la vez, solo uno actualiza la fila y el otro lo ve como
+duplicado.
+
+Para puertas con mala conectividad, el manifiesto de embarque es una lista
+compacta de los boletos del vuelo con la que el lector valida localmente;
+los escaneos acumulados se suben después en lote con `sincronizar()`.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import Boleto
+
+# Resultado de un escaneo: 'valido', 'duplicado', 'cancelado', 'otro_vuelo' o 'desconocido'
+Escaneo = namedtuple('Escaneo', ['codigo', 'resultado', 'asiento', 'pasajero', 'usado'])
+
+MAXIMO_LOTE = 1000
+# Códigos por consulta al sincronizar (límite de parámetros de SQLite)
+TAMANO_BLOQUE = 500
+CAMPOS = ('estado', 'fecha_uso', 'reserva__vuelo_id', 'reserva__asiento__numero', 'reserva__pasajero__nombre')
+# Estado abreviado en el manifiesto compacto
+ESTADOS_MANIFIESTO = {'emitido': 'E', 'usado': 'U'}
+
+
+def _clasificar(codigo, fila, vuelo_id):
+    """Resultado de un boleto que no se pudo marcar como usado"""
+    if fila is None:
+        return Escaneo(codigo, 'desconocido', None, None, None)
+    estado, fecha_uso, vuelo_boleto, asiento, pasajero = fila
+    if vuelo_id is not None and vuelo_boleto != vuelo_id:
+        resultado = 'otro_vuelo'
+    elif estado == 'cancelado':
+        resultado = 'cancelado'
+    else:
+        resultado = 'duplicado'
+    return Escaneo(codigo, resultado, asiento, pasajero, fecha_uso)
+
+
+def escanear(codigo, vuelo_id=None):
+    """Valida un boleto en la puerta y lo marca como usado (dos consultas)"""
+    fila = Boleto.objects.filter(codigo_barra=codigo).values_list('id', *CAMPOS).first()
+    if fila is not None:
+        boleto_id, estado, _, vuelo_boleto, asiento, pasajero = fila
+        if estado == 'emitido' and vuelo_id in (None, vuelo_boleto):
+            ahora = timezone.now()
+            # Solo un escaneo concurrente encuentra la fila todavía emitida
+            if Boleto.objects.filter(pk=boleto_id, estado='emitido').update(estado='usado', fecha_uso=ahora):
+                return Escaneo(codigo, 'valido', asiento, pasajero, ahora)
+            fila = Boleto.objects.filter(pk=boleto_id).values_list('id', *CAMPOS).first()
+        fila = fila[1:]
+    return _clasificar(codigo, fila, vuelo_id)
+
+
+def sincronizar(codigos, vuelo_id=None):
+    """
+    Aplica en lote los escaneos hechos sin conexión, en el orden recibido.
+    Una lectura por bloque de códigos y un único UPDATE para todos los
+    válidos; un código repetido dentro del lote cuenta como duplicado.
+    """
+    if len(codigos) > MAXIMO_LOTE:
+        raise ValueError(f'Se pueden sincronizar hasta {MAXIMO_LOTE} escaneos por vez.')
+    ahora = timezone.now()
+    with transaction.atomic():
+        filas = {}
+        unicos = list(dict.fromkeys(codigos))
+        for i in range(0, len(unicos), TAMANO_BLOQUE):
+            bloque = Boleto.objects.select_for_update().filter(codigo_barra__in=unicos[i:i + TAMANO_BLOQUE])
+            for boleto_id, codigo, *fila in bloque.values_list('id', 'codigo_barra', *CAMPOS):
+                filas[codigo] = (boleto_id, fila)
+
+        resultados = []
+        validos = {}
+        for codigo in codigos:
+            boleto_id, fila = filas.get(codigo, (None, None))
+            if codigo in validos:
+                resultados.append(Escaneo(codigo, 'duplicado', fila[3], fila[4], ahora))
+            elif fila is not None and fila[0] == 'emitido' and vuelo_id in (None, fila[2]):
+                validos[codigo] = boleto_id
+                resultados.append(Escaneo(codigo, 'valido', fila[3], fila[4], ahora))
+            else:
+                resultados.append(_clasificar(codigo, fila, vuelo_id))
+        if validos:
+            Boleto.objects.filter(id__in=list(validos.values()), estado='emitido').update(estado='usado', fecha_uso=ahora)
+    return resultados
+
+
+def version_manifiesto(vuelo):
+    """Resumen de los boletos del vuelo que cambia con cada emisión, uso o cancelación"""
+    datos = Boleto.objects.filter(reserva__vuelo=vuelo).aggregate(
+        total=Count('id'),
+        usados=Count('id', filter=Q(estado='usado')),
+        cancelados=Count('id', filter=Q(estado='cancelado')),
+        emision=Max('fecha_emision'),
+        uso=Max('fecha_uso'),
+    )
+    marcas = [datos['emision'], datos['uso']]
+    ultima = max((marca for marca in marcas if marca), default=None)
+    etag = '-'.join(str(valor) for valor in (
+        vuelo.id, datos['total'], datos['usados'], datos['cancelados'],
+        *(marca.timestamp() if marca else 0 for marca in marcas),
+    ))
+    return etag, ultima
+
+
+def manifiesto_embarque(vuelo):
+    """
+    Manifiesto compacto para validar sin conexión: una lista por boleto no
+    cancelado con código, asiento, pasajero y estado abreviado (E/U).
+    """
+    boletos = (
+        Boleto.objects.filter(reserva__vuelo=vuelo, estado__in=list(ESTADOS_MANIFIESTO))
+        .order_by('codigo_barra')
+        .values_list('codigo_barra', 'reserva__asiento__numero', 'reserva__pasajero__nombre', 'estado')
+    )
+    return {
+        'vuelo': vuelo.id,
+        'codigo': vuelo.codigo_vuelo,
+        'salida': vuelo.fecha_salida.isoformat(),
+        'generado': timezone.now().isoformat(),
+        'campos': ['codigo', 'asiento', 'pasajero', 'estado'],
+        'boletos': [
+            [codigo, asiento, pasajero, ESTADOS_MANIFIESTO[estado]]
+            for codigo, asiento, pasajero, estado in boletos.iterator(TAMANO_BLOQUE)
+        ],
+    }
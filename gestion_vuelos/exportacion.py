@@ -0,0 +1,151 @@
+"""
+Exportación masiva de reservas, pasajeros y vuelos en CSV o JSON Lines.
+
+Las filas se piden como tuplas (values_list) y se recorren con
+QuerySet.iterator(), que en PostgreSQL usa un cursor del lado del servidor
+y en SQLite lee en bloques: ni la consulta ni el archivo se acumulan en
+memoria, sin importar cuántos registros abarque el rango.
+"""
+import csv
+import json
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Pasajero, Reserva, Vuelo
+
+TAMANO_BLOQUE = 2000
+FORMATOS = ('csv', 'jsonl')
+
+# columnas: (nombre en el archivo, lookup del ORM)
+Exportable = namedtuple('Exportable', ['modelo', 'campo_fecha', 'campo_estado', 'columnas'])
+
+EXPORTABLES = {
+    'reservas': Exportable(Reserva, 'fecha_reserva', 'estado', [
+        ('codigo_reserva', 'codigo_reserva'),
+        ('estado', 'estado'),
+        ('fecha_reserva', 'fecha_reserva'),
+        ('precio', 'precio'),
+        ('vuelo', 'vuelo__codigo_vuelo'),
+        ('fecha_salida', 'vuelo__fecha_salida'),
+        ('asiento', 'asiento__numero'),
+        ('documento', 'pasajero__documento'),
+        ('pasajero', 'pasajero__nombre'),
+        ('email', 'pasajero__email'),
+    ]),
+    'pasajeros': Exportable(Pasajero, 'fecha_registro', None, [
+        ('documento', 'documento'),
+        ('tipo_documento', 'tipo_documento'),
+        ('nombre', 'nombre'),
+        ('email', 'email'),
+        ('telefono', 'telefono'),
+        ('fecha_nacimiento', 'fecha_nacimiento'),
+        ('fecha_registro', 'fecha_registro'),
+    ]),
+    'vuelos': Exportable(Vuelo, 'fecha_salida', 'estado', [
+        ('codigo_vuelo', 'codigo_vuelo'),
+        ('origen', 'origen'),
+        ('destino', 'destino'),
+        ('fecha_salida', 'fecha_salida'),
+        ('fecha_llegada', 'fecha_llegada'),
+        ('estado', 'estado'),
+        ('precio_base', 'precio_base'),
+        ('avion', 'avion__modelo'),
+        ('capacidad', 'avion__capacidad'),
+        ('asientos_vendidos', 'asientos_vendidos'),
+    ]),
+}
+
+
+class ExportacionError(ValueError):
+    """Parámetros de exportación inválidos; el mensaje se muestra al usuario"""
+
+
+class EcoCSV:
+    """Pseudo-archivo para csv.writer: devuelve la línea en lugar de guardarla"""
+
+    def write(self, valor):
+        return valor
+
+
+def leer_fecha(valor, nombre):
+    """Fecha AAAA-MM-DD de un parámetro opcional; vacío es None"""
+    if not valor:
+        return None
+    try:
+        fecha = parse_date(valor)
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise ExportacionError(f"Fecha inválida en '{nombre}': {valor} (formato AAAA-MM-DD).")
+    return fecha
+
+
+def _valor(valor):
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def _filas(exportable, desde, hasta, estado):
+    queryset = exportable.modelo.objects.all()
+    # Los días se interpretan en la zona horaria local, ambos inclusive
+    if desde:
+        inicio = timezone.make_aware(datetime.combine(desde, time.min))
+        queryset = queryset.filter(**{f'{exportable.campo_fecha}__gte': inicio})
+    if hasta:
+        fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+        queryset = queryset.filter(**{f'{exportable.campo_fecha}__lt': fin})
+    if estado:
+        queryset = queryset.filter(**{exportable.campo_estado: estado})
+    # Ordenar por la fecha permite recorrer el índice del rango sin ordenar en la base
+    queryset = queryset.order_by(exportable.campo_fecha, 'id')
+    lookups = [lookup for _, lookup in exportable.columnas]
+    for fila in queryset.values_list(*lookups).iterator(TAMANO_BLOQUE):
+        yield [_valor(valor) for valor in fila]
+
+
+def exportar(entidad, formato, desde=None, hasta=None, estado=None):
+    """
+    Generador de líneas de texto con la exportación pedida. Valida los
+    parámetros antes de devolverlo, así los errores se informan sin haber
+    empezado a emitir el archivo.
+    """
+    exportable = EXPORTABLES.get(entidad)
+    if exportable is None:
+        raise ExportacionError(f"Entidad desconocida: {entidad}. Opciones: {', '.join(EXPORTABLES)}.")
+    if formato not in FORMATOS:
+        raise ExportacionError(f"Formato desconocido: {formato}. Opciones: {', '.join(FORMATOS)}.")
+    if estado:
+        if exportable.campo_estado is None:
+            raise ExportacionError(f"Los {entidad} no tienen estado para filtrar.")
+        validos = [clave for clave, _ in exportable.modelo._meta.get_field(exportable.campo_estado).choices]
+        if estado not in validos:
+            raise ExportacionError(f"Estado inválido: {estado}. Opciones: {', '.join(validos)}.")
+    if desde and hasta and desde > hasta:
+        raise ExportacionError("La fecha 'desde' es posterior a 'hasta'.")
+
+    nombres = [nombre for nombre, _ in exportable.columnas]
+    filas = _filas(exportable, desde, hasta, estado)
+    if formato == 'csv':
+        return _csv(nombres, filas)
+    return _jsonl(nombres, filas)
+
+
+def _csv(nombres, filas):
+    escritor = csv.writer(EcoCSV())
+    yield escritor.writerow(nombres)
+    for fila in filas:
+        yield escritor.writerow(fila)
+
+
+def _jsonl(nombres, filas):
+    for fila in filas:
+        yield json.dumps(dict(zip(nombres, fila)), ensure_ascii=False) + '\n'
@@ -62,15 +62,10 @@ class ReservaForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         if self.vuelo:
-            asientos_reservados = Reserva.objects.filter(
-                vuelo=self.vuelo,
-                estado__in=['confirmada', 'pagada']
-            ).values_list('asiento_id', flat=True)
-            
             self.fields['asiento'].queryset = Asiento.objects.filter(
-                avion=self.vuelo.avion,
-                estado='disponible'
-            ).exclude(id__in=asientos_reservados)
+                inventario__vuelo=self.vuelo,
+                inventario__estado='disponible'
+            )
     
     def clean(self):
         cleaned_data = super().clean()
@@ -103,7 +98,9 @@ class BusquedaVueloForm(forms.Form):
         required=False,
         widget=forms.TextInput(attrs={
             'class': 'form-control',
-            'placeholder': 'Ciudad de origen'
+            'placeholder': 'Ciudad de origen',
+            'list': 'lugares-origen',
+            'autocomplete': 'off',
         })
     )
     destino = forms.CharField(
@@ -111,7 +108,9 @@ class BusquedaVueloForm(forms.Form):
         required=False,
         widget=forms.TextInput(attrs={
             'class': 'form-control',
-            'placeholder': 'Ciudad de destino'
+            'placeholder': 'Ciudad de destino',
+            'list': 'lugares-destino',
+            'autocomplete': 'off',
         })
     )
     fecha_salida = forms.DateField(
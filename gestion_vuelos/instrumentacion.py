@@ -0,0 +1,186 @@
+"""
+Instrumentación de SQL por request.
+
+El middleware envuelve las consultas de cada conexión con
+`connection.execute_wrapper` (no necesita DEBUG) en una fracción de los
+requests (settings.SQL_MUESTREO) y guarda un resumen de cada uno en un
+buffer circular en memoria (settings.SQL_CAPACIDAD entradas): la vista
+resuelta, cuántas consultas hizo, el tiempo total en la base, las
+repetidas y las más lentas. La página de diagnóstico agrupa el buffer por
+vista para encontrar los N+1 sin leer plantillas.
+
+Una consulta "repetida" comparte el SQL (con sus %s) con otra del mismo
+request: es la huella de un N+1. Una "duplicada" además tiene los mismos
+parámetros, así que su resultado se podría haber reutilizado.
+
+El buffer es por proceso; con varios workers la página muestra lo que vio
+el que atiende el pedido. Las consultas de una respuesta en streaming
+(exportaciones, manifiestos) corren después del middleware y no se cuentan.
+
+Bajo ASGI las conexiones son por hilo y el ORM corre en el hilo que Django
+dedica a cada request (ThreadSensitiveContext): el middleware instala y
+retira los wrappers desde ese mismo hilo.
+"""
+import random
+import threading
+import time
+from collections import Counter, deque, namedtuple
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+LENTAS_POR_REQUEST = 3
+REPETIDAS_POR_REQUEST = 3
+LARGO_SQL = 400
+
+Medicion = namedtuple('Medicion', [
+    'vista', 'metodo', 'ruta', 'estado', 'fecha', 'duracion', 'consultas', 'tiempo_sql',
+    'repetidas', 'duplicadas', 'lentas', 'patrones',
+])
+
+
+class Registro:
+    """Buffer circular de mediciones compartido por los hilos del proceso"""
+
+    def __init__(self, capacidad):
+        self._mediciones = deque(maxlen=capacidad)
+        self._lock = threading.Lock()
+
+    @property
+    def capacidad(self):
+        return self._mediciones.maxlen
+
+    def agregar(self, medicion):
+        with self._lock:
+            self._mediciones.append(medicion)
+
+    def mediciones(self):
+        with self._lock:
+            return list(self._mediciones)
+
+    def vaciar(self):
+        with self._lock:
+            self._mediciones.clear()
+
+
+registro = Registro(getattr(settings, 'SQL_CAPACIDAD', 500))
+
+
+def muestreo():
+    """Fracción de los requests que se miden (0 desactiva la instrumentación)"""
+    return getattr(settings, 'SQL_MUESTREO', 0.01)
+
+
+class _Consultas:
+    """execute_wrapper que anota SQL, parámetros y duración de cada consulta"""
+
+    def __init__(self):
+        self.filas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            # En executemany los parámetros pueden ser miles de filas: no se comparan
+            clave = None if many else repr(params)
+            self.filas.append((sql, clave, time.perf_counter() - inicio))
+
+
+def medir(request, respuesta, filas, duracion):
+    """Medición de un request a partir de sus consultas"""
+    por_sql = Counter(sql for sql, _, _ in filas)
+    exactas = Counter((sql, clave) for sql, clave, _ in filas if clave is not None)
+    lentas = sorted(filas, key=lambda fila: fila[2], reverse=True)[:LENTAS_POR_REQUEST]
+    coincidencia = request.resolver_match
+    return Medicion(
+        vista=coincidencia.view_name if coincidencia else '(sin ruta)',
+        metodo=request.method,
+        ruta=request.get_full_path()[:200],
+        estado=respuesta.status_code,
+        fecha=timezone.now(),
+        duracion=duracion * 1000,
+        consultas=len(filas),
+        tiempo_sql=sum(segundos for _, _, segundos in filas) * 1000,
+        repetidas=len(filas) - len(por_sql),
+        duplicadas=sum(exactas.values()) - len(exactas),
+        lentas=[(sql[:LARGO_SQL], segundos * 1000) for sql, _, segundos in lentas],
+        patrones=[(sql[:LARGO_SQL], veces) for sql, veces in por_sql.most_common(REPETIDAS_POR_REQUEST) if veces > 1],
+    )
+
+
+def _envolver_conexiones(envolturas, consultas):
+    for conexion in connections.all():
+        envolturas.enter_context(conexion.execute_wrapper(consultas))
+
+
+class InstrumentacionSQLMiddleware:
+    """Mide las consultas SQL de una muestra de los requests"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreo = muestreo()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _muestreado(self):
+        return self.muestreo > 0 and random.random() < self.muestreo
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._muestreado():
+            return self.get_response(request)
+        consultas = _Consultas()
+        inicio = time.perf_counter()
+        with ExitStack() as envolturas:
+            _envolver_conexiones(envolturas, consultas)
+            respuesta = self.get_response(request)
+        registro.agregar(medir(request, respuesta, consultas.filas, time.perf_counter() - inicio))
+        return respuesta
+
+    async def __acall__(self, request):
+        if not self._muestreado():
+            return await self.get_response(request)
+        consultas = _Consultas()
+        inicio = time.perf_counter()
+        envolturas = ExitStack()
+        await sync_to_async(_envolver_conexiones)(envolturas, consultas)
+        try:
+            respuesta = await self.get_response(request)
+        finally:
+            await sync_to_async(envolturas.close)()
+        registro.agregar(medir(request, respuesta, consultas.filas, time.perf_counter() - inicio))
+        return respuesta
+
+
+def resumen_por_vista(mediciones):
+    """Totales por vista, de la que más tiempo pasa en la base a la que menos"""
+    vistas = {}
+    for medicion in mediciones:
+        vista = vistas.setdefault(medicion.vista, {
+            'vista': medicion.vista, 'pedidos': 0, 'consultas': 0, 'max_consultas': 0,
+            'tiempo_sql': 0.0, 'duracion': 0.0, 'max_repetidas': 0, 'max_duplicadas': 0,
+        })
+        vista['pedidos'] += 1
+        vista['consultas'] += medicion.consultas
+        vista['max_consultas'] = max(vista['max_consultas'], medicion.consultas)
+        vista['tiempo_sql'] += medicion.tiempo_sql
+        vista['duracion'] += medicion.duracion
+        vista['max_repetidas'] = max(vista['max_repetidas'], medicion.repetidas)
+        vista['max_duplicadas'] = max(vista['max_duplicadas'], medicion.duplicadas)
+    for vista in vistas.values():
+        vista['promedio_consultas'] = vista['consultas'] / vista['pedidos']
+        vista['promedio_sql'] = vista['tiempo_sql'] / vista['pedidos']
+        vista['promedio_duracion'] = vista['duracion'] / vista['pedidos']
+    return sorted(vistas.values(), key=lambda vista: vista['tiempo_sql'], reverse=True)
+
+
+def peores_requests(mediciones, cantidad=20):
+    """Los requests con más consultas repetidas y, a igualdad, más tiempo en la base"""
+    return sorted(mediciones, key=lambda medicion: (medicion.repetidas, medicion.tiempo_sql), reverse=True)[:cantidad]
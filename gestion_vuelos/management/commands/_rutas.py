@@ -0,0 +1,57 @@
+"""
+Rutas de las vistas que recorren los comandos de diagnóstico
+(auditar_indices, medir_rutas), cada una con el cliente que la visita.
+
+Crea usuarios de prueba: llamarla dentro de una transacción que se
+revierte al terminar.
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.test import Client
+from django.urls import reverse
+
+from gestion_vuelos.models import Boleto, Reserva, Vuelo
+
+
+def rutas_de_vistas(prefijo="auditoria"):
+    """Lista de (nombre, url, cliente) sobre los datos que haya en la base"""
+    publico, admin, cliente = (Client(raise_request_exception=False, HTTP_HOST="localhost") for _ in range(3))
+    admin_user = User.objects.create_superuser(f"{prefijo}_admin", f"{prefijo}_admin@example.com", "x")
+    admin.force_login(admin_user)
+    cliente_user = User.objects.create_user(f"{prefijo}_cliente", f"{prefijo}_cliente@example.com", "x")
+    cliente.force_login(cliente_user)
+
+    vuelo = Vuelo.objects.filter(estado="programado").order_by("fecha_salida").first()
+    if vuelo is None:
+        raise CommandError(
+            "La base no tiene vuelos programados; cargá datos (manage.py generar_datos) antes de medir o auditar."
+        )
+    reserva = Reserva.objects.order_by("id").first()
+    boleto = Boleto.objects.order_by("id").first()
+
+    rutas = [
+        ("home", reverse("gestion_vuelos:home"), publico),
+        ("home (admin)", reverse("gestion_vuelos:home"), admin),
+        ("lista_vuelos", reverse("gestion_vuelos:lista_vuelos"), publico),
+        ("lista_vuelos (admin)", reverse("gestion_vuelos:lista_vuelos"), admin),
+        ("detalle_vuelo", reverse("gestion_vuelos:detalle_vuelo", args=[vuelo.id]), publico),
+        ("buscar_vuelos", reverse("gestion_vuelos:buscar_vuelos"), publico),
+        (
+            "buscar_vuelos (filtros)",
+            reverse("gestion_vuelos:buscar_vuelos")
+            + f"?origen={vuelo.origen}&destino={vuelo.destino}&fecha_salida={vuelo.fecha_salida.date()}",
+            publico,
+        ),
+        ("autocompletar_lugares", reverse("gestion_vuelos:autocompletar_lugares") + "?q=bue", publico),
+        ("crear_reserva", reverse("gestion_vuelos:crear_reserva", args=[vuelo.id]), cliente),
+        ("mis_reservas", reverse("gestion_vuelos:mis_reservas"), cliente),
+        ("lista_pasajeros", reverse("gestion_vuelos:lista_pasajeros"), admin),
+        ("reportes", reverse("gestion_vuelos:reportes"), admin),
+        ("reporte_vuelo", reverse("gestion_vuelos:reporte_vuelo", args=[vuelo.id]), admin),
+        ("lista_paquetes", reverse("gestion_vuelos:lista_paquetes"), publico),
+    ]
+    if reserva:
+        rutas.append(("detalle_reserva", reverse("gestion_vuelos:detalle_reserva", args=[reserva.id]), cliente))
+    if boleto:
+        rutas.append(("ver_boleto", reverse("gestion_vuelos:ver_boleto", args=[boleto.id]), cliente))
+    return rutas
@@ -0,0 +1,78 @@
+import logging
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from gestion_vuelos.replicas import solo_primario
+
+from ._rutas import rutas_de_vistas
+
+# Patrones de recorrido secuencial en la salida de EXPLAIN de cada motor
+SCAN_SECUENCIAL = {
+    'sqlite': re.compile(r'\bSCAN (?!.*\bUSING (?:COVERING )?INDEX\b)(?!CONSTANT ROW)(\S+)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\S+)'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta EXPLAIN sobre las consultas que hace cada vista contra la base "
+        "configurada y marca los recorridos secuenciales de tablas"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose-plan", action="store_true", help="Mostrar el plan completo de cada consulta")
+        parser.add_argument(
+            "--permitir", nargs="*", default=[],
+            help="Tablas adicionales en las que se acepta un recorrido secuencial",
+        )
+
+    def handle(self, *args, **options):
+        patron = SCAN_SECUENCIAL.get(connection.vendor)
+        if patron is None:
+            raise CommandError(f"Motor no soportado para la auditoría: {connection.vendor}")
+        permitidas = set(options["permitir"])
+
+        hallazgos = []
+        # Los errores 500 se informan en la salida del comando, sin el traceback del logger
+        logger = logging.getLogger("django.request")
+        nivel_anterior = logger.level
+        logger.setLevel(logging.CRITICAL)
+        try:
+            self._auditar(patron, permitidas, hallazgos, options["verbose_plan"])
+        finally:
+            logger.setLevel(nivel_anterior)
+
+        if hallazgos:
+            raise CommandError(f"{len(hallazgos)} consulta(s) con recorridos secuenciales.")
+        self.stdout.write(self.style.SUCCESS("\nNinguna consulta de las vistas recorre tablas completas."))
+
+    def _auditar(self, patron, permitidas, hallazgos, verbose_plan):
+        # Todo lo que escriban las vistas (sesiones, pasajeros) se descarta al final
+        with transaction.atomic(), solo_primario():
+            for nombre, url, cliente in rutas_de_vistas():
+                with CaptureQueriesContext(connection) as capturadas:
+                    respuesta = cliente.get(url)
+                self.stdout.write(f"\n{nombre} {url} -> {respuesta.status_code} ({len(capturadas)} consultas)")
+                for consulta in capturadas.captured_queries:
+                    sql = consulta["sql"]
+                    if not sql.lstrip().upper().startswith("SELECT"):
+                        continue
+                    plan = self._explain(sql)
+                    tablas = [t.strip('"') for t in patron.findall(plan)]
+                    marcadas = [t for t in tablas if t not in permitidas]
+                    if marcadas:
+                        hallazgos.append((nombre, marcadas, sql))
+                        self.stdout.write(self.style.WARNING(f"  SCAN {', '.join(marcadas)}: {sql[:160]}"))
+                    if verbose_plan:
+                        self.stdout.write(f"  {sql[:160]}\n    " + plan.replace("\n", "\n    "))
+            transaction.set_rollback(True)
+
+    def _explain(self, sql):
+        prefijo = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+        with connection.cursor() as cursor:
+            cursor.execute(prefijo + sql)
+            filas = cursor.fetchall()
+        return "\n".join(str(fila[-1]) for fila in filas)
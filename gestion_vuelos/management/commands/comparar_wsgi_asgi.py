@@ -0,0 +1,190 @@
+import asyncio
+import io
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import get_internal_wsgi_application
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from gestion_vuelos.models import Vuelo
+
+from .medir_rutas import percentiles
+
+HOST = "localhost"
+
+
+def rutas_de_navegacion():
+    """Las páginas de las vistas async, como las recorre un visitante anónimo"""
+    vuelo = Vuelo.objects.filter(estado="programado").order_by("fecha_salida").first()
+    if vuelo is None:
+        raise CommandError(
+            "La base no tiene vuelos programados; cargá datos (manage.py generar_datos) antes de medir."
+        )
+    return [
+        (reverse("gestion_vuelos:lista_vuelos"), ""),
+        (
+            reverse("gestion_vuelos:buscar_vuelos"),
+            f"origen={vuelo.origen}&destino={vuelo.destino}&fecha_salida={vuelo.fecha_salida.date()}",
+        ),
+        (reverse("gestion_vuelos:detalle_vuelo", args=[vuelo.id]), ""),
+    ]
+
+
+def pedido_wsgi(aplicacion, ruta, query):
+    """Un GET contra la aplicación WSGI, como lo haría un worker de gunicorn"""
+    estado = []
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": ruta, "QUERY_STRING": query, "SCRIPT_NAME": "",
+        "SERVER_NAME": HOST, "SERVER_PORT": "80", "SERVER_PROTOCOL": "HTTP/1.1", "HTTP_HOST": HOST,
+        "REMOTE_ADDR": "127.0.0.1", "wsgi.version": (1, 0), "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(), "wsgi.errors": sys.stderr, "wsgi.multithread": True,
+        "wsgi.multiprocess": False, "wsgi.run_once": False,
+    }
+    respuesta = aplicacion(environ, lambda status, headers, exc_info=None: estado.append(status))
+    try:
+        for _ in respuesta:
+            pass
+    finally:
+        # Dispara request_finished: cierra la conexión igual que un servidor real
+        respuesta.close()
+    return int(estado[0].split()[0])
+
+
+async def pedido_asgi(aplicacion, ruta, query):
+    """Un GET contra la aplicación ASGI, como lo haría uvicorn"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": ruta, "raw_path": ruta.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(b"host", HOST.encode())], "client": ("127.0.0.1", 0),
+        "server": (HOST, 80),
+    }
+    recibido = False
+    estado = []
+
+    async def receive():
+        nonlocal recibido
+        if not recibido:
+            recibido = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # El cliente nunca se desconecta antes de leer la respuesta
+        await asyncio.Event().wait()
+
+    async def send(mensaje):
+        if mensaje["type"] == "http.response.start":
+            estado.append(mensaje["status"])
+
+    await aplicacion(scope, receive, send)
+    return estado[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara cuántos visitantes concurrentes atienden las páginas de vuelos (lista, búsqueda "
+        "y detalle) bajo WSGI con un pool fijo de hilos y bajo ASGI en un solo proceso"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrencia", type=int, nargs="+", default=[1, 10, 50],
+                            help="Visitantes simultáneos de cada ronda")
+        parser.add_argument("--pedidos", type=int, default=150, help="Pedidos por ronda")
+        parser.add_argument("--hilos-wsgi", type=int, default=4,
+                            help="Hilos del servidor WSGI (p. ej. gunicorn --threads)")
+        parser.add_argument("--latencia-db-ms", type=float, default=0.0,
+                            help="Espera agregada a cada consulta, para simular una base en otra máquina")
+        parser.add_argument("--con-cache", action="store_true",
+                            help="Permitir que las páginas se sirvan desde la cache (por defecto cada URL es única)")
+        parser.add_argument("--escala", type=float, default=None,
+                            help="Regenerar antes los datos sintéticos con esta escala (ver generar_datos)")
+
+    def handle(self, *args, **options):
+        if options["pedidos"] < 1 or options["hilos_wsgi"] < 1 or min(options["concurrencia"]) < 1:
+            raise CommandError("Pedidos, hilos y concurrencia tienen que ser al menos 1.")
+        if options["escala"] is not None:
+            call_command("generar_datos", escala=options["escala"], limpiar=True, stdout=self.stdout)
+        rutas = rutas_de_navegacion()
+        # Cada pedido abre su propia conexión, en el hilo que lo atienda
+        connection.close()
+
+        wsgi = get_internal_wsgi_application()
+        asgi = import_string(settings.ASGI_APPLICATION)
+        numeros = count()
+
+        def siguiente():
+            numero = next(numeros)
+            ruta, query = rutas[numero % len(rutas)]
+            if not options["con_cache"]:
+                # Una URL distinta por pedido: la cache de páginas no responde por la vista
+                query = f"{query}&_n={numero}".lstrip("&")
+            return ruta, query
+
+        retardo = options["latencia_db_ms"] / 1000
+
+        def simular_latencia(execute, sql, params, many, context):
+            time.sleep(retardo)
+            return execute(sql, params, many, context)
+
+        def al_conectar(sender, connection, **kwargs):
+            connection.execute_wrappers.append(simular_latencia)
+
+        if retardo:
+            connection_created.connect(al_conectar)
+        logger = logging.getLogger("django.request")
+        nivel_anterior = logger.level
+        logger.setLevel(logging.CRITICAL)
+        try:
+            filas = []
+            for concurrencia in options["concurrencia"]:
+                for modo in ("wsgi", "asgi"):
+                    filas.append((modo, concurrencia, asyncio.run(self._ronda(
+                        modo, wsgi, asgi, siguiente, concurrencia, options["pedidos"], options["hilos_wsgi"],
+                    ))))
+        finally:
+            logger.setLevel(nivel_anterior)
+            connection_created.disconnect(al_conectar)
+        self._informar(filas, options)
+
+    async def _ronda(self, modo, wsgi, asgi, siguiente, concurrencia, pedidos, hilos):
+        """Visitantes que piden páginas una tras otra hasta completar `pedidos`"""
+        pendientes = iter(range(pedidos))
+        latencias, errores = [], 0
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=hilos) as servidor_wsgi:
+
+            async def visitante():
+                nonlocal errores
+                for _ in pendientes:
+                    ruta, query = siguiente()
+                    inicio = time.perf_counter()
+                    if modo == "wsgi":
+                        estado = await loop.run_in_executor(servidor_wsgi, pedido_wsgi, wsgi, ruta, query)
+                    else:
+                        estado = await pedido_asgi(asgi, ruta, query)
+                    latencias.append((time.perf_counter() - inicio) * 1000)
+                    if estado >= 400:
+                        errores += 1
+
+            inicio = time.perf_counter()
+            await asyncio.gather(*(visitante() for _ in range(concurrencia)))
+            duracion = time.perf_counter() - inicio
+        return {"por_segundo": pedidos / duracion, "errores": errores, **percentiles(latencias)}
+
+    def _informar(self, filas, options):
+        self.stdout.write(
+            f"{options['pedidos']} pedidos por ronda · WSGI con {options['hilos_wsgi']} hilos · "
+            f"latencia simulada por consulta {options['latencia_db_ms']:g} ms"
+        )
+        self.stdout.write("modo  concurrencia  pedidos/s  p50 ms  p95 ms  p99 ms  errores")
+        for modo, concurrencia, medida in filas:
+            self.stdout.write(
+                f"{modo:<4}  {concurrencia:>12}  {medida['por_segundo']:>9.1f}  {medida['p50']:>6.1f}"
+                f"  {medida['p95']:>6.1f}  {medida['p99']:>6.1f}  {medida['errores']:>7}"
+            )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion_vuelos.models import Vuelo
+from gestion_vuelos.services import emitir_boletos
+
+
+class Command(BaseCommand):
+    help = "Emite en lote los boletos de las reservas confirmadas o pagadas de uno o más vuelos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("codigos", nargs="+", help="Códigos de vuelo")
+
+    def handle(self, *args, **options):
+        vuelos = dict(Vuelo.objects.filter(codigo_vuelo__in=options["codigos"]).values_list("codigo_vuelo", "id"))
+        faltantes = sorted(set(options["codigos"]) - set(vuelos))
+        if faltantes:
+            raise CommandError(f"Vuelos inexistentes: {', '.join(faltantes)}")
+        emitidos = emitir_boletos(list(vuelos.values()))
+        self.stdout.write(self.style.SUCCESS(f"{emitidos} boleto(s) emitido(s) para {len(vuelos)} vuelo(s)."))
@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion_vuelos.exportacion import EXPORTABLES, FORMATOS, ExportacionError, exportar, leer_fecha
+
+
+class Command(BaseCommand):
+    help = "Exporta reservas, pasajeros o vuelos en CSV o JSON Lines, en streaming y con memoria constante"
+
+    def add_arguments(self, parser):
+        parser.add_argument("entidad", choices=list(EXPORTABLES))
+        parser.add_argument("--formato", choices=FORMATOS, default="csv")
+        parser.add_argument("--desde", help="Primer día incluido (AAAA-MM-DD)")
+        parser.add_argument("--hasta", help="Último día incluido (AAAA-MM-DD)")
+        parser.add_argument("--estado", help="Filtrar por estado (reservas y vuelos)")
+        parser.add_argument("--salida", help="Archivo de destino (por defecto, la salida estándar)")
+
+    def handle(self, *args, **options):
+        try:
+            lineas = exportar(
+                options["entidad"], options["formato"],
+                desde=leer_fecha(options["desde"], "desde"),
+                hasta=leer_fecha(options["hasta"], "hasta"),
+                estado=options["estado"],
+            )
+        except ExportacionError as e:
+            raise CommandError(str(e))
+
+        if not options["salida"]:
+            # Directo a stdout: self.stdout agrega saltos de línea y estilos
+            sys.stdout.writelines(lineas)
+            return
+        total = 0
+        with open(options["salida"], "w", encoding="utf-8", newline="") as archivo:
+            for linea in lineas:
+                archivo.write(linea)
+                total += 1
+        if options["formato"] == "csv":
+            total -= 1
+        self.stderr.write(self.style.SUCCESS(f"{total} registro(s) exportado(s) a {options['salida']}."))
@@ -0,0 +1,287 @@
+import random
+import time as reloj
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from gestion_vuelos.cache_paginas import incrementar_version
+from gestion_vuelos.models import (
+    Aeropuerto, Asiento, AsientoVuelo, Avion, Boleto, Pasajero, Reserva, Vuelo, normalizar_lugar,
+)
+
+# Todo lo generado se reconoce por este prefijo (modelo de avión, documento, códigos)
+PREFIJO = "GD"
+# Volúmenes con --escala 1; --escala 10 llega a ~1,3 millones de reservas
+AVIONES = 40
+VUELOS = 1000
+PASAJEROS = 50000
+# Vuelos por transacción: cada uno arrastra su inventario, reservas y boletos
+BLOQUE_VUELOS = 200
+# Salidas repartidas entre este pasado y este futuro respecto de la fecha base
+DIAS_HISTORIA = 180
+DIAS_VENTA = 180
+
+# (modelo, filas, columnas)
+TIPOS_AVION = [
+    ("Airbus A320", 30, 6),
+    ("Boeing 737-800", 32, 6),
+    ("Embraer E190", 25, 4),
+    ("Airbus A330-200", 40, 8),
+    ("Boeing 787-9", 42, 9),
+]
+# (origen, destino, horas de vuelo, precio base)
+RUTAS = [
+    ("Buenos Aires", "Córdoba", 1.2, "39999.00"),
+    ("Córdoba", "Mendoza", 1.5, "45999.00"),
+    ("Mendoza", "Salta", 2.0, "50999.00"),
+    ("Buenos Aires", "Bariloche", 2.5, "62999.00"),
+    ("Córdoba", "Iguazú", 2.0, "49999.00"),
+    ("Rosario", "Neuquén", 2.1, "52999.00"),
+    ("Buenos Aires", "Ushuaia", 3.3, "89999.00"),
+    ("Córdoba", "Tucumán", 1.4, "43999.00"),
+    ("Buenos Aires", "Comodoro Rivadavia", 2.6, "69999.00"),
+    ("Buenos Aires", "Bahía Blanca", 1.5, "47999.00"),
+    ("Buenos Aires (EZE)", "Miami (MIA)", 9.0, "399999.00"),
+    ("Buenos Aires (EZE)", "Madrid (MAD)", 12.5, "549999.00"),
+    ("Buenos Aires (EZE)", "San Pablo (GRU)", 3.0, "189999.00"),
+    ("Buenos Aires (EZE)", "Río de Janeiro (GIG)", 3.2, "199999.00"),
+    ("Buenos Aires (EZE)", "Santiago (SCL)", 2.2, "159999.00"),
+    ("Buenos Aires (EZE)", "Lima (LIM)", 4.5, "229999.00"),
+]
+NOMBRES = [
+    "Juan", "María", "José", "Ana", "Carlos", "Lucía", "Martín", "Sofía", "Diego", "Valentina",
+    "Pablo", "Camila", "Jorge", "Florencia", "Luis", "Julieta", "Andrés", "Paula", "Facundo", "Agustina",
+]
+APELLIDOS = [
+    "González", "Rodríguez", "Gómez", "Fernández", "López", "Díaz", "Martínez", "Pérez", "García", "Sánchez",
+    "Romero", "Sosa", "Álvarez", "Torres", "Ruiz", "Ramírez", "Flores", "Acosta", "Benítez", "Medina",
+]
+MULTIPLICADOR_CLASE = {"economica": 1, "ejecutiva": Decimal("2.5"), "primera": 4}
+# Estados de reserva con su peso, según el vuelo ya haya salido o no
+ESTADOS_PASADO = (["completada", "cancelada"], [92, 8])
+ESTADOS_FUTURO = (["pagada", "confirmada", "cancelada"], [65, 25, 10])
+
+
+@contextmanager
+def fechas_explicitas(*campos):
+    """Permite fijar a mano campos auto_now_add: los datos generados tienen historia"""
+    originales = [(campo, campo.auto_now_add) for campo in campos]
+    for campo, _ in originales:
+        campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, valor in originales:
+            campo.auto_now_add = valor
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos a escala (aviones, vuelos, pasajeros, reservas y boletos) "
+        "con inserciones en lote; la misma semilla y fecha base producen los mismos datos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--escala", type=float, default=1.0,
+                            help=f"Factor de volumen (1 = {VUELOS} vuelos y {PASAJEROS} pasajeros)")
+        parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador")
+        parser.add_argument("--fecha-base", default=None,
+                            help="Día (AAAA-MM-DD) que hace de 'hoy' para los datos; por defecto hoy")
+        parser.add_argument("--lote", type=int, default=2000, help="Filas por INSERT")
+        parser.add_argument("--limpiar", action="store_true", help="Borrar antes los datos generados previamente")
+
+    def handle(self, *args, **options):
+        escala = options["escala"]
+        self.lote = options["lote"]
+        self.verbosity = options["verbosity"]
+        if escala <= 0 or self.lote < 1:
+            raise CommandError("La escala y el tamaño de lote deben ser positivos.")
+        fecha = timezone.localdate()
+        if options["fecha_base"]:
+            fecha = parse_date(options["fecha_base"])
+            if fecha is None:
+                raise CommandError(f"Fecha base inválida: {options['fecha_base']} (formato AAAA-MM-DD).")
+        self.base = timezone.make_aware(datetime.combine(fecha, time.min))
+        self.rng = random.Random(options["semilla"])
+
+        generados = Avion.objects.filter(modelo__startswith=f"{PREFIJO}-").exists() or \
+            Pasajero.objects.filter(documento__startswith=f"{PREFIJO}-").exists()
+        if generados:
+            if not options["limpiar"]:
+                raise CommandError("Ya hay datos generados; usar --limpiar para reemplazarlos.")
+            self._limpiar()
+
+        inicio = reloj.perf_counter()
+        campos = [modelo._meta.get_field(nombre) for modelo, nombre in
+                  ((Pasajero, "fecha_registro"), (Reserva, "fecha_reserva"), (Boleto, "fecha_emision"))]
+        with fechas_explicitas(*campos):
+            aviones = self._aviones(max(len(TIPOS_AVION), round(AVIONES * escala)))
+            pasajeros = self._pasajeros(max(1, round(PASAJEROS * escala)))
+            totales = self._vuelos(max(1, round(VUELOS * escala)), aviones, pasajeros)
+
+        # Los INSERT en lote no pasan por save() ni por las señales
+        call_command("reconstruir_resumenes", stdout=StringIO())
+        for grupo in ("vuelos", "reservas"):
+            transaction.on_commit(lambda grupo=grupo: incrementar_version(grupo))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(aviones)} aviones, {totales['vuelos']} vuelos, {len(pasajeros)} pasajeros, "
+            f"{totales['reservas']} reservas y {totales['boletos']} boletos generados "
+            f"en {reloj.perf_counter() - inicio:.1f}s."
+        ))
+
+    def _limpiar(self):
+        aviones = Avion.objects.filter(modelo__startswith=f"{PREFIJO}-")
+        vuelos = Vuelo.objects.filter(avion__in=aviones)
+        reservas = Reserva.objects.filter(Q(vuelo__in=vuelos) | Q(pasajero__documento__startswith=f"{PREFIJO}-"))
+        # QuerySet.delete() leería cada fila para emitir post_delete; el
+        # resumen de reportes se reconstruye al terminar, así que basta SQL
+        with transaction.atomic():
+            for queryset in (
+                Boleto.objects.filter(reserva__in=reservas), reservas,
+                AsientoVuelo.objects.filter(vuelo__in=vuelos), vuelos,
+                Asiento.objects.filter(avion__in=aviones), aviones,
+                Pasajero.objects.filter(documento__startswith=f"{PREFIJO}-"),
+            ):
+                queryset._raw_delete(queryset.db)
+
+    def _aviones(self, cantidad):
+        """(id, ids de asientos, tipos de asiento) de cada avión generado"""
+        with transaction.atomic():
+            for i in range(cantidad):
+                modelo, filas, columnas = TIPOS_AVION[i % len(TIPOS_AVION)]
+                Avion(modelo=f"{PREFIJO}-{i:04d} {modelo}", filas=filas, columnas=columnas).save()
+            generados = Asiento.objects.filter(avion__modelo__startswith=f"{PREFIJO}-")
+            generados.filter(fila__lte=3).update(tipo="ejecutiva")
+            generados.filter(fila=1, avion__columnas__gte=8).update(tipo="primera")
+        aviones = {}
+        filas = generados.order_by("avion_id", "fila", "columna").values_list("avion_id", "id", "tipo")
+        for avion_id, asiento_id, tipo in filas.iterator(self.lote):
+            asientos = aviones.setdefault(avion_id, ([], []))
+            asientos[0].append(asiento_id)
+            asientos[1].append(tipo)
+        return [(avion_id, ids, tipos) for avion_id, (ids, tipos) in aviones.items()]
+
+    def _pasajeros(self, cantidad):
+        """Ids de los pasajeros generados, en el orden de su documento"""
+        rng = self.rng
+        for desde in range(0, cantidad, self.lote):
+            nuevos = []
+            for i in range(desde, min(desde + self.lote, cantidad)):
+                nombre, apellido = rng.choice(NOMBRES), rng.choice(APELLIDOS)
+                nuevos.append(Pasajero(
+                    nombre=f"{nombre} {apellido}",
+                    documento=f"{PREFIJO}-{i:08d}",
+                    tipo_documento=rng.choices(["dni", "pasaporte"], [9, 1])[0],
+                    email=f"{normalizar_lugar(nombre)}.{normalizar_lugar(apellido)}{i}@example.com",
+                    telefono=f"+54 9 11 {rng.randrange(10**8):08d}",
+                    fecha_nacimiento=date(1940, 1, 1) + timedelta(days=rng.randrange(75 * 365)),
+                    fecha_registro=self.base - timedelta(seconds=rng.randrange(2 * 365 * 86400)),
+                ))
+            with transaction.atomic():
+                Pasajero.objects.bulk_create(nuevos, batch_size=self.lote)
+        return list(
+            Pasajero.objects.filter(documento__startswith=f"{PREFIJO}-").order_by("documento").values_list("id", flat=True)
+        )
+
+    def _vuelos(self, cantidad, aviones, pasajeros):
+        aeropuertos = {}
+        for origen, destino, _, _ in RUTAS:
+            for lugar in (origen, destino):
+                if lugar not in aeropuertos:
+                    aeropuertos[lugar] = Aeropuerto.desde_texto(lugar)
+        totales = {"vuelos": 0, "reservas": 0, "boletos": 0}
+        for desde in range(0, cantidad, BLOQUE_VUELOS):
+            with transaction.atomic():
+                self._bloque_vuelos(range(desde, min(desde + BLOQUE_VUELOS, cantidad)), aviones, pasajeros,
+                                    aeropuertos, totales)
+            if self.verbosity > 1:
+                self.stdout.write(f"{totales['vuelos']}/{cantidad} vuelos, {totales['reservas']} reservas")
+        return totales
+
+    def _bloque_vuelos(self, indices, aviones, pasajeros, aeropuertos, totales):
+        rng = self.rng
+        vuelos, planes = [], []
+        for i in indices:
+            origen, destino, horas, precio = rng.choice(RUTAS)
+            avion_id, asiento_ids, tipos = rng.choice(aviones)
+            salida = self.base + timedelta(minutes=5 * rng.randrange(-DIAS_HISTORIA * 288, DIAS_VENTA * 288))
+            dias = (salida - self.base).days
+            if dias < 0:
+                estado = rng.choices(["aterrizado", "cancelado"], [97, 3])[0]
+                ocupacion = rng.uniform(0.4, 0.98)
+            else:
+                estado = rng.choices(["programado", "retrasado", "cancelado"], [92, 5, 3])[0]
+                # Los vuelos cercanos están más vendidos que los lejanos
+                ocupacion = max(0.05, 0.95 - dias / 200) * rng.uniform(0.6, 1.0)
+            vendidos = rng.sample(range(len(asiento_ids)), int(len(asiento_ids) * ocupacion))
+            estados, pesos = ESTADOS_PASADO if dias < 0 else ESTADOS_FUTURO
+            reservas = [
+                (posicion, "cancelada" if estado == "cancelado" else rng.choices(estados, pesos)[0])
+                for posicion in vendidos
+            ]
+            vuelos.append(Vuelo(
+                avion_id=avion_id, origen=origen, destino=destino,
+                aeropuerto_origen=aeropuertos[origen], aeropuerto_destino=aeropuertos[destino],
+                fecha_salida=salida, fecha_llegada=salida + timedelta(hours=horas), duracion=timedelta(hours=horas),
+                estado=estado, precio_base=Decimal(precio), codigo_vuelo=f"{PREFIJO}{i:06d}",
+                asientos_vendidos=sum(e in Reserva.ESTADOS_ACTIVOS for _, e in reservas),
+            ))
+            planes.append((asiento_ids, tipos, Decimal(precio), salida, reservas))
+        Vuelo.objects.bulk_create(vuelos, batch_size=self.lote)
+        # Los códigos son consecutivos: un rango sobre el índice único trae los ids
+        ids = dict(Vuelo.objects.filter(
+            codigo_vuelo__range=(vuelos[0].codigo_vuelo, vuelos[-1].codigo_vuelo)
+        ).values_list("codigo_vuelo", "id"))
+
+        inventario, nuevas, salidas = [], [], {}
+        for vuelo, (asiento_ids, tipos, precio, salida, reservas) in zip(vuelos, planes):
+            vuelo_id = ids[vuelo.codigo_vuelo]
+            salidas[vuelo_id] = salida
+            ocupados = {posicion for posicion, estado in reservas if estado in Reserva.ESTADOS_ACTIVOS}
+            inventario.extend(
+                AsientoVuelo(vuelo_id=vuelo_id, asiento_id=asiento_id,
+                             estado="reservado" if posicion in ocupados else "disponible")
+                for posicion, asiento_id in enumerate(asiento_ids)
+            )
+            for posicion, estado in reservas:
+                fecha = salida - timedelta(seconds=rng.randrange(3600, 120 * 86400))
+                if fecha > self.base:
+                    fecha = self.base - timedelta(seconds=rng.randrange(3 * 86400))
+                factor = MULTIPLICADOR_CLASE[tipos[posicion]] * Decimal(rng.randrange(80, 131)) / 100
+                nuevas.append(Reserva(
+                    vuelo_id=vuelo_id, pasajero_id=rng.choice(pasajeros), asiento_id=asiento_ids[posicion],
+                    estado=estado, fecha_reserva=fecha, precio=(precio * factor).quantize(Decimal("0.01")),
+                    codigo_reserva=f"G{totales['reservas'] + len(nuevas):09d}",
+                ))
+        AsientoVuelo.objects.bulk_create(inventario, batch_size=self.lote)
+        Reserva.objects.bulk_create(nuevas, batch_size=self.lote)
+
+        boletos = []
+        if nuevas:
+            ids = dict(Reserva.objects.filter(
+                codigo_reserva__range=(nuevas[0].codigo_reserva, nuevas[-1].codigo_reserva)
+            ).values_list("codigo_reserva", "id"))
+            for reserva in nuevas:
+                if reserva.estado not in ("pagada", "completada"):
+                    continue
+                usado = reserva.estado == "completada"
+                boletos.append(Boleto(
+                    reserva_id=ids[reserva.codigo_reserva],
+                    codigo_barra=f"{PREFIJO}{reserva.codigo_reserva}{rng.getrandbits(32):08X}",
+                    fecha_emision=reserva.fecha_reserva + timedelta(minutes=rng.randrange(1, 60)),
+                    estado="usado" if usado else "emitido",
+                    fecha_uso=salidas[reserva.vuelo_id] - timedelta(minutes=rng.randrange(10, 50)) if usado else None,
+                ))
+            Boleto.objects.bulk_create(boletos, batch_size=self.lote)
+        totales["vuelos"] += len(vuelos)
+        totales["reservas"] += len(nuevas)
+        totales["boletos"] += len(boletos)
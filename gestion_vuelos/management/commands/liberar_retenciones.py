@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion_vuelos.services import TAMANO_LOTE_RETENCIONES, liberar_retenciones_vencidas
+
+
+class Command(BaseCommand):
+    help = (
+        "Cancela las reservas pendientes con la retención vencida y libera sus asientos. "
+        "Pensado para ejecutarse periódicamente (p. ej. cada minuto desde cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote", type=int, default=TAMANO_LOTE_RETENCIONES,
+            help=f"Filas por UPDATE (por defecto {TAMANO_LOTE_RETENCIONES})",
+        )
+
+    def handle(self, *args, **options):
+        if options["lote"] < 1:
+            raise CommandError("--lote debe ser mayor que cero.")
+        canceladas, liberados = liberar_retenciones_vencidas(lote=options["lote"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{canceladas} reserva(s) pendiente(s) cancelada(s), {liberados} asiento(s) liberado(s)."
+        ))
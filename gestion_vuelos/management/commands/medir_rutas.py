@@ -0,0 +1,143 @@
+import json
+import logging
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from gestion_vuelos.replicas import solo_primario
+
+from ._rutas import rutas_de_vistas
+
+BASE_POR_DEFECTO = Path(settings.BASE_DIR) / "benchmark_rutas.json"
+PERCENTILES = (50, 95, 99)
+
+
+def percentiles(muestras):
+    """p50, p95 y p99 en milisegundos"""
+    if len(muestras) == 1:
+        return {f"p{p}": muestras[0] for p in PERCENTILES}
+    cortes = statistics.quantiles(muestras, n=100, method="inclusive")
+    return {f"p{p}": cortes[p - 1] for p in PERCENTILES}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia (p50/p95/p99) y las consultas SQL de cada vista y las compara "
+        "con una base guardada; falla si alguna ruta suma consultas o duplica su latencia. "
+        "La base del repositorio se midió con --escala 0.1 --semilla 0"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=30, help="Pedidos medidos por ruta")
+        parser.add_argument("--calentamiento", type=int, default=3, help="Pedidos descartados antes de medir")
+        parser.add_argument("--escala", type=float, default=None,
+                            help="Regenerar antes los datos sintéticos con esta escala (ver generar_datos)")
+        parser.add_argument("--semilla", type=int, default=0, help="Semilla de los datos regenerados con --escala")
+        parser.add_argument("--con-cache", action="store_true",
+                            help="No vaciar la cache entre pedidos (mide las páginas ya cacheadas)")
+        parser.add_argument("--base", default=str(BASE_POR_DEFECTO), help="Archivo JSON con la medición de referencia")
+        parser.add_argument("--guardar-base", action="store_true", help="Guardar esta medición como referencia")
+        parser.add_argument("--factor-latencia", type=float, default=2.0,
+                            help="Regresión si el p50 supera la base multiplicado por este factor")
+        parser.add_argument("--margen-ms", type=float, default=5.0,
+                            help="Diferencia de latencia que nunca cuenta como regresión (ruido)")
+
+    def handle(self, *args, **options):
+        if options["repeticiones"] < 1 or options["calentamiento"] < 0:
+            raise CommandError("Se necesita al menos una repetición.")
+        if options["escala"] is not None:
+            call_command("generar_datos", escala=options["escala"], semilla=options["semilla"],
+                         limpiar=True, stdout=self.stdout)
+
+        # Los 4xx/5xx se informan en la tabla, sin el traceback del logger
+        logger = logging.getLogger("django.request")
+        nivel_anterior = logger.level
+        logger.setLevel(logging.CRITICAL)
+        try:
+            resultados = self._medir(options)
+        finally:
+            logger.setLevel(nivel_anterior)
+
+        self._informar(resultados)
+        ruta_base = Path(options["base"])
+        # Sin --escala se mide sobre los datos que ya haya en la base
+        datos = {"escala": options["escala"], "semilla": options["semilla"] if options["escala"] is not None else None}
+        if options["guardar_base"]:
+            ruta_base.write_text(json.dumps(
+                {"repeticiones": options["repeticiones"], **datos, "rutas": resultados}, indent=2, ensure_ascii=False
+            ) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Base guardada en {ruta_base}."))
+            return
+        if not ruta_base.exists():
+            raise CommandError(f"No hay base en {ruta_base}; correr con --guardar-base para crearla.")
+        base = json.loads(ruta_base.read_text())
+        if base.get("escala") is not None and (base["escala"], base["semilla"]) != (datos["escala"], datos["semilla"]):
+            raise CommandError(
+                f"La base {ruta_base} se midió con --escala {base['escala']:g} --semilla {base['semilla']}; "
+                "medir con los mismos datos para poder comparar."
+            )
+        regresiones = self._comparar(resultados, base["rutas"], options["factor_latencia"], options["margen_ms"])
+        for regresion in regresiones:
+            self.stdout.write(self.style.ERROR(f"  {regresion}"))
+        if regresiones:
+            raise CommandError(f"{len(regresiones)} regresión(es) respecto de {ruta_base}.")
+        self.stdout.write(self.style.SUCCESS(f"Sin regresiones respecto de {ruta_base}."))
+
+    def _medir(self, options):
+        resultados = {}
+        # Usuarios de prueba y sesiones se descartan al final
+        with transaction.atomic(), solo_primario():
+            for nombre, url, cliente in rutas_de_vistas(prefijo="benchmark"):
+                for _ in range(options["calentamiento"]):
+                    cliente.get(url)
+                muestras, consultas = [], []
+                for _ in range(options["repeticiones"]):
+                    if not options["con_cache"]:
+                        cache.clear()
+                    with CaptureQueriesContext(connection) as capturadas:
+                        inicio = time.perf_counter()
+                        respuesta = cliente.get(url)
+                        muestras.append((time.perf_counter() - inicio) * 1000)
+                    consultas.append(len(capturadas))
+                resultados[nombre] = {
+                    "url": url,
+                    "estado": respuesta.status_code,
+                    # El máximo: una consulta que aparece solo a veces también cuenta
+                    "consultas": max(consultas),
+                    **{clave: round(valor, 2) for clave, valor in percentiles(muestras).items()},
+                }
+            transaction.set_rollback(True)
+        return resultados
+
+    def _informar(self, resultados):
+        ancho = max(len(nombre) for nombre in resultados)
+        self.stdout.write(f"{'Ruta':<{ancho}}  estado  p50 ms  p95 ms  p99 ms  consultas")
+        for nombre, medida in resultados.items():
+            self.stdout.write(
+                f"{nombre:<{ancho}}  {medida['estado']:>6}  {medida['p50']:>6.1f}  {medida['p95']:>6.1f}"
+                f"  {medida['p99']:>6.1f}  {medida['consultas']:>9}"
+            )
+
+    def _comparar(self, resultados, base, factor, margen):
+        regresiones = []
+        for nombre, medida in resultados.items():
+            referencia = base.get(nombre)
+            if referencia is None:
+                continue
+            if medida["estado"] != referencia["estado"]:
+                regresiones.append(f"{nombre}: estado {medida['estado']} (base {referencia['estado']})")
+            if medida["consultas"] > referencia["consultas"]:
+                regresiones.append(
+                    f"{nombre}: {medida['consultas']} consultas (base {referencia['consultas']}); ¿N+1?"
+                )
+            limite = max(referencia["p50"] * factor, referencia["p50"] + margen)
+            if medida["p50"] > limite:
+                regresiones.append(f"{nombre}: p50 {medida['p50']:.1f} ms (base {referencia['p50']:.1f} ms)")
+        return regresiones
@@ -0,0 +1,160 @@
+import random
+import statistics
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.db.models import Count
+from django.utils import timezone
+
+from gestion_vuelos.models import Avion, Pasajero, Reserva, Vuelo
+from gestion_vuelos.services import AsientoOcupado, reservar_asiento
+
+
+class Command(BaseCommand):
+    help = (
+        "Lanza compradores concurrentes contra un mismo vuelo de prueba, verifica "
+        "que no haya asientos reservados dos veces e informa el throughput"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--compradores", type=int, default=50, help="Hilos compradores concurrentes")
+        parser.add_argument("--asientos", type=int, default=30, help="Asientos del avión de prueba")
+        parser.add_argument("--semilla", type=int, default=None, help="Semilla para la elección de asientos")
+        parser.add_argument("--conservar", action="store_true", help="No borrar el vuelo y los pasajeros de prueba")
+
+    def handle(self, *args, **options):
+        compradores = options["compradores"]
+        if compradores < 1 or options["asientos"] < 1:
+            raise CommandError("Se necesita al menos un comprador y un asiento.")
+        rng = random.Random(options["semilla"])
+
+        vuelo, pasajeros = self._preparar(compradores, options["asientos"])
+        asiento_ids = list(vuelo.avion.asientos.values_list("id", flat=True))
+        # Al terminar los hilos se cierra la conexión propia de cada uno
+        connection.close()
+
+        barrera = threading.Barrier(compradores)
+        lock = threading.Lock()
+        stats = {"reservas": 0, "conflictos": 0, "errores": 0, "latencias": []}
+
+        def comprador(pasajero, semilla):
+            elegir = random.Random(semilla)
+            candidatos = asiento_ids[:]
+            elegir.shuffle(candidatos)
+            reservas = conflictos = errores = 0
+            latencias = []
+            try:
+                barrera.wait()
+                for asiento_id in candidatos:
+                    inicio = time.perf_counter()
+                    try:
+                        reservar_asiento(vuelo, pasajero, asiento_id)
+                    except AsientoOcupado:
+                        conflictos += 1
+                        continue
+                    except DatabaseError:
+                        errores += 1
+                        continue
+                    finally:
+                        latencias.append(time.perf_counter() - inicio)
+                    reservas += 1
+                    break
+            finally:
+                connection.close()
+                with lock:
+                    stats["reservas"] += reservas
+                    stats["conflictos"] += conflictos
+                    stats["errores"] += errores
+                    stats["latencias"].extend(latencias)
+
+        hilos = [
+            threading.Thread(target=comprador, args=(p, rng.random()), name=f"comprador-{i}")
+            for i, p in enumerate(pasajeros)
+        ]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+
+        try:
+            self._informar(vuelo, compradores, len(asiento_ids), stats, duracion)
+        finally:
+            if not options["conservar"]:
+                self._limpiar(vuelo, pasajeros)
+
+    def _preparar(self, compradores, asientos):
+        sufijo = uuid.uuid4().hex[:6].upper()
+        columnas = min(asientos, 6)
+        avion = Avion.objects.create(
+            modelo=f"Prueba de carga {sufijo}",
+            filas=-(-asientos // columnas),
+            columnas=columnas,
+            capacidad=0,
+        )
+        salida = timezone.now() + timedelta(days=30)
+        vuelo = Vuelo.objects.create(
+            avion=avion,
+            origen="Prueba",
+            destino="Carga",
+            fecha_salida=salida,
+            fecha_llegada=salida + timedelta(hours=2),
+            precio_base=1000,
+            codigo_vuelo=f"PC{sufijo}",
+        )
+        pasajeros = Pasajero.objects.bulk_create([
+            Pasajero(
+                nombre=f"Comprador {i}",
+                documento=f"PC{sufijo}-{i:05d}",
+                email=f"comprador{i}.{sufijo.lower()}@example.com",
+                telefono="",
+                fecha_nacimiento=timezone.now().date(),
+            )
+            for i in range(compradores)
+        ])
+        if not all(p.pk for p in pasajeros):
+            pasajeros = list(Pasajero.objects.filter(documento__startswith=f"PC{sufijo}-").order_by("documento"))
+        return vuelo, pasajeros
+
+    def _informar(self, vuelo, compradores, asientos, stats, duracion):
+        activas = Reserva.objects.filter(vuelo=vuelo, estado__in=Reserva.ESTADOS_ACTIVOS)
+        dobles = list(
+            activas.order_by().values("asiento").annotate(n=Count("id")).filter(n__gt=1).values_list("asiento", "n")
+        )
+        vendidos = activas.count()
+        vuelo.refresh_from_db(fields=["asientos_vendidos"])
+        intentos = len(stats["latencias"])
+        latencias_ms = sorted(l * 1000 for l in stats["latencias"]) or [0.0]
+
+        self.stdout.write(f"Vuelo {vuelo.codigo_vuelo}: {compradores} compradores, {asientos} asientos")
+        self.stdout.write(f"Duración: {duracion:.2f}s | intentos: {intentos} ({intentos / duracion:.1f}/s)")
+        self.stdout.write(
+            f"Reservas: {stats['reservas']} ({stats['reservas'] / duracion:.1f}/s) | "
+            f"asiento ocupado: {stats['conflictos']} | errores de base: {stats['errores']}"
+        )
+        self.stdout.write(
+            f"Latencia por intento (ms): p50={statistics.median(latencias_ms):.1f} "
+            f"p95={latencias_ms[int(0.95 * (len(latencias_ms) - 1))]:.1f} max={latencias_ms[-1]:.1f}"
+        )
+
+        problemas = []
+        if dobles:
+            problemas.append(f"asientos con más de una reserva activa: {dobles}")
+        if vendidos != stats["reservas"]:
+            problemas.append(f"{vendidos} reservas activas en base pero {stats['reservas']} confirmadas a los hilos")
+        if vuelo.asientos_vendidos != vendidos:
+            problemas.append(f"contador asientos_vendidos={vuelo.asientos_vendidos}, reservas activas={vendidos}")
+        if problemas:
+            raise CommandError("; ".join(problemas))
+        self.stdout.write(self.style.SUCCESS(f"Sin reservas dobles: {vendidos} asientos vendidos."))
+
+    def _limpiar(self, vuelo, pasajeros):
+        avion = vuelo.avion
+        Pasajero.objects.filter(id__in=[p.id for p in pasajeros]).delete()
+        vuelo.delete()
+        avion.delete()
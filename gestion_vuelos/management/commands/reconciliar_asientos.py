@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from gestion_vuelos import ocupacion
+from gestion_vuelos.models import AsientoVuelo, Reserva, Vuelo
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el contador de asientos vendidos y el inventario de asientos "
+        "de cada vuelo a partir de sus reservas activas"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("codigos", nargs="*", help="Códigos de vuelo a reconciliar (por defecto, todos)")
+        parser.add_argument("--dry-run", action="store_true", help="Solo informar diferencias, sin corregirlas")
+
+    def handle(self, *args, **options):
+        activas = (
+            Reserva.objects.filter(vuelo=OuterRef("pk"), estado__in=Reserva.ESTADOS_ACTIVOS)
+            .order_by()
+            .values("vuelo")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        vuelos = Vuelo.objects.all()
+        if options["codigos"]:
+            vuelos = vuelos.filter(codigo_vuelo__in=options["codigos"])
+
+        with transaction.atomic():
+            desfasados = list(
+                vuelos.annotate(reales=Coalesce(Subquery(activas), 0))
+                .exclude(asientos_vendidos=F("reales"))
+                .values_list("id", "codigo_vuelo", "asientos_vendidos", "reales")
+            )
+            for _, codigo, contador, reales in desfasados:
+                self.stdout.write(f"{codigo}: contador={contador} reservas activas={reales}")
+            if desfasados and not options["dry_run"]:
+                vuelos.filter(id__in=[d[0] for d in desfasados]).update(
+                    asientos_vendidos=Coalesce(Subquery(activas), 0)
+                )
+
+        if not desfasados:
+            self.stdout.write(self.style.SUCCESS("Todos los contadores están al día."))
+        elif options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"{len(desfasados)} vuelo(s) con contador desfasado."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(desfasados)} vuelo(s) reconciliado(s)."))
+
+        self._reconciliar_inventario(vuelos, options["dry_run"])
+
+    def _reconciliar_inventario(self, vuelos, dry_run):
+        activa = Reserva.objects.filter(
+            vuelo=OuterRef("vuelo_id"), asiento=OuterRef("asiento_id"), estado__in=Reserva.ESTADOS_ACTIVOS
+        )
+        filas = AsientoVuelo.objects.filter(vuelo__in=vuelos)
+        with transaction.atomic():
+            sin_inventario = list(vuelos.filter(inventario__isnull=True).exclude(avion__asientos__isnull=True))
+            liberar = filas.filter(estado="reservado").exclude(Exists(activa))
+            ocupar = filas.exclude(estado="reservado").filter(Exists(activa))
+            a_liberar = list(liberar.values_list("vuelo_id", "asiento_id"))
+            a_ocupar = list(ocupar.values_list("vuelo_id", "asiento_id"))
+            for vuelo in sin_inventario:
+                self.stdout.write(f"{vuelo.codigo_vuelo}: sin inventario de asientos")
+            for etiqueta, pares in (("reservado sin reserva activa", a_liberar), ("libre con reserva activa", a_ocupar)):
+                for vuelo_id, asiento_id in pares:
+                    self.stdout.write(f"vuelo {vuelo_id}, asiento {asiento_id}: {etiqueta}")
+            if not dry_run:
+                for vuelo in sin_inventario:
+                    vuelo.crear_inventario()
+                    a_ocupar += list(
+                        Reserva.objects.filter(vuelo=vuelo, estado__in=Reserva.ESTADOS_ACTIVOS)
+                        .values_list("vuelo_id", "asiento_id")
+                    )
+                for vuelo_id, asiento_id in a_liberar:
+                    AsientoVuelo.marcar(vuelo_id, [asiento_id], False)
+                for vuelo_id, asiento_id in a_ocupar:
+                    AsientoVuelo.marcar(vuelo_id, [asiento_id], True)
+
+        vuelos_afectados = {vuelo_id for vuelo_id, _ in a_liberar + a_ocupar} | {v.id for v in sin_inventario}
+        if not dry_run:
+            for vuelo_id in vuelos_afectados:
+                ocupacion.invalidar_vuelo(vuelo_id)
+        if not vuelos_afectados:
+            self.stdout.write(self.style.SUCCESS("El inventario de asientos está al día."))
+        elif dry_run:
+            self.stdout.write(self.style.WARNING(f"{len(vuelos_afectados)} vuelo(s) con inventario desfasado."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Inventario de {len(vuelos_afectados)} vuelo(s) reconciliado."))
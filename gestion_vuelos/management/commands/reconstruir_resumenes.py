@@ -0,0 +1,79 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from gestion_vuelos.models import Pasajero, Reserva, ResumenReporte, Vuelo
+
+# (entidad, modelo, campo que define el día, campo de estado)
+FUENTES = (
+    ("vuelo", Vuelo, "fecha_salida", "estado"),
+    ("reserva", Reserva, "fecha_reserva", "estado"),
+    ("pasajero", Pasajero, "fecha_registro", None),
+)
+
+
+def calcular_resumenes():
+    """Conteos por (entidad, estado, día) recalculados desde las tablas"""
+    conteos = Counter()
+    for entidad, modelo, campo_fecha, campo_estado in FUENTES:
+        agrupacion = ["dia", campo_estado] if campo_estado else ["dia"]
+        filas = (
+            modelo.objects.order_by()
+            .annotate(dia=TruncDate(campo_fecha))
+            .values(*agrupacion)
+            .annotate(total=Count("id"))
+        )
+        for fila in filas:
+            estado = fila[campo_estado] if campo_estado else ""
+            conteos[(entidad, estado, fila["dia"])] += fila["total"]
+    return conteos
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero el resumen precalculado que usa el tablero de reportes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Solo informar diferencias, sin corregirlas")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            esperados = calcular_resumenes()
+            actuales = {
+                (entidad, estado, fecha): cantidad
+                for entidad, estado, fecha, cantidad in ResumenReporte.objects.values_list(
+                    "entidad", "estado", "fecha", "cantidad"
+                )
+            }
+            diferencias = sorted(
+                (clave for clave in esperados.keys() | actuales.keys()
+                 if esperados.get(clave, 0) != actuales.get(clave, 0)),
+                key=lambda clave: (clave[0], clave[1], clave[2]),
+            )
+            for entidad, estado, fecha in diferencias:
+                clave = (entidad, estado, fecha)
+                self.stdout.write(
+                    f"{entidad} {estado or '-'} {fecha}: "
+                    f"resumen={actuales.get(clave, 0)} real={esperados.get(clave, 0)}"
+                )
+            if diferencias and not options["dry_run"]:
+                ResumenReporte.objects.all().delete()
+                ResumenReporte.objects.bulk_create(
+                    [
+                        ResumenReporte(entidad=entidad, estado=estado, fecha=fecha, cantidad=cantidad)
+                        for (entidad, estado, fecha), cantidad in esperados.items()
+                        if cantidad
+                    ],
+                    batch_size=500,
+                )
+
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS("El resumen de reportes está al día."))
+        elif options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"{len(diferencias)} fila(s) del resumen desfasada(s)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Resumen reconstruido ({len(diferencias)} fila(s) corregida(s))."
+            ))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion_vuelos.models import Boleto, Vuelo
+from gestion_vuelos.pases import FORMATOS, renderizar
+
+
+class Command(BaseCommand):
+    help = (
+        "Dibuja en paralelo los pases de abordar de los boletos emitidos de uno o más vuelos "
+        "y los deja en la cache en disco (PASES_DIR), para que la vista solo los sirva"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("codigos", nargs="+", help="Códigos de vuelo")
+        parser.add_argument("--formato", choices=sorted(FORMATOS), default="pdf")
+        parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto, uno por CPU)")
+        parser.add_argument("--forzar", action="store_true", help="Volver a dibujar aunque estén en cache")
+
+    def handle(self, *args, **options):
+        codigos = options["codigos"]
+        existentes = set(Vuelo.objects.filter(codigo_vuelo__in=codigos).values_list("codigo_vuelo", flat=True))
+        faltantes = sorted(set(codigos) - existentes)
+        if faltantes:
+            raise CommandError(f"Vuelos inexistentes: {', '.join(faltantes)}")
+        if options["procesos"] is not None and options["procesos"] < 1:
+            raise CommandError("--procesos debe ser mayor que cero.")
+
+        boletos = Boleto.objects.filter(reserva__vuelo__codigo_vuelo__in=codigos).exclude(estado="cancelado").order_by("id")
+        inicio = time.perf_counter()
+        dibujados, en_cache = renderizar(boletos, options["formato"], options["procesos"], options["forzar"])
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{dibujados} pase(s) dibujado(s) y {en_cache} ya en cache en {duracion:.2f}s."
+        ))
@@ -0,0 +1,53 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from gestion_vuelos.replicas import ALIAS_REPLICA, hay_replica
+
+PAGINAS_POR_PASO = 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia la base primaria SQLite sobre la réplica local (DB_REPLICA) con la API de backup "
+        "de SQLite; con --intervalo repite la copia para simular una réplica que se atrasa"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--intervalo", type=float, default=None,
+                            help="Repetir la copia cada tantos segundos hasta interrumpir con Ctrl-C")
+
+    def handle(self, *args, **options):
+        if not hay_replica():
+            raise CommandError("No hay réplica configurada: definir DB_REPLICA con la ruta del archivo.")
+        primario, replica = connections[DEFAULT_DB_ALIAS], connections[ALIAS_REPLICA]
+        if primario.vendor != "sqlite" or replica.vendor != "sqlite":
+            raise CommandError(
+                "Solo para réplicas SQLite locales; con otro motor la replicación la hace la base de datos."
+            )
+        if options["intervalo"] is None:
+            self._copiar(primario, replica)
+            return
+        try:
+            while True:
+                self._copiar(primario, replica)
+                time.sleep(options["intervalo"])
+        except KeyboardInterrupt:
+            pass
+
+    def _copiar(self, primario, replica):
+        # La conexión propia de la réplica vería el archivo a medio reemplazar
+        replica.close()
+        primario.ensure_connection()
+        inicio = time.perf_counter()
+        destino = sqlite3.connect(replica.settings_dict["NAME"])
+        try:
+            # Por pasos: entre uno y otro el primario sigue aceptando escrituras
+            primario.connection.backup(destino, pages=PAGINAS_POR_PASO)
+        finally:
+            destino.close()
+        self.stdout.write(self.style.SUCCESS(
+            f"Réplica {replica.settings_dict['NAME']} actualizada en {time.perf_counter() - inicio:.2f} s."
+        ))
@@ -0,0 +1,120 @@
+"""
+Manifiesto de pasajeros de un vuelo, generado en streaming.
+
+Las filas se leen de la base en bloques (QuerySet.iterator) y se emiten a
+medida que se producen, así que ni la consulta ni el archivo completo se
+mantienen en memoria aunque el vuelo tenga cientos de pasajeros.
+"""
+import csv
+
+from django.utils import timezone
+
+from .exportacion import EcoCSV
+from .models import Reserva
+
+TAMANO_BLOQUE = 500
+COLUMNAS = ['Asiento', 'Pasajero', 'Documento', 'Tipo', 'Email', 'Reserva', 'Estado', 'Precio']
+
+# Geometría del PDF (puntos, A4 vertical)
+ANCHO_PAGINA, ALTO_PAGINA = 595, 842
+MARGEN = 40
+INTERLINEA = 14
+FILAS_POR_PAGINA = (ALTO_PAGINA - 2 * MARGEN - 3 * INTERLINEA) // INTERLINEA
+# Posición x de cada columna del PDF (sin email ni tipo de documento, por ancho)
+COLUMNAS_PDF = [('Asiento', 0), ('Pasajero', 50), ('Documento', 260), ('Reserva', 360), ('Estado', 430), ('Precio', 490)]
+
+
+def filas_manifiesto(vuelo):
+    """Tuplas con los datos de cada pasajero con reserva activa, ordenadas por asiento"""
+    reservas = (
+        Reserva.objects.filter(vuelo=vuelo, estado__in=Reserva.ESTADOS_ACTIVOS)
+        .order_by('asiento__fila', 'asiento__columna')
+        .values_list(
+            'asiento__fila', 'asiento__columna', 'pasajero__nombre', 'pasajero__documento',
+            'pasajero__tipo_documento', 'pasajero__email', 'codigo_reserva', 'estado', 'precio',
+        )
+    )
+    for fila, columna, nombre, documento, tipo, email, codigo, estado, precio in reservas.iterator(TAMANO_BLOQUE):
+        yield (f"{fila}{columna}", nombre, documento, tipo, email, codigo, estado, precio)
+
+
+def csv_manifiesto(vuelo):
+    escritor = csv.writer(EcoCSV())
+    yield escritor.writerow(COLUMNAS)
+    for fila in filas_manifiesto(vuelo):
+        yield escritor.writerow(fila)
+
+
+def _texto_pdf(texto):
+    """Cadena literal PDF en WinAnsiEncoding (las fuentes base no cubren Unicode)"""
+    crudo = str(texto).encode('cp1252', errors='replace')
+    return b'(' + crudo.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _contenido_pagina(titulo, filas, numero):
+    lineas = [b'BT', b'/F1 12 Tf', f'1 0 0 1 {MARGEN} {ALTO_PAGINA - MARGEN} Tm'.encode(),
+              _texto_pdf(f"{titulo} - página {numero}") + b' Tj', b'ET']
+    y = ALTO_PAGINA - MARGEN - 2 * INTERLINEA
+    for valores in [[nombre for nombre, _ in COLUMNAS_PDF]] + filas:
+        for (_, x), valor in zip(COLUMNAS_PDF, valores):
+            lineas.append(f'BT /F1 9 Tf 1 0 0 1 {MARGEN + x} {y} Tm '.encode() + _texto_pdf(valor) + b' Tj ET')
+        y -= INTERLINEA
+    return b'\n'.join(lineas)
+
+
+def pdf_manifiesto(vuelo):
+    """
+    PDF mínimo escrito a mano, página por página: los objetos de cada
+    página se emiten en cuanto se completan y el árbol de páginas, el
+    catálogo y la tabla xref (que solo necesitan los offsets) van al final.
+    """
+    titulo = (f"Manifiesto {vuelo.codigo_vuelo} {vuelo.origen} - {vuelo.destino} "
+              f"{timezone.localtime(vuelo.fecha_salida):%d/%m/%Y %H:%M}")
+    # 1: catálogo, 2: árbol de páginas, 3: fuente; las páginas desde el 4
+    offsets = {}
+    posicion = 0
+    paginas = []
+
+    def objeto(numero, cuerpo):
+        nonlocal posicion
+        offsets[numero] = posicion
+        datos = f'{numero} 0 obj\n'.encode() + cuerpo + b'\nendobj\n'
+        posicion += len(datos)
+        return datos
+
+    def pagina(filas):
+        contenido = _contenido_pagina(titulo, filas, len(paginas) + 1)
+        numero_contenido = 4 + 2 * len(paginas)
+        numero_pagina = numero_contenido + 1
+        paginas.append(numero_pagina)
+        return (
+            objeto(numero_contenido, f'<< /Length {len(contenido)} >>\nstream\n'.encode() + contenido + b'\nendstream')
+            + objeto(numero_pagina, (
+                f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {ANCHO_PAGINA} {ALTO_PAGINA}] '
+                f'/Resources << /Font << /F1 3 0 R >> >> /Contents {numero_contenido} 0 R >>'
+            ).encode())
+        )
+
+    encabezado = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    posicion = len(encabezado)
+    yield encabezado
+    yield objeto(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+
+    bloque = []
+    for asiento, nombre, documento, _, _, codigo, estado, precio in filas_manifiesto(vuelo):
+        bloque.append([asiento, nombre[:38], documento, codigo, estado, precio])
+        if len(bloque) == FILAS_POR_PAGINA:
+            yield pagina(bloque)
+            bloque = []
+    if bloque or not paginas:
+        yield pagina(bloque)
+
+    kids = ' '.join(f'{numero} 0 R' for numero in paginas)
+    yield objeto(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(paginas)} >>'.encode())
+    yield objeto(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+
+    total = 4 + 2 * len(paginas)
+    xref = [f'xref\n0 {total}\n'.encode(), b'0000000000 65535 f \n']
+    xref += [f'{offsets[numero]:010d} 00000 n \n'.encode() for numero in range(1, total)]
+    xref.append(f'trailer\n<< /Size {total} /Root 1 0 R >>\nstartxref\n{posicion}\n%%EOF\n'.encode())
+    yield b''.join(xref)
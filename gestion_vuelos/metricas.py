@@ -0,0 +1,189 @@
+"""
+Métricas operativas en el formato de texto de Prometheus.
+
+Cada hilo acumula en su propio fragmento (threading.local): sumar a un
+contador u observar una latencia no toma locks ni compite con los demás
+hilos del worker. Solo el alta del fragmento de un hilo nuevo y la lectura
+desde /metrics recorren la lista de fragmentos bajo un lock; la lectura
+copia cada dict de una vez (una operación atómica con el GIL) y suma las
+copias. Cuando un hilo termina, su fragmento se suma a un total común y
+sale de la lista: los contadores nunca retroceden y la lista no crece con
+cada hilo que crea el servidor.
+
+Los valores son del proceso: con varios workers, cada uno expone los
+suyos. Los eventos que dependen de una transacción (reservas, boletos)
+se cuentan al confirmarse, así un rollback no los infla.
+"""
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import transaction
+
+# Límites superiores (segundos) de los buckets de latencia
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# nombre: (tipo, ayuda)
+METRICAS = {
+    'aerolinea_http_request_duration_seconds': ('histogram', 'Duración de los requests por vista.'),
+    'aerolinea_http_respuestas_total': ('counter', 'Respuestas por vista y código HTTP.'),
+    'aerolinea_reservas_creadas_total': ('counter', 'Reservas creadas, por estado inicial.'),
+    'aerolinea_reservas_canceladas_total': ('counter', 'Reservas canceladas, incluidas las retenciones vencidas.'),
+    'aerolinea_boletos_emitidos_total': ('counter', 'Boletos emitidos.'),
+    'aerolinea_conflictos_reserva_total': ('counter', 'Reservas rechazadas por asiento ya ocupado en crear_reserva.'),
+    'aerolinea_cache_total': ('counter', 'Lecturas de cache por cache y resultado.'),
+}
+
+
+class _Fragmento:
+    __slots__ = ('contadores', 'histogramas')
+
+    def __init__(self):
+        # (nombre, etiquetas) -> valor
+        self.contadores = {}
+        # (nombre, etiquetas) -> [cantidades por bucket (el último es +Inf), suma]
+        self.histogramas = {}
+
+
+class _Portador:
+    """Lo único que guarda el hilo: se libera cuando el hilo termina"""
+    __slots__ = ('fragmento', '__weakref__')
+
+
+_local = threading.local()
+_fragmentos = []
+# Lo acumulado por los hilos que ya terminaron
+_terminados = _Fragmento()
+_lock = threading.Lock()
+
+
+def _fragmento():
+    try:
+        return _local.portador.fragmento
+    except AttributeError:
+        portador = _Portador()
+        fragmento = portador.fragmento = _Fragmento()
+        with _lock:
+            _fragmentos.append(fragmento)
+        weakref.finalize(portador, _volcar, fragmento)
+        _local.portador = portador
+        return fragmento
+
+
+def _sumar(destino, fragmento):
+    for clave, valor in fragmento.contadores.copy().items():
+        destino.contadores[clave] = destino.contadores.get(clave, 0) + valor
+    for clave, (cantidades, suma) in fragmento.histogramas.copy().items():
+        total = destino.histogramas.setdefault(clave, [[0] * len(cantidades), 0.0])
+        for i, cantidad in enumerate(list(cantidades)):
+            total[0][i] += cantidad
+        total[1] += suma
+
+
+def _volcar(fragmento):
+    """Pasa al total común el fragmento de un hilo que terminó"""
+    with _lock:
+        _sumar(_terminados, fragmento)
+        _fragmentos.remove(fragmento)
+
+
+def incrementar(nombre, cantidad=1, **etiquetas):
+    clave = (nombre, tuple(sorted(etiquetas.items())))
+    contadores = _fragmento().contadores
+    contadores[clave] = contadores.get(clave, 0) + cantidad
+
+
+def incrementar_al_confirmar(nombre, cantidad=1, **etiquetas):
+    """incrementar() cuando se confirme la transacción en curso (o ya, fuera de una)"""
+    transaction.on_commit(lambda: incrementar(nombre, cantidad, **etiquetas))
+
+
+def observar(nombre, valor, **etiquetas):
+    clave = (nombre, tuple(sorted(etiquetas.items())))
+    histogramas = _fragmento().histogramas
+    datos = histogramas.get(clave)
+    if datos is None:
+        datos = histogramas[clave] = [[0] * (len(LIMITES_LATENCIA) + 1), 0.0]
+    datos[0][bisect_left(LIMITES_LATENCIA, valor)] += 1
+    datos[1] += valor
+
+
+def _acumular():
+    total = _Fragmento()
+    # Lista y total juntos: un fragmento que se vuelca en el medio no se cuenta dos veces
+    with _lock:
+        fragmentos = list(_fragmentos)
+        _sumar(total, _terminados)
+    for fragmento in fragmentos:
+        _sumar(total, fragmento)
+    return total.contadores, total.histogramas
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _etiquetas(etiquetas, extra=()):
+    pares = list(etiquetas) + list(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{clave}="{_escapar(valor)}"' for clave, valor in pares) + '}'
+
+
+def exponer():
+    """Texto de todas las métricas del proceso (formato de exposición 0.0.4)"""
+    contadores, histogramas = _acumular()
+    lineas = []
+    for nombre, (tipo, ayuda) in METRICAS.items():
+        lineas.append(f'# HELP {nombre} {ayuda}')
+        lineas.append(f'# TYPE {nombre} {tipo}')
+        if tipo == 'counter':
+            for (metrica, etiquetas), valor in sorted(contadores.items()):
+                if metrica == nombre:
+                    lineas.append(f'{nombre}{_etiquetas(etiquetas)} {valor}')
+            continue
+        for (metrica, etiquetas), (cantidades, suma) in sorted(histogramas.items()):
+            if metrica != nombre:
+                continue
+            acumulado = 0
+            for limite, cantidad in zip(LIMITES_LATENCIA + ('+Inf',), cantidades):
+                acumulado += cantidad
+                lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas, [("le", limite)])} {acumulado}')
+            lineas.append(f'{nombre}_sum{_etiquetas(etiquetas)} {suma}')
+            # El total sale de los buckets: siempre coincide con el de +Inf
+            lineas.append(f'{nombre}_count{_etiquetas(etiquetas)} {acumulado}')
+    return '\n'.join(lineas) + '\n'
+
+
+class MetricasMiddleware:
+    """Latencia y código de respuesta de cada request, por vista resuelta"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        inicio = time.perf_counter()
+        respuesta = self.get_response(request)
+        self._registrar(request, respuesta, inicio)
+        return respuesta
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        respuesta = await self.get_response(request)
+        self._registrar(request, respuesta, inicio)
+        return respuesta
+
+    def _registrar(self, request, respuesta, inicio):
+        coincidencia = request.resolver_match
+        # Sin ruta resuelta (404) no se etiqueta con la URL: sería una serie por URL inventada
+        vista = coincidencia.view_name if coincidencia else '(sin ruta)'
+        observar('aerolinea_http_request_duration_seconds', time.perf_counter() - inicio, vista=vista)
+        incrementar('aerolinea_http_respuestas_total', vista=vista, codigo=respuesta.status_code)
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def calcular_vendidos(apps, schema_editor):
+    Vuelo = apps.get_model("gestion_vuelos", "Vuelo")
+    Reserva = apps.get_model("gestion_vuelos", "Reserva")
+    activas = (
+        Reserva.objects.filter(vuelo=OuterRef("pk"), estado__in=["confirmada", "pagada"])
+        .values("vuelo")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    Vuelo.objects.update(asientos_vendidos=Coalesce(Subquery(activas), 0))
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gestion_vuelos", "0002_data"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vuelo",
+            name="asientos_vendidos",
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Asientos vendidos"),
+        ),
+        migrations.RunPython(calcular_vendidos, reverse_code=noop_reverse),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_vuelos', '0003_contador_asientos'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='reserva',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='reserva',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado__in', ['confirmada', 'pagada'])), fields=('vuelo', 'asiento'), name='reserva_asiento_activo_unico'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+import unicodedata
+
+
+def normalizar_lugar(texto):
+    sin_acentos = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sin_acentos.lower().split())
+
+
+def asignar_aeropuertos(apps, schema_editor):
+    Aeropuerto = apps.get_model('gestion_vuelos', 'Aeropuerto')
+    Vuelo = apps.get_model('gestion_vuelos', 'Vuelo')
+    aeropuertos = {}
+
+    def resolver(texto):
+        nombre = ' '.join(texto.split())
+        clave = normalizar_lugar(nombre)
+        if clave not in aeropuertos:
+            codigo = re.search(r'\(([A-Za-z]{3})\)$', nombre)
+            aeropuertos[clave], _ = Aeropuerto.objects.get_or_create(
+                nombre_normalizado=clave,
+                defaults={'nombre': nombre, 'codigo_iata': codigo.group(1).upper() if codigo else ''},
+            )
+        return aeropuertos[clave]
+
+    for vuelo in Vuelo.objects.all():
+        vuelo.aeropuerto_origen = resolver(vuelo.origen)
+        vuelo.aeropuerto_destino = resolver(vuelo.destino)
+        vuelo.save(update_fields=['aeropuerto_origen', 'aeropuerto_destino'])
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_vuelos', '0004_reserva_asiento_activo_unico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Aeropuerto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, verbose_name='Nombre')),
+                ('codigo_iata', models.CharField(blank=True, db_index=True, max_length=3, verbose_name='Código IATA')),
+                ('nombre_normalizado', models.CharField(editable=False, max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Aeropuerto',
+                'verbose_name_plural': 'Aeropuertos',
+                'ordering': ['nombre_normalizado'],
+            },
+        ),
+        migrations.AddField(
+            model_name='vuelo',
+            name='aeropuerto_destino',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='llegadas', to='gestion_vuelos.aeropuerto'),
+        ),
+        migrations.AddField(
+            model_name='vuelo',
+            name='aeropuerto_origen',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='salidas', to='gestion_vuelos.aeropuerto'),
+        ),
+        migrations.RunPython(asignar_aeropuertos, reverse_code=noop_reverse),
+        migrations.AddIndex(
+            model_name='vuelo',
+            index=models.Index(fields=['aeropuerto_origen', 'fecha_salida'], name='vuelo_origen_salida_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vuelo',
+            index=models.Index(fields=['aeropuerto_destino', 'fecha_salida'], name='vuelo_destino_salida_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_vuelos', '0005_aeropuertos'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reserva',
+            name='pasajero',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reservas', to='gestion_vuelos.pasajero'),
+        ),
+        migrations.AlterField(
+            model_name='reserva',
+            name='vuelo',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reservas', to='gestion_vuelos.vuelo'),
+        ),
+        migrations.AddIndex(
+            model_name='paquete',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['-creado'], name='paquete_activos_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pasajero',
+            index=models.Index(fields=['nombre'], name='pasajero_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pasajero',
+            index=models.Index(fields=['email'], name='pasajero_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['vuelo', 'estado'], name='reserva_vuelo_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['pasajero', '-fecha_reserva'], name='reserva_pasajero_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['estado', 'fecha_reserva'], name='reserva_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vuelo',
+            index=models.Index(fields=['estado', 'fecha_salida'], name='vuelo_estado_salida_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vuelo',
+            index=models.Index(fields=['fecha_salida'], name='vuelo_salida_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def calcular_resumenes(apps, schema_editor):
+    ResumenReporte = apps.get_model("gestion_vuelos", "ResumenReporte")
+    fuentes = (
+        ("vuelo", apps.get_model("gestion_vuelos", "Vuelo"), "fecha_salida", "estado"),
+        ("reserva", apps.get_model("gestion_vuelos", "Reserva"), "fecha_reserva", "estado"),
+        ("pasajero", apps.get_model("gestion_vuelos", "Pasajero"), "fecha_registro", None),
+    )
+    conteos = Counter()
+    for entidad, modelo, campo_fecha, campo_estado in fuentes:
+        agrupacion = ["dia", campo_estado] if campo_estado else ["dia"]
+        filas = modelo.objects.order_by().annotate(dia=TruncDate(campo_fecha)).values(*agrupacion).annotate(total=Count("id"))
+        for fila in filas:
+            estado = fila[campo_estado] if campo_estado else ""
+            conteos[(entidad, estado, fila["dia"])] += fila["total"]
+            conteos[(entidad, estado, None)] += fila["total"]
+    ResumenReporte.objects.bulk_create(
+        [
+            ResumenReporte(entidad=entidad, estado=estado, fecha=fecha, cantidad=cantidad)
+            for (entidad, estado, fecha), cantidad in conteos.items()
+        ],
+        batch_size=500,
+    )
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_vuelos', '0006_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenReporte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entidad', models.CharField(choices=[('vuelo', 'Vuelos'), ('reserva', 'Reservas'), ('pasajero', 'Pasajeros')], max_length=10)),
+                ('estado', models.CharField(blank=True, max_length=20)),
+                ('fecha', models.DateField(blank=True, null=True)),
+                ('cantidad', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Resumen de reportes',
+                'verbose_name_plural': 'Resúmenes de reportes',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='resumenreporte',
+            constraint=models.UniqueConstraint(fields=('entidad', 'fecha', 'estado'), name='resumen_dia_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumenreporte',
+            constraint=models.UniqueConstraint(condition=models.Q(('fecha__isnull', True)), fields=('entidad', 'estado'), name='resumen_total_unico'),
+        ),
+        migrations.RunPython(calcular_resumenes, reverse_code=noop_reverse),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_vuelos', '0007_resumen_reportes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pasajero',
+            index=models.Index(fields=['fecha_registro'], name='pasajero_registro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['fecha_reserva'], name='reserva_fecha_idx'),
+        ),
+    ]
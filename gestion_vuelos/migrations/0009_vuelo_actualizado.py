@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_vuelos', '0008_indices_exportacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vuelo',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
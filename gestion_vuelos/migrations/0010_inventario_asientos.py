@@ -0,0 +1,70 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def crear_inventarios(apps, schema_editor):
+    Vuelo = apps.get_model("gestion_vuelos", "Vuelo")
+    Asiento = apps.get_model("gestion_vuelos", "Asiento")
+    AsientoVuelo = apps.get_model("gestion_vuelos", "AsientoVuelo")
+    Reserva = apps.get_model("gestion_vuelos", "Reserva")
+
+    asientos_por_avion = {}
+    for asiento_id, avion_id, estado in Asiento.objects.values_list("id", "avion_id", "estado").iterator():
+        asientos_por_avion.setdefault(avion_id, []).append((asiento_id, estado))
+    reservados = set(
+        Reserva.objects.filter(estado__in=["confirmada", "pagada"]).values_list("vuelo_id", "asiento_id").iterator()
+    )
+    filas = []
+    for vuelo_id, avion_id in Vuelo.objects.values_list("id", "avion_id").iterator():
+        for asiento_id, estado in asientos_por_avion.get(avion_id, []):
+            if (vuelo_id, asiento_id) in reservados:
+                estado_vuelo = "reservado"
+            elif estado == "mantenimiento":
+                estado_vuelo = "bloqueado"
+            else:
+                estado_vuelo = "disponible"
+            filas.append(AsientoVuelo(vuelo_id=vuelo_id, asiento_id=asiento_id, estado=estado_vuelo))
+        if len(filas) >= 5000:
+            AsientoVuelo.objects.bulk_create(filas, batch_size=500)
+            filas = []
+    AsientoVuelo.objects.bulk_create(filas, batch_size=500)
+    # La ocupación ya no se guarda en el asiento del avión
+    Asiento.objects.filter(estado="reservado").update(estado="disponible")
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_vuelos', '0009_vuelo_actualizado'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='asiento',
+            name='estado',
+            field=models.CharField(choices=[('disponible', 'Disponible'), ('ocupado', 'Ocupado'), ('mantenimiento', 'En Mantenimiento')], default='disponible', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='AsientoVuelo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('disponible', 'Disponible'), ('reservado', 'Reservado'), ('bloqueado', 'Bloqueado')], default='disponible', max_length=20)),
+                ('asiento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventario', to='gestion_vuelos.asiento')),
+                ('vuelo', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='inventario', to='gestion_vuelos.vuelo')),
+            ],
+            options={
+                'verbose_name': 'Asiento del vuelo',
+                'verbose_name_plural': 'Inventario de asientos',
+                'indexes': [models.Index(fields=['vuelo', 'estado'], name='inventario_vuelo_estado_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='asientovuelo',
+            constraint=models.UniqueConstraint(fields=('vuelo', 'asiento'), name='inventario_vuelo_asiento_unico'),
+        ),
+        migrations.RunPython(crear_inventarios, reverse_code=noop_reverse),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_vuelos', '0010_inventario_asientos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asientovuelo',
+            name='retenido_hasta',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reserva',
+            name='vence',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Vencimiento de la retención'),
+        ),
+        migrations.AlterField(
+            model_name='asientovuelo',
+            name='estado',
+            field=models.CharField(choices=[('disponible', 'Disponible'), ('retenido', 'Retenido'), ('reservado', 'Reservado'), ('bloqueado', 'Bloqueado')], default='disponible', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='asientovuelo',
+            index=models.Index(condition=models.Q(('estado', 'retenido')), fields=['retenido_hasta'], name='inventario_retenido_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['estado', 'vence'], name='reserva_estado_vence_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_vuelos', '0011_retenciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='boleto',
+            name='fecha_uso',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Fecha de embarque'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+def borrar_totales(apps, schema_editor):
+    ResumenReporte = apps.get_model("gestion_vuelos", "ResumenReporte")
+    ResumenReporte.objects.filter(fecha__isnull=True).delete()
+
+
+def calcular_totales(apps, schema_editor):
+    ResumenReporte = apps.get_model("gestion_vuelos", "ResumenReporte")
+    ResumenReporte.objects.bulk_create(
+        [
+            ResumenReporte(entidad=fila["entidad"], estado=fila["estado"], fecha=None, cantidad=fila["total"])
+            for fila in ResumenReporte.objects.order_by().values("entidad", "estado").annotate(
+                total=models.Sum("cantidad")
+            )
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion_vuelos', '0012_boleto_fecha_uso'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='resumenreporte',
+            name='resumen_total_unico',
+        ),
+        migrations.RunPython(borrar_totales, reverse_code=calcular_totales),
+        migrations.AlterField(
+            model_name='resumenreporte',
+            name='fecha',
+            field=models.DateField(),
+        ),
+    ]
@@ -1,7 +1,18 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Exists, F, OuterRef, Sum, Value, When
 from django.contrib.auth.models import User
+from django.utils import timezone
+import re
+import secrets
+import unicodedata
 import uuid
-from datetime import datetime
+
+from . import metricas
+
+
+LETRAS_COLUMNA = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+# Filas por INSERT al generar el mapa de asientos de un avión
+TAMANO_LOTE_ASIENTOS = 500
 
 
 class Avion(models.Model):
@@ -19,29 +30,103 @@ class Avion(models.Model):
     def __str__(self):
         return f"{self.modelo} - Capacidad: {self.capacidad}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._layout_original = (instance.__dict__.get('filas'), instance.__dict__.get('columnas'))
+        return instance
+    
     def save(self, *args, **kwargs):
         # Calcular capacidad automáticamente
         self.capacidad = self.filas * self.columnas
-        super().save(*args, **kwargs)
+        es_nuevo = self.pk is None
+        layout_cambio = (self.filas, self.columnas) != getattr(self, '_layout_original', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Generar (o regenerar) los asientos si el avión es nuevo o cambió su configuración
+            if es_nuevo or layout_cambio:
+                self.crear_asientos(regenerar=not es_nuevo)
+        self._layout_original = (self.filas, self.columnas)
+    
+    def crear_asientos(self, regenerar=False):
+        """Crear en lote los asientos según filas y columnas.
         
-        # Crear asientos automáticamente si no existen
-        if not self.asientos.exists():
-            self.crear_asientos()
-    
-    def crear_asientos(self):
-        """Crear asientos automáticamente basado en filas y columnas"""
-        letras = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-        for fila in range(1, self.filas + 1):
-            for col in range(self.columnas):
-                letra = letras[col]
-                numero = f"{fila}{letra}"
-                Asiento.objects.create(
-                    avion=self,
-                    numero=numero,
-                    fila=fila,
-                    columna=letra,
-                    tipo='economica'
-                )
+        Con regenerar=True solo se insertan los asientos que falten y se
+        eliminan los que quedaron fuera de la nueva configuración, salvo que
+        tengan reservas asociadas.
+        """
+        letras = LETRAS_COLUMNA[:self.columnas]
+        existentes = set(self.asientos.values_list('numero', flat=True)) if regenerar else set()
+        nuevos = [
+            Asiento(avion=self, numero=f"{fila}{letra}", fila=fila, columna=letra, tipo='economica')
+            for fila in range(1, self.filas + 1)
+            for letra in letras
+            if f"{fila}{letra}" not in existentes
+        ]
+        Asiento.objects.bulk_create(nuevos, batch_size=TAMANO_LOTE_ASIENTOS)
+        if regenerar:
+            self.asientos.filter(
+                models.Q(fila__gt=self.filas) | ~models.Q(columna__in=list(letras)),
+                reservas__isnull=True,
+            ).delete()
+            # Los vuelos por salir suman al inventario los asientos nuevos
+            if nuevos:
+                for vuelo in self.vuelos.filter(fecha_salida__gte=timezone.now()):
+                    vuelo.crear_inventario(regenerar=True)
+
+
+def normalizar_lugar(texto):
+    """'  Córdoba ' -> 'cordoba': sin acentos, en minúsculas y con espacios simples"""
+    sin_acentos = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sin_acentos.lower().split())
+
+
+class Aeropuerto(models.Model):
+    """Ciudad/aeropuerto normalizado al que referencian origen y destino de los vuelos"""
+    nombre = models.CharField(max_length=100, verbose_name="Nombre")
+    codigo_iata = models.CharField(max_length=3, blank=True, db_index=True, verbose_name="Código IATA")
+    nombre_normalizado = models.CharField(max_length=100, unique=True, editable=False)
+    
+    class Meta:
+        verbose_name = "Aeropuerto"
+        verbose_name_plural = "Aeropuertos"
+        ordering = ['nombre_normalizado']
+    
+    def __str__(self):
+        return self.nombre
+    
+    def save(self, *args, **kwargs):
+        self.nombre = ' '.join(self.nombre.split())
+        self.nombre_normalizado = normalizar_lugar(self.nombre)
+        if not self.codigo_iata:
+            codigo = re.search(r'\(([A-Za-z]{3})\)$', self.nombre)
+            self.codigo_iata = codigo.group(1) if codigo else ''
+        self.codigo_iata = self.codigo_iata.upper()
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def desde_texto(cls, texto):
+        """Aeropuerto para un texto libre de ciudad; lo crea si no existe"""
+        aeropuerto, _ = cls.objects.get_or_create(
+            nombre_normalizado=normalizar_lugar(texto),
+            defaults={'nombre': texto},
+        )
+        return aeropuerto
+    
+    @classmethod
+    def buscar(cls, texto):
+        """
+        Aeropuertos cuyo nombre normalizado empieza con el texto o cuyo código
+        IATA coincide. El prefijo se resuelve como rango sobre el índice único
+        (>= prefijo y < prefijo + U+FFFF), que cualquier motor usa sin LIKE.
+        """
+        prefijo = normalizar_lugar(texto)
+        if not prefijo:
+            return cls.objects.none()
+        return cls.objects.filter(
+            models.Q(nombre_normalizado__gte=prefijo, nombre_normalizado__lt=prefijo + '\uffff')
+            | models.Q(codigo_iata=prefijo.upper())
+        )
 
 
 class Vuelo(models.Model):
@@ -58,33 +143,97 @@ class Vuelo(models.Model):
     avion = models.ForeignKey(Avion, on_delete=models.CASCADE, related_name='vuelos')
     origen = models.CharField(max_length=100, verbose_name="Ciudad de origen")
     destino = models.CharField(max_length=100, verbose_name="Ciudad de destino")
+    # Origen y destino normalizados; se resuelven desde el texto al guardar
+    # (los índices compuestos de Meta.indexes cubren las búsquedas por FK)
+    aeropuerto_origen = models.ForeignKey(Aeropuerto, on_delete=models.PROTECT, related_name='salidas', null=True, editable=False, db_index=False)
+    aeropuerto_destino = models.ForeignKey(Aeropuerto, on_delete=models.PROTECT, related_name='llegadas', null=True, editable=False, db_index=False)
     fecha_salida = models.DateTimeField(verbose_name="Fecha y hora de salida")
     fecha_llegada = models.DateTimeField(verbose_name="Fecha y hora de llegada")
     duracion = models.DurationField(verbose_name="Duración del vuelo", blank=True, null=True)
     estado = models.CharField(max_length=20, choices=ESTADOS_VUELO, default='programado')
     precio_base = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Precio base")
     codigo_vuelo = models.CharField(max_length=10, unique=True, verbose_name="Código de vuelo")
+    # Contador desnormalizado: lo mantienen Reserva.save() y el borrado de
+    # reservas (ver signals); se recalcula con `manage.py reconciliar_asientos`
+    asientos_vendidos = models.PositiveIntegerField(default=0, editable=False, verbose_name="Asientos vendidos")
+    # Última modificación del vuelo o de sus reservas (Last-Modified de la API)
+    actualizado = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Vuelo"
         verbose_name_plural = "Vuelos"
         ordering = ['fecha_salida']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_salida'], name='vuelo_estado_salida_idx'),
+            models.Index(fields=['fecha_salida'], name='vuelo_salida_idx'),
+            models.Index(fields=['aeropuerto_origen', 'fecha_salida'], name='vuelo_origen_salida_idx'),
+            models.Index(fields=['aeropuerto_destino', 'fecha_salida'], name='vuelo_destino_salida_idx'),
+        ]
         
     def __str__(self):
         return f"{self.codigo_vuelo} - {self.origen} → {self.destino}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._resumen_original = (instance.__dict__.get('estado'), instance.__dict__.get('fecha_salida'))
+        instance._avion_original = instance.__dict__.get('avion_id')
+        return instance
+    
     def save(self, *args, **kwargs):
         # Calcular duración automáticamente
         if self.fecha_salida and self.fecha_llegada:
             self.duracion = self.fecha_llegada - self.fecha_salida
-        super().save(*args, **kwargs)
+        # Normalizar origen y destino
+        self.origen = ' '.join(self.origen.split())
+        self.destino = ' '.join(self.destino.split())
+        self.aeropuerto_origen = Aeropuerto.desde_texto(self.origen)
+        self.aeropuerto_destino = Aeropuerto.desde_texto(self.destino)
+        original = getattr(self, '_resumen_original', None)
+        actual = (self.estado, self.fecha_salida)
+        es_nuevo = self._state.adding
+        avion_cambio = not es_nuevo and self.avion_id != getattr(self, '_avion_original', self.avion_id)
+        if not es_nuevo and kwargs.get('update_fields') is None:
+            # El contador lo escribe solo Reserva.mover_contador con F(): guardar
+            # una instancia leída antes pisaría las ventas hechas mientras tanto
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name != 'asientos_vendidos'
+            ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Inventario de asientos del vuelo: al programarlo o al cambiar de avión
+            if es_nuevo or avion_cambio:
+                self.crear_inventario(regenerar=avion_cambio)
+            # Mantener al día el resumen de reportes (vuelos por día de salida y estado)
+            if original != actual:
+                if original is not None:
+                    ResumenReporte.ajustar('vuelo', original[0], original[1], -1)
+                ResumenReporte.ajustar('vuelo', actual[0], actual[1], 1)
+        self._resumen_original = actual
+        self._avion_original = self.avion_id
+    
+    def crear_inventario(self, regenerar=False):
+        """Crear en lote una fila de inventario por cada asiento del avión.
+        
+        Con regenerar=True solo se insertan las que falten y se eliminan las
+        de asientos de otro avión, salvo que estén reservadas.
+        """
+        existentes = set(self.inventario.values_list('asiento_id', flat=True)) if regenerar else set()
+        nuevas = [
+            AsientoVuelo(vuelo=self, asiento_id=asiento_id,
+                         estado='bloqueado' if estado == 'mantenimiento' else 'disponible')
+            for asiento_id, estado in Asiento.objects.filter(avion_id=self.avion_id).values_list('id', 'estado')
+            if asiento_id not in existentes
+        ]
+        AsientoVuelo.objects.bulk_create(nuevas, batch_size=TAMANO_LOTE_ASIENTOS)
+        if regenerar:
+            self.inventario.exclude(asiento__avion_id=self.avion_id).exclude(estado='reservado').delete()
     
     @property
     def asientos_disponibles(self):
-        """Retorna el número de asientos disponibles"""
-        total_asientos = self.avion.capacidad
-        asientos_reservados = self.reservas.filter(estado__in=['confirmada', 'pagada']).count()
-        return total_asientos - asientos_reservados
+        """Retorna el número de asientos disponibles (sin consultar reservas)"""
+        return self.avion.capacidad - self.asientos_vendidos
     
     @property
     def esta_lleno(self):
@@ -111,9 +260,21 @@ class Pasajero(models.Model):
     class Meta:
         verbose_name = "Pasajero"
         verbose_name_plural = "Pasajeros"
+        indexes = [
+            models.Index(fields=['nombre'], name='pasajero_nombre_idx'),
+            models.Index(fields=['email'], name='pasajero_email_idx'),
+            models.Index(fields=['fecha_registro'], name='pasajero_registro_idx'),
+        ]
         
     def __str__(self):
         return f"{self.nombre} - {self.documento}"
+    
+    def save(self, *args, **kwargs):
+        nuevo = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if nuevo:
+                ResumenReporte.ajustar('pasajero', '', self.fecha_registro, 1)
 
 
 class Asiento(models.Model):
@@ -126,7 +287,6 @@ class Asiento(models.Model):
     
     ESTADOS_ASIENTO = [
         ('disponible', 'Disponible'),
-        ('reservado', 'Reservado'),
         ('ocupado', 'Ocupado'),
         ('mantenimiento', 'En Mantenimiento'),
     ]
@@ -136,6 +296,7 @@ class Asiento(models.Model):
     fila = models.PositiveIntegerField(verbose_name="Fila")
     columna = models.CharField(max_length=1, verbose_name="Columna")
     tipo = models.CharField(max_length=20, choices=TIPOS_ASIENTO, default='economica')
+    # Estado físico del asiento en el avión; la ocupación de cada vuelo vive en AsientoVuelo
     estado = models.CharField(max_length=20, choices=ESTADOS_ASIENTO, default='disponible')
     
     class Meta:
@@ -146,6 +307,110 @@ class Asiento(models.Model):
         
     def __str__(self):
         return f"{self.avion.modelo} - Asiento {self.numero}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._en_mantenimiento = instance.__dict__.get('estado') == 'mantenimiento'
+        return instance
+    
+    def save(self, *args, **kwargs):
+        from . import ocupacion
+        
+        es_nuevo = self._state.adding
+        en_mantenimiento = self.estado == 'mantenimiento'
+        cambio_mantenimiento = en_mantenimiento != getattr(self, '_en_mantenimiento', False)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Los vuelos por salir reflejan el asiento nuevo o su paso por mantenimiento
+            por_salir = Vuelo.objects.filter(avion_id=self.avion_id, fecha_salida__gte=timezone.now())
+            if es_nuevo:
+                AsientoVuelo.objects.bulk_create([
+                    AsientoVuelo(vuelo_id=vuelo_id, asiento=self,
+                                 estado='bloqueado' if en_mantenimiento else 'disponible')
+                    for vuelo_id in por_salir.values_list('id', flat=True)
+                ], batch_size=TAMANO_LOTE_ASIENTOS)
+            elif cambio_mantenimiento:
+                AsientoVuelo.objects.filter(
+                    asiento=self, vuelo__in=por_salir,
+                    estado='disponible' if en_mantenimiento else 'bloqueado',
+                ).update(estado='bloqueado' if en_mantenimiento else 'disponible')
+        # El mapa de asientos cacheado del avión solo cambia con asientos nuevos o en mantenimiento
+        if es_nuevo or cambio_mantenimiento:
+            avion_id = self.avion_id
+            transaction.on_commit(lambda: ocupacion.invalidar_avion(avion_id))
+        self._en_mantenimiento = en_mantenimiento
+
+
+class AsientoVuelo(models.Model):
+    """
+    Inventario de asientos de un vuelo: una fila por asiento del avión,
+    creadas en lote al programar el vuelo. Es la fuente de verdad de la
+    disponibilidad; consultar un asiento es una lectura por clave
+    (vuelo, asiento) en lugar de buscar entre las reservas.
+    """
+    ESTADOS = [
+        ('disponible', 'Disponible'),
+        ('retenido', 'Retenido'),
+        ('reservado', 'Reservado'),
+        ('bloqueado', 'Bloqueado'),
+    ]
+    
+    # La restricción única (vuelo, asiento) sirve de índice para el vuelo
+    vuelo = models.ForeignKey(Vuelo, on_delete=models.CASCADE, related_name='inventario', db_index=False)
+    asiento = models.ForeignKey(Asiento, on_delete=models.CASCADE, related_name='inventario')
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='disponible')
+    # Vencimiento de la retención de una reserva pendiente; coincide con Reserva.vence
+    retenido_hasta = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Asiento del vuelo"
+        verbose_name_plural = "Inventario de asientos"
+        constraints = [
+            models.UniqueConstraint(fields=['vuelo', 'asiento'], name='inventario_vuelo_asiento_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['vuelo', 'estado'], name='inventario_vuelo_estado_idx'),
+            # Lo recorre el barrido de retenciones vencidas
+            models.Index(fields=['retenido_hasta'], condition=models.Q(estado='retenido'), name='inventario_retenido_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.vuelo_id} - {self.asiento_id}: {self.estado}"
+    
+    @staticmethod
+    def libre(ahora):
+        """Filas que se pueden tomar: disponibles o con la retención vencida"""
+        return models.Q(estado='disponible') | models.Q(estado='retenido', retenido_hasta__lte=ahora)
+    
+    @classmethod
+    def liberar(cls, filas):
+        """Devuelve las filas al inventario con un UPDATE; cuántas se liberaron"""
+        # Un asiento que entró en mantenimiento mientras estaba tomado queda bloqueado
+        en_mantenimiento = Asiento.objects.filter(pk=OuterRef('asiento_id'), estado='mantenimiento')
+        return filas.update(retenido_hasta=None, estado=Case(
+            When(Exists(en_mantenimiento), then=Value('bloqueado')),
+            default=Value('disponible'),
+        ))
+    
+    @classmethod
+    def marcar(cls, vuelo_id, asiento_ids, reservado):
+        """Ocupa o libera asientos del vuelo con un UPDATE"""
+        filas = cls.objects.filter(vuelo_id=vuelo_id, asiento_id__in=asiento_ids)
+        if reservado:
+            filas.update(estado='reservado', retenido_hasta=None)
+        else:
+            cls.liberar(filas.filter(estado='reservado'))
+    
+    @classmethod
+    def soltar_retencion(cls, vuelo_id, asiento_id, hasta):
+        """
+        Libera la retención de una reserva pendiente. `hasta` identifica la
+        retención: si venció y otro comprador tomó el asiento, no se toca.
+        """
+        return cls.liberar(cls.objects.filter(
+            vuelo_id=vuelo_id, asiento_id=asiento_id, estado='retenido', retenido_hasta=hasta,
+        ))
 
 
 class Reserva(models.Model):
@@ -157,39 +422,116 @@ class Reserva(models.Model):
         ('cancelada', 'Cancelada'),
         ('completada', 'Completada'),
     ]
+    # Estados que ocupan un asiento del vuelo
+    ESTADOS_ACTIVOS = ['confirmada', 'pagada']
     
-    vuelo = models.ForeignKey(Vuelo, on_delete=models.CASCADE, related_name='reservas')
-    pasajero = models.ForeignKey(Pasajero, on_delete=models.CASCADE, related_name='reservas')
+    # vuelo y pasajero se indexan con los índices compuestos de Meta.indexes
+    vuelo = models.ForeignKey(Vuelo, on_delete=models.CASCADE, related_name='reservas', db_index=False)
+    pasajero = models.ForeignKey(Pasajero, on_delete=models.CASCADE, related_name='reservas', db_index=False)
     asiento = models.ForeignKey(Asiento, on_delete=models.CASCADE, related_name='reservas')
     estado = models.CharField(max_length=20, choices=ESTADOS_RESERVA, default='pendiente')
     fecha_reserva = models.DateTimeField(auto_now_add=True)
     precio = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Precio final")
     codigo_reserva = models.CharField(max_length=10, unique=True, verbose_name="Código de reserva")
+    # Fin de la retención del asiento mientras la reserva está pendiente
+    vence = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Vencimiento de la retención")
     
     class Meta:
         verbose_name = "Reserva"
         verbose_name_plural = "Reservas"
-        unique_together = ['vuelo', 'asiento']
         ordering = ['-fecha_reserva']
+        indexes = [
+            models.Index(fields=['vuelo', 'estado'], name='reserva_vuelo_estado_idx'),
+            models.Index(fields=['pasajero', '-fecha_reserva'], name='reserva_pasajero_fecha_idx'),
+            models.Index(fields=['estado', 'fecha_reserva'], name='reserva_estado_fecha_idx'),
+            # Exportaciones por rango de fechas sin filtro de estado
+            models.Index(fields=['fecha_reserva'], name='reserva_fecha_idx'),
+            # Barrido de retenciones vencidas (estado='pendiente' y vence <= ahora)
+            models.Index(fields=['estado', 'vence'], name='reserva_estado_vence_idx'),
+        ]
+        constraints = [
+            # Un asiento solo puede tener una reserva activa por vuelo; las
+            # canceladas no lo bloquean. Es el reclamo atómico del asiento.
+            models.UniqueConstraint(
+                fields=['vuelo', 'asiento'],
+                condition=models.Q(estado__in=['confirmada', 'pagada']),
+                name='reserva_asiento_activo_unico',
+            ),
+        ]
         
     def __str__(self):
         return f"Reserva {self.codigo_reserva} - {self.pasajero.nombre}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Recordar lo leído para saber si el asiento cambia de ocupación
+        instance._original = (
+            instance.__dict__.get('vuelo_id'),
+            instance.__dict__.get('asiento_id'),
+            instance.__dict__.get('estado') in cls.ESTADOS_ACTIVOS,
+        )
+        instance._estado_original = instance.__dict__.get('estado')
+        return instance
+    
+    @staticmethod
+    def mover_contador(vuelo_id, delta):
+        """Suma `delta` a los asientos vendidos del vuelo con un UPDATE atómico"""
+        vuelos = Vuelo.objects.filter(pk=vuelo_id)
+        if delta < 0:
+            # Un contador desfasado nunca queda negativo; lo corrige la reconciliación
+            vuelos = vuelos.filter(asientos_vendidos__gte=-delta)
+        vuelos.update(asientos_vendidos=F('asientos_vendidos') + delta, actualizado=timezone.now())
+    
     def save(self, *args, **kwargs):
+        from . import ocupacion
+        
         # Generar código de reserva único
         if not self.codigo_reserva:
             self.codigo_reserva = str(uuid.uuid4())[:8].upper()
         # Establecer precio basado en el vuelo si no viene
         if not self.precio:
             self.precio = self.vuelo.precio_base
-        super().save(*args, **kwargs)
-        # Actualizar estado del asiento
-        if self.estado in ['confirmada', 'pagada']:
-            self.asiento.estado = 'reservado'
-            self.asiento.save()
-        elif self.estado == 'cancelada':
-            self.asiento.estado = 'disponible'
-            self.asiento.save()
+        vuelo_original, asiento_original, ocupaba = getattr(self, '_original', (None, None, False))
+        ocupa = self.estado in self.ESTADOS_ACTIVOS
+        estado_original = getattr(self, '_estado_original', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Resumen de reportes: reservas por día de creación y estado
+            if estado_original != self.estado:
+                if estado_original is not None:
+                    ResumenReporte.ajustar('reserva', estado_original, self.fecha_reserva, -1)
+                ResumenReporte.ajustar('reserva', self.estado, self.fecha_reserva, 1)
+                if estado_original is None:
+                    metricas.incrementar_al_confirmar('aerolinea_reservas_creadas_total', estado=self.estado)
+                elif self.estado == 'cancelada':
+                    metricas.incrementar_al_confirmar('aerolinea_reservas_canceladas_total')
+            # Actualizar el contador de asientos vendidos y el mapa de ocupación del vuelo
+            # y el inventario de asientos del vuelo
+            if ocupaba and (vuelo_original, asiento_original) != (self.vuelo_id, self.asiento_id):
+                self.mover_contador(vuelo_original, -1)
+                AsientoVuelo.marcar(vuelo_original, [asiento_original], False)
+                transaction.on_commit(lambda: ocupacion.invalidar_vuelo(vuelo_original))
+                ocupaba = False
+            if ocupa != ocupaba:
+                self.mover_contador(self.vuelo_id, 1 if ocupa else -1)
+                # Los servicios ya reclamaron el asiento en el inventario (_inventario_al_dia)
+                if not getattr(self, '_inventario_al_dia', False):
+                    AsientoVuelo.marcar(self.vuelo_id, [self.asiento_id], ocupa)
+                vuelo_id = self.vuelo_id
+                transaction.on_commit(lambda: ocupacion.invalidar_vuelo(vuelo_id))
+            elif estado_original == 'pendiente' and self.estado != 'pendiente':
+                self._soltar_retencion()
+        self._original = (self.vuelo_id, self.asiento_id, ocupa)
+        self._estado_original = self.estado
+        self._inventario_al_dia = False
+    
+    def _soltar_retencion(self):
+        from . import ocupacion
+        
+        if self.vence and AsientoVuelo.soltar_retencion(self.vuelo_id, self.asiento_id, self.vence):
+            vuelo_id = self.vuelo_id
+            transaction.on_commit(lambda: ocupacion.invalidar_vuelo(vuelo_id))
 
 
 class Boleto(models.Model):
@@ -204,6 +546,7 @@ class Boleto(models.Model):
     codigo_barra = models.CharField(max_length=50, unique=True, verbose_name="Código de barras")
     fecha_emision = models.DateTimeField(auto_now_add=True)
     estado = models.CharField(max_length=20, choices=ESTADOS_BOLETO, default='emitido')
+    fecha_uso = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de embarque")
     
     class Meta:
         verbose_name = "Boleto"
@@ -212,11 +555,22 @@ class Boleto(models.Model):
     def __str__(self):
         return f"Boleto {self.codigo_barra} - {self.reserva.codigo_reserva}"
     
+    @staticmethod
+    def generar_codigo(reserva_id):
+        """
+        Código de barras único sin consultar la base: el id de la reserva (a
+        lo sumo un boleto por reserva) en ancho fijo, seguido de un sufijo
+        aleatorio para que no se pueda deducir el de otro pasajero.
+        """
+        return f"BOL{reserva_id:010d}{secrets.token_hex(4).upper()}"
+    
     def save(self, *args, **kwargs):
         if not self.codigo_barra:
-            timestamp = str(int(datetime.now().timestamp()))
-            self.codigo_barra = f"BOL{timestamp}{self.reserva.id}"
+            self.codigo_barra = self.generar_codigo(self.reserva_id)
+        nuevo = self._state.adding
         super().save(*args, **kwargs)
+        if nuevo:
+            metricas.incrementar_al_confirmar('aerolinea_boletos_emitidos_total')
 
 
 class PerfilUsuario(models.Model):
@@ -254,6 +608,73 @@ class Paquete(models.Model):
     class Meta:
         verbose_name = "Paquete"
         verbose_name_plural = "Paquetes"
+        indexes = [
+            # Índice parcial: en SQLite `activo=True` se compila como `WHERE activo`,
+            # que no aprovecha un índice compuesto pero sí uno con la misma condición
+            models.Index(fields=['-creado'], condition=models.Q(activo=True), name='paquete_activos_creado_idx'),
+        ]
 
     def __str__(self):
         return f"{self.titulo} - {self.destino}"
+
+
+class ResumenReporte(models.Model):
+    """
+    Conteos precalculados para el tablero de reportes, por entidad, estado y
+    día (fecha de salida de los vuelos, de creación de reservas y pasajeros).
+    No se guardan totales: el tablero suma las filas de cada día. Una fila
+    de total la tocaría cada reserva de cada vuelo, y con bloqueo por fila
+    todas las escrituras esperarían por ella.
+
+    Los save() de Vuelo, Reserva y Pasajero y las señales de borrado los
+    ajustan en la misma transacción; las modificaciones con update() no pasan
+    por ahí y se corrigen con `manage.py reconstruir_resumenes`.
+    """
+    ENTIDADES = [
+        ('vuelo', 'Vuelos'),
+        ('reserva', 'Reservas'),
+        ('pasajero', 'Pasajeros'),
+    ]
+
+    entidad = models.CharField(max_length=10, choices=ENTIDADES)
+    estado = models.CharField(max_length=20, blank=True)
+    fecha = models.DateField()
+    cantidad = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Resumen de reportes"
+        verbose_name_plural = "Resúmenes de reportes"
+        constraints = [
+            models.UniqueConstraint(fields=['entidad', 'fecha', 'estado'], name='resumen_dia_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.entidad} {self.estado or '-'} {self.fecha}: {self.cantidad}"
+
+    @staticmethod
+    def dia(valor):
+        """Día local de una fecha y hora, el mismo que agrupa TruncDate"""
+        return timezone.localdate(valor) if timezone.is_aware(valor) else valor.date()
+
+    @classmethod
+    def ajustar(cls, entidad, estado, momento, delta):
+        """Suma `delta` a la fila del día de `momento`"""
+        fecha = cls.dia(momento)
+        filas = cls.objects.filter(entidad=entidad, estado=estado, fecha=fecha)
+        if filas.update(cantidad=F('cantidad') + delta):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(entidad=entidad, estado=estado, fecha=fecha, cantidad=delta)
+        except IntegrityError:
+            # Otra transacción creó la fila entre el UPDATE y el INSERT
+            filas.update(cantidad=F('cantidad') + delta)
+
+    @classmethod
+    def totales(cls):
+        """(entidad, estado, cantidad) de toda la historia, sumando los días"""
+        return (
+            cls.objects.order_by('entidad', 'estado').values('entidad', 'estado')
+            .annotate(total=Sum('cantidad')).filter(total__gt=0)
+            .values_list('entidad', 'estado', 'total')
+        )
@@ -0,0 +1,224 @@
+"""
+Mapa de ocupación de asientos por vuelo.
+
+Cada vuelo guarda en cache un bitset (un int de Python) donde el bit
+`(fila - 1) * columnas + columna` indica si ese asiento está reservado en
+el inventario del vuelo (AsientoVuelo), y otro igual marca los asientos
+retenidos por reservas pendientes: para el mapa, ambos están ocupados.
+La distribución de asientos de cada avión (ids y asientos en
+mantenimiento) se cachea aparte, por avión. Con la cache al día el mapa
+se arma sin consultas a la base.
+
+Los bits no se parchean: la cache no tiene compare-and-set y dos reservas
+simultáneas pisarían una la marca de la otra. Cada cambio del inventario
+incrementa, al confirmarse, la versión del vuelo (ver cache_paginas), y
+una entrada armada con otra versión se reconstruye desde la base en la
+siguiente lectura. La versión se lee antes de consultar la base, así que
+una reconstrucción que compite con una escritura queda vieja y no se
+vuelve a usar. Si alguien modifica reservas con update() sin invalidar,
+el contador `Vuelo.asientos_vendidos` deja de coincidir con el de la
+entrada y también se reconstruye.
+"""
+import hashlib
+from array import array
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from . import metricas
+from .cache_paginas import aversiones, incrementar_version, versiones
+from .models import LETRAS_COLUMNA, AsientoVuelo
+
+TTL_OCUPACION = 60 * 60
+
+AsientoMapa = namedtuple('AsientoMapa', ['id', 'numero', 'fila', 'columna'])
+
+
+def _clave_distribucion(avion_id):
+    return f'asientos:distribucion:{avion_id}'
+
+
+def _clave_ocupacion(vuelo_id):
+    return f'asientos:ocupacion:{vuelo_id}'
+
+
+def _grupo(vuelo_id):
+    """Grupo de versión de cache del inventario del vuelo"""
+    return f'asientos:{vuelo_id}'
+
+
+def _indice(fila, columna, filas, columnas):
+    """Posición del asiento en el bitset, o None si está fuera de la configuración"""
+    col = LETRAS_COLUMNA.find(columna)
+    if not 1 <= fila <= filas or not 0 <= col < columnas:
+        return None
+    return (fila - 1) * columnas + col
+
+
+def _asientos_del_avion(avion):
+    return avion.asientos.values_list('id', 'fila', 'columna', 'estado')
+
+
+def _construir_distribucion(avion, asientos):
+    ids = array('q', bytes(8 * avion.filas * avion.columnas))
+    mantenimiento = 0
+    for asiento_id, fila, columna, estado in asientos:
+        i = _indice(fila, columna, avion.filas, avion.columnas)
+        if i is None:
+            continue
+        ids[i] = asiento_id
+        if estado == 'mantenimiento':
+            mantenimiento |= 1 << i
+    return (avion.filas, avion.columnas, ids.tobytes(), mantenimiento)
+
+
+def _asientos_tomados(vuelo):
+    return AsientoVuelo.objects.filter(vuelo_id=vuelo.id, estado__in=['reservado', 'retenido']).values_list(
+        'estado', 'asiento__fila', 'asiento__columna'
+    )
+
+
+def _construir_ocupacion(tomados, filas, columnas, version):
+    bits = 0
+    vendidos = 0
+    retenidos = 0
+    for estado, fila, columna in tomados:
+        i = _indice(fila, columna, filas, columnas)
+        bit = 0 if i is None else 1 << i
+        if estado == 'retenido':
+            retenidos |= bit
+        else:
+            vendidos += 1
+            bits |= bit
+    return (filas, columnas, bits, vendidos, retenidos, version)
+
+
+class MapaOcupacion:
+    """Vista de solo lectura del mapa de asientos de un vuelo"""
+
+    def __init__(self, filas, columnas, ids, mantenimiento, ocupados):
+        self.filas = filas
+        self.columnas = columnas
+        self.ids = ids
+        self.mantenimiento = mantenimiento
+        self.ocupados = ocupados
+
+    def filas_asientos(self):
+        """Filas en el formato que esperan los templates del mapa de asientos"""
+        letras = LETRAS_COLUMNA[:self.columnas]
+        resultado = []
+        i = 0
+        for fila in range(1, self.filas + 1):
+            asientos = []
+            for letra in letras:
+                asiento_id = self.ids[i]
+                if asiento_id:
+                    ocupado = bool(self.ocupados >> i & 1)
+                    asientos.append({
+                        'asiento': AsientoMapa(asiento_id, f"{fila}{letra}", fila, letra),
+                        'ocupado': ocupado,
+                        'disponible': not ocupado and not self.mantenimiento >> i & 1,
+                    })
+                i += 1
+            if asientos:
+                resultado.append({'numero': fila, 'asientos': asientos})
+        return resultado
+
+    def filas_compactas(self):
+        """
+        Una cadena por fila con un carácter por columna: L libre, O ocupado,
+        M en mantenimiento, - sin asiento. Es el formato de la API.
+        """
+        resultado = []
+        i = 0
+        for _ in range(self.filas):
+            fila = []
+            for _ in range(self.columnas):
+                if not self.ids[i]:
+                    fila.append('-')
+                elif self.ocupados >> i & 1:
+                    fila.append('O')
+                elif self.mantenimiento >> i & 1:
+                    fila.append('M')
+                else:
+                    fila.append('L')
+                i += 1
+            resultado.append(''.join(fila))
+        return resultado
+
+    def huella(self):
+        """Resumen exacto del estado del mapa, para usar como ETag"""
+        datos = f'{self.filas}:{self.columnas}:{self.mantenimiento:x}:{self.ocupados:x}:'.encode()
+        return hashlib.blake2b(datos + self.ids.tobytes(), digest_size=12).hexdigest()
+
+
+def _distribucion_vigente(distribucion, avion):
+    return distribucion is not None and distribucion[:2] == (avion.filas, avion.columnas)
+
+
+def _ocupacion_vigente(ocupacion, vuelo, version):
+    avion = vuelo.avion
+    vigente = (ocupacion is not None and len(ocupacion) == 6 and ocupacion[:2] == (avion.filas, avion.columnas)
+               and ocupacion[3] == vuelo.asientos_vendidos and ocupacion[5] == version)
+    metricas.incrementar('aerolinea_cache_total', cache='ocupacion', resultado='acierto' if vigente else 'fallo')
+    return vigente
+
+
+def _armar_mapa(avion, distribucion, ocupacion):
+    ids = array('q')
+    ids.frombytes(distribucion[2])
+    return MapaOcupacion(avion.filas, avion.columnas, ids, distribucion[3], ocupacion[2] | ocupacion[4])
+
+
+def mapa_de_vuelo(vuelo):
+    """
+    Mapa de ocupación del vuelo. Espera `vuelo.avion` ya cargado
+    (select_related) y, si la cache está al día, no consulta la base.
+    """
+    avion = vuelo.avion
+    clave_dist, clave_ocup = _clave_distribucion(avion.id), _clave_ocupacion(vuelo.id)
+    cacheado = cache.get_many([clave_dist, clave_ocup])
+
+    distribucion = cacheado.get(clave_dist)
+    if not _distribucion_vigente(distribucion, avion):
+        distribucion = _construir_distribucion(avion, _asientos_del_avion(avion))
+        cache.set(clave_dist, distribucion, TTL_OCUPACION)
+
+    version = versiones(_grupo(vuelo.id))
+    ocupacion = cacheado.get(clave_ocup)
+    if not _ocupacion_vigente(ocupacion, vuelo, version):
+        ocupacion = _construir_ocupacion(_asientos_tomados(vuelo), avion.filas, avion.columnas, version)
+        cache.set(clave_ocup, ocupacion, TTL_OCUPACION)
+
+    return _armar_mapa(avion, distribucion, ocupacion)
+
+
+async def amapa_de_vuelo(vuelo):
+    """mapa_de_vuelo() para las vistas async: la misma cache, leída y reconstruida sin bloquear"""
+    avion = vuelo.avion
+    clave_dist, clave_ocup = _clave_distribucion(avion.id), _clave_ocupacion(vuelo.id)
+    cacheado = await cache.aget_many([clave_dist, clave_ocup])
+
+    distribucion = cacheado.get(clave_dist)
+    if not _distribucion_vigente(distribucion, avion):
+        asientos = [fila async for fila in _asientos_del_avion(avion)]
+        distribucion = _construir_distribucion(avion, asientos)
+        await cache.aset(clave_dist, distribucion, TTL_OCUPACION)
+
+    version = await aversiones(_grupo(vuelo.id))
+    ocupacion = cacheado.get(clave_ocup)
+    if not _ocupacion_vigente(ocupacion, vuelo, version):
+        tomados = [fila async for fila in _asientos_tomados(vuelo)]
+        ocupacion = _construir_ocupacion(tomados, avion.filas, avion.columnas, version)
+        await cache.aset(clave_ocup, ocupacion, TTL_OCUPACION)
+
+    return _armar_mapa(avion, distribucion, ocupacion)
+
+
+def invalidar_vuelo(vuelo_id):
+    """El inventario del vuelo cambió: el mapa se reconstruye en la próxima lectura"""
+    incrementar_version(_grupo(vuelo_id))
+
+
+def invalidar_avion(avion_id):
+    cache.delete(_clave_distribucion(avion_id))
@@ -0,0 +1,181 @@
+"""
+Paginación por keyset (cursor) para los listados.
+
+En vez de COUNT(*) + OFFSET, cada página se pide como "las N filas que
+siguen a esta", filtrando por los valores de orden de la última fila vista.
+Con un índice que acompañe al orden, la página 1000 cuesta lo mismo que la 1.
+"""
+import base64
+import datetime
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+
+def _a_json(valor):
+    # isoformat() completo: DjangoJSONEncoder recorta los microsegundos y el
+    # cursor dejaría de coincidir con la fila en la que terminó la página
+    if isinstance(valor, (datetime.datetime, datetime.date)):
+        return valor.isoformat()
+    raise TypeError(f'Valor no serializable en el cursor: {valor!r}')
+
+
+class PaginaKeyset:
+    """Página de resultados con cursores a la siguiente y a la anterior"""
+    es_keyset = True
+
+    def __init__(self, object_list, cursor_siguiente, cursor_anterior, parametros):
+        self.object_list = object_list
+        self.cursor_siguiente = cursor_siguiente
+        self.cursor_anterior = cursor_anterior
+        self._parametros = parametros
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.cursor_siguiente is not None
+
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def _query(self, cursor):
+        parametros = self._parametros.copy()
+        parametros.pop('page', None)
+        parametros.pop('cursor', None)
+        if cursor:
+            parametros['cursor'] = cursor
+        return parametros.urlencode()
+
+    @property
+    def query_primera(self):
+        return self._query(None)
+
+    @property
+    def query_siguiente(self):
+        return self._query(self.cursor_siguiente)
+
+    @property
+    def query_anterior(self):
+        return self._query(self.cursor_anterior)
+
+
+class KeysetPaginator:
+    """
+    Pagina un queryset ordenado por `orden`, p. ej. ('fecha_salida', 'id') o
+    ('-fecha_reserva', 'id'). El último campo debe ser único para que el
+    orden sea total y los cursores estables.
+    """
+
+    def __init__(self, queryset, por_pagina, orden):
+        self.queryset = queryset
+        self.por_pagina = por_pagina
+        self.orden = [(campo.lstrip('-'), campo.startswith('-')) for campo in orden]
+
+    def _codificar(self, direccion, fila):
+        valores = [getattr(fila, campo) for campo, _ in self.orden]
+        datos = json.dumps([direccion, valores], default=_a_json)
+        return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+    def _decodificar(self, cursor):
+        try:
+            datos = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direccion, valores = json.loads(datos)
+            if direccion not in ('n', 'p') or len(valores) != len(self.orden):
+                return None
+            modelo = self.queryset.model
+            return direccion, [
+                modelo._meta.get_field(campo).to_python(valor)
+                for (campo, _), valor in zip(self.orden, valores)
+            ]
+        except Exception:
+            # Un cursor manipulado o viejo vuelve a la primera página
+            return None
+
+    def _despues_de(self, valores, hacia_atras):
+        """
+        Filtro "fila posterior a `valores`" en el orden dado (o anterior, si
+        hacia_atras). Se agrega un rango sobre el primer campo para que la
+        base pueda usar el índice aunque la comparación completa sea un OR.
+        """
+        condicion = Q()
+        iguales = {}
+        for (campo, descendente), valor in zip(self.orden, valores):
+            mayor = descendente == hacia_atras
+            condicion |= Q(**iguales, **{f'{campo}__{"gt" if mayor else "lt"}': valor})
+            iguales[campo] = valor
+        campo, descendente = self.orden[0]
+        rango = 'gte' if descendente == hacia_atras else 'lte'
+        return Q(**{f'{campo}__{rango}': valores[0]}) & condicion
+
+    def _ordenar(self, queryset, invertido):
+        return queryset.order_by(*[
+            ('-' if descendente != invertido else '') + campo for campo, descendente in self.orden
+        ])
+
+    def _consulta(self, cursor):
+        """Queryset de la página (una fila de más para saber si hay otra) y el cursor decodificado"""
+        decodificado = self._decodificar(cursor) if cursor else None
+        hacia_atras = decodificado is not None and decodificado[0] == 'p'
+        queryset = self.queryset
+        if decodificado:
+            queryset = queryset.filter(self._despues_de(decodificado[1], hacia_atras))
+        return self._ordenar(queryset, hacia_atras)[:self.por_pagina + 1], decodificado
+
+    def _pagina(self, filas, decodificado, parametros):
+        hacia_atras = decodificado is not None and decodificado[0] == 'p'
+        hay_mas = len(filas) > self.por_pagina
+        filas = filas[:self.por_pagina]
+        if hacia_atras:
+            filas.reverse()
+            hay_siguiente, hay_anterior = True, hay_mas
+        else:
+            hay_siguiente, hay_anterior = hay_mas, decodificado is not None
+        return PaginaKeyset(
+            filas,
+            self._codificar('n', filas[-1]) if filas and hay_siguiente else None,
+            self._codificar('p', filas[0]) if filas and hay_anterior else None,
+            parametros,
+        )
+
+    def get_page(self, cursor, parametros):
+        consulta, decodificado = self._consulta(cursor)
+        return self._pagina(list(consulta), decodificado, parametros)
+
+    async def aget_page(self, cursor, parametros):
+        consulta, decodificado = self._consulta(cursor)
+        return self._pagina([fila async for fila in consulta], decodificado, parametros)
+
+
+def paginar(request, queryset, por_pagina, orden):
+    """
+    Pagina por keyset según `orden`. Los enlaces viejos con `?page=N` se
+    siguen atendiendo con el Paginator clásico.
+    """
+    if 'page' in request.GET:
+        page_obj = Paginator(queryset.order_by(*orden), por_pagina).get_page(request.GET.get('page'))
+        parametros = request.GET.copy()
+        parametros.pop('page', None)
+        page_obj.query_base = parametros.urlencode()
+        return page_obj
+    return KeysetPaginator(queryset, por_pagina, orden).get_page(request.GET.get('cursor'), request.GET)
+
+
+async def apaginar(request, queryset, por_pagina, orden):
+    """paginar() para las vistas async: la página vuelve con sus filas ya cargadas"""
+    if 'page' in request.GET:
+        # Paginator no tiene API async: el COUNT y la página corren en un hilo
+        def clasica():
+            page_obj = paginar(request, queryset, por_pagina, orden)
+            page_obj.object_list = list(page_obj.object_list)
+            return page_obj
+        return await sync_to_async(clasica)()
+    return await KeysetPaginator(queryset, por_pagina, orden).aget_page(request.GET.get('cursor'), request.GET)
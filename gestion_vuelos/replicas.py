@@ -0,0 +1,160 @@
+"""
+Lecturas en la réplica.
+
+Si settings.DATABASES define el alias 'replica' (una copia de solo lectura
+del primario), las vistas marcadas con @lee_de_replica —reportes, listados
+de admin, exportaciones y mis_reservas— leen de ella, y así las
+agregaciones pesadas no compiten con las escrituras de las reservas. Todo
+lo demás, y toda escritura, va a 'default'. Solo se desvían los modelos de
+esta app: sesiones y usuarios se leen siempre del primario.
+
+La réplica puede estar atrasada. Después de un POST exitoso de un usuario
+(reservar, confirmar, cancelar...) sus lecturas vuelven al primario durante
+settings.REPLICA_FIJACION_SEGUNDOS, para que mis_reservas muestre lo que
+acaba de hacer. La marca viaja en la sesión, así que vale para todos los
+procesos.
+
+La marca de "leer de la réplica" es una ContextVar: no se filtra entre
+hilos ni entre requests concurrentes de un servidor ASGI.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+from .roles import ausuario
+
+ALIAS_REPLICA = 'replica'
+APP_REPLICADA = 'gestion_vuelos'
+CLAVE_SESION = 'primario_hasta'
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_en_replica = ContextVar('en_replica', default=False)
+_solo_primario = ContextVar('solo_primario', default=False)
+
+
+def hay_replica():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+@contextmanager
+def solo_primario():
+    """
+    Todas las lecturas al primario, también en las vistas marcadas. Para
+    los comandos de diagnóstico: trabajan dentro de una transacción que no
+    se confirma y la réplica no vería sus datos.
+    """
+    token = _solo_primario.set(True)
+    try:
+        yield
+    finally:
+        _solo_primario.reset(token)
+
+
+def fijado_al_primario(request):
+    """¿El usuario escribió hace poco y debe leer del primario?"""
+    sesion = getattr(request, 'session', None)
+    return sesion is not None and sesion.get(CLAVE_SESION, 0) > time.time()
+
+
+def fijar_al_primario(request):
+    request.session[CLAVE_SESION] = time.time() + settings.REPLICA_FIJACION_SEGUNDOS
+
+
+class RouterReplica:
+    """Manda a la réplica las lecturas hechas dentro de @lee_de_replica"""
+
+    def db_for_read(self, model, **hints):
+        if (
+            _en_replica.get() and not _solo_primario.get()
+            and model._meta.app_label == APP_REPLICADA and hay_replica()
+        ):
+            return ALIAS_REPLICA
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primario y réplica tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema del primario (ver sincronizar_replica)
+        return db != ALIAS_REPLICA
+
+
+def _iterar_en_replica(contenido):
+    """
+    Contenido de una respuesta en streaming que sigue leyendo de la
+    réplica: sus consultas corren después de que la vista retornó. La marca
+    se pone solo mientras se produce cada parte, nunca entre un yield y el
+    siguiente.
+    """
+    partes = iter(contenido)
+    while True:
+        token = _en_replica.set(True)
+        try:
+            parte = next(partes)
+        except StopIteration:
+            return
+        finally:
+            _en_replica.reset(token)
+        yield parte
+
+
+def lee_de_replica(vista):
+    """La vista (solo lectura) lee de la réplica, salvo que el usuario esté fijado al primario"""
+    @wraps(vista)
+    def envuelta(request, *args, **kwargs):
+        if not hay_replica() or fijado_al_primario(request):
+            return vista(request, *args, **kwargs)
+        token = _en_replica.set(True)
+        try:
+            respuesta = vista(request, *args, **kwargs)
+        finally:
+            _en_replica.reset(token)
+        if respuesta.streaming:
+            respuesta.streaming_content = _iterar_en_replica(respuesta.streaming_content)
+        return respuesta
+    return envuelta
+
+
+class FijacionPrimarioMiddleware:
+    """Fija al primario las lecturas de quien acaba de escribir"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not hay_replica():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        respuesta = self.get_response(request)
+        if (
+            request.method not in METODOS_SEGUROS
+            and respuesta.status_code < 400
+            and request.user.is_authenticated
+        ):
+            fijar_al_primario(request)
+        return respuesta
+
+    async def __acall__(self, request):
+        respuesta = await self.get_response(request)
+        if (
+            request.method not in METODOS_SEGUROS
+            and respuesta.status_code < 400
+            and (await ausuario(request)).is_authenticated
+        ):
+            await sync_to_async(fijar_al_primario)(request)
+        return respuesta
@@ -0,0 +1,53 @@
+"""
+Rol del usuario, resuelto una sola vez por request.
+
+El backend de autenticación carga el usuario de la sesión junto con su
+perfil (select_related), y es_admin() guarda el resultado en el propio
+objeto usuario. Como request.user es el mismo objeto durante todo el
+request, las vistas, user_passes_test y el context processor del navbar
+comparten ese resultado sin volver a consultar PerfilUsuario.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .models import PerfilUsuario
+
+
+class ModelBackendConPerfil(ModelBackend):
+    """ModelBackend que trae el perfil en la misma consulta que el usuario"""
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('perfil').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+def es_admin(user):
+    """Es admin si tiene perfil admin o es staff/superuser."""
+    if not user.is_authenticated:
+        return False
+    try:
+        return user._es_admin
+    except AttributeError:
+        pass
+    try:
+        rol = user.perfil.rol
+    except PerfilUsuario.DoesNotExist:
+        rol = None
+    user._es_admin = rol == 'admin' or user.is_staff or user.is_superuser
+    return user._es_admin
+
+
+async def ausuario(request):
+    """
+    request.user resuelto desde una vista async: la carga (sesión, usuario,
+    perfil y rol) corre en un hilo y queda guardada en el propio request,
+    así después es_admin(), las plantillas y los context processors no
+    consultan la base desde el event loop.
+    """
+    await sync_to_async(es_admin)(request.user)
+    return request.user
@@ -0,0 +1,319 @@
+import uuid
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import metricas, ocupacion
+from .cache_paginas import incrementar_version
+from .models import AsientoVuelo, Boleto, Pasajero, Reserva, ResumenReporte
+
+# Tope de asientos por reserva grupal (grupos familiares y corporativos)
+MAXIMO_ASIENTOS_GRUPO = 20
+# Tiempo que una reserva pendiente retiene sus asientos antes de confirmarse
+TTL_RETENCION = timedelta(minutes=10)
+# Filas por UPDATE en el barrido de retenciones vencidas
+TAMANO_LOTE_RETENCIONES = 1000
+# Filas por INSERT al emitir los boletos de un vuelo
+TAMANO_LOTE_BOLETOS = 500
+
+
+class ReservaError(Exception):
+    """Error de negocio al reservar; el mensaje se puede mostrar al usuario"""
+
+
+class VueloNoDisponible(ReservaError):
+    pass
+
+
+class AsientoInvalido(ReservaError):
+    pass
+
+
+class AsientoOcupado(ReservaError):
+    pass
+
+
+class RetencionVencida(ReservaError):
+    pass
+
+
+def email_de_pasajero(user):
+    """Email con el que se asocia el pasajero del usuario"""
+    return user.email or f"user{user.id}@example.com"
+
+
+def pasajero_para_usuario(user):
+    """Pasajero asociado al usuario (por email); si no existe se crea uno mínimo"""
+    pasajero, _ = Pasajero.objects.get_or_create(
+        email=email_de_pasajero(user),
+        defaults={
+            'nombre': user.get_full_name() or user.username,
+            'documento': f'USER_{user.id}',
+            'tipo_documento': 'dni',
+            'telefono': '',
+            'fecha_nacimiento': timezone.now().date(),
+        }
+    )
+    return pasajero
+
+
+def _tomados(vuelo, asiento_ids, ahora):
+    """Números de los asientos reservados o retenidos por otra reserva vigente"""
+    return sorted(
+        AsientoVuelo.objects.filter(vuelo=vuelo, asiento_id__in=asiento_ids)
+        .exclude(AsientoVuelo.libre(ahora))
+        .exclude(estado='bloqueado')
+        .values_list('asiento__numero', flat=True)
+    )
+
+
+def _tomado(plaza, ahora):
+    return plaza.estado == 'reservado' or (plaza.estado == 'retenido' and plaza.retenido_hasta > ahora)
+
+
+def _reclamar(vuelo, asiento_ids, estado, ahora):
+    """
+    Toma los asientos en el inventario con un UPDATE condicional: solo
+    cambian las filas libres o con la retención vencida, así que entre
+    compradores concurrentes el primero gana y el resto ve menos filas
+    actualizadas. Devuelve el vencimiento de la retención (o None).
+    """
+    vence = ahora + TTL_RETENCION if estado == 'pendiente' else None
+    tomadas = AsientoVuelo.objects.filter(vuelo=vuelo, asiento_id__in=asiento_ids).filter(
+        AsientoVuelo.libre(ahora)
+    ).update(estado='retenido' if vence else 'reservado', retenido_hasta=vence)
+    if tomadas != len(asiento_ids):
+        ocupados = _tomados(vuelo, asiento_ids, ahora)
+        if len(asiento_ids) == 1:
+            raise AsientoOcupado('Este asiento ya está reservado.')
+        raise AsientoOcupado(f"Asientos ya reservados: {', '.join(ocupados)}.")
+    return vence
+
+
+def reservar_asiento(vuelo, pasajero, asiento_id, estado='confirmada'):
+    """
+    Reserva un asiento del vuelo en una sola transacción.
+
+    La disponibilidad se lee del inventario del vuelo con una lectura por
+    clave y el asiento se reclama con un UPDATE condicional sobre esa
+    misma fila (ver _reclamar): entre compradores concurrentes solo uno lo
+    obtiene y el resto recibe AsientoOcupado sin reintentos. La restricción
+    `reserva_asiento_activo_unico` sigue siendo la última garantía.
+
+    Con estado 'pendiente' el asiento queda retenido por TTL_RETENCION.
+    """
+    if vuelo.estado != 'programado':
+        raise VueloNoDisponible('No se pueden hacer reservas en este vuelo.')
+    try:
+        plaza = AsientoVuelo.objects.select_related('asiento').get(vuelo=vuelo, asiento_id=asiento_id)
+    except (AsientoVuelo.DoesNotExist, ValueError):
+        raise AsientoInvalido('Asiento no válido.')
+    if plaza.estado == 'bloqueado':
+        raise AsientoInvalido('El asiento no está disponible.')
+    ahora = timezone.now()
+    toma_asiento = estado in Reserva.ESTADOS_ACTIVOS or estado == 'pendiente'
+    if toma_asiento and _tomado(plaza, ahora):
+        raise AsientoOcupado('Este asiento ya está reservado.')
+
+    try:
+        with transaction.atomic():
+            vence = _reclamar(vuelo, [plaza.asiento_id], estado, ahora) if toma_asiento else None
+            reserva = Reserva(
+                vuelo=vuelo,
+                pasajero=pasajero,
+                asiento=plaza.asiento,
+                precio=vuelo.precio_base,
+                estado=estado,
+                vence=vence,
+            )
+            reserva._inventario_al_dia = toma_asiento
+            reserva.save(force_insert=True)
+    except IntegrityError:
+        if _tomados(vuelo, [plaza.asiento_id], ahora):
+            raise AsientoOcupado('Este asiento ya está reservado.')
+        raise
+    if vence:
+        transaction.on_commit(lambda: ocupacion.invalidar_vuelo(vuelo.id))
+    return reserva
+
+
+def reservar_asientos(vuelo, pasajero, asiento_ids, estado='confirmada'):
+    """
+    Reserva varios asientos del vuelo como una unidad: se validan todos con
+    una consulta al inventario, se reclaman con un UPDATE condicional (ver
+    _reclamar), las reservas se insertan en un solo bulk_create y el
+    contador del vuelo se actualiza con otro UPDATE. Si algún asiento ya
+    está tomado, la transacción se revierte y no se reserva ninguno.
+
+    bulk_create no llama a Reserva.save() ni emite señales, así que acá se
+    replican sus efectos: contador de vendidos, resumen de reportes, mapa de
+    ocupación y versión de la cache pública.
+    """
+    if vuelo.estado != 'programado':
+        raise VueloNoDisponible('No se pueden hacer reservas en este vuelo.')
+    try:
+        ids = sorted({int(asiento_id) for asiento_id in asiento_ids})
+    except (TypeError, ValueError):
+        raise AsientoInvalido('Asiento no válido.')
+    if not ids:
+        raise AsientoInvalido('Debe seleccionar al menos un asiento.')
+    if len(ids) > MAXIMO_ASIENTOS_GRUPO:
+        raise AsientoInvalido(f'Se pueden reservar hasta {MAXIMO_ASIENTOS_GRUPO} asientos por vez.')
+
+    activa = estado in Reserva.ESTADOS_ACTIVOS
+    toma_asiento = activa or estado == 'pendiente'
+    ahora = timezone.now()
+    plazas = list(AsientoVuelo.objects.select_related('asiento').filter(vuelo=vuelo, asiento_id__in=ids))
+    if len(plazas) != len(ids):
+        raise AsientoInvalido('Asiento no válido.')
+    bloqueados = sorted(p.asiento.numero for p in plazas if p.estado == 'bloqueado')
+    if bloqueados:
+        raise AsientoInvalido(f"Asientos no disponibles: {', '.join(bloqueados)}.")
+    tomados = sorted(p.asiento.numero for p in plazas if _tomado(p, ahora))
+    if tomados and toma_asiento:
+        raise AsientoOcupado(f"Asientos ya reservados: {', '.join(tomados)}.")
+
+    asientos = [plaza.asiento for plaza in plazas]
+    try:
+        with transaction.atomic():
+            vence = _reclamar(vuelo, ids, estado, ahora) if toma_asiento else None
+            reservas = Reserva.objects.bulk_create([
+                Reserva(
+                    vuelo=vuelo,
+                    pasajero=pasajero,
+                    asiento=asiento,
+                    precio=vuelo.precio_base,
+                    estado=estado,
+                    codigo_reserva=str(uuid.uuid4())[:8].upper(),
+                    vence=vence,
+                )
+                for asiento in asientos
+            ])
+            if activa:
+                Reserva.mover_contador(vuelo.id, len(reservas))
+            ResumenReporte.ajustar('reserva', estado, reservas[0].fecha_reserva, len(reservas))
+            metricas.incrementar_al_confirmar('aerolinea_reservas_creadas_total', len(reservas), estado=estado)
+    except IntegrityError:
+        ocupados = _tomados(vuelo, ids, ahora)
+        if ocupados:
+            raise AsientoOcupado(f"Asientos ya reservados: {', '.join(ocupados)}.")
+        raise
+
+    if activa or vence:
+        transaction.on_commit(lambda: ocupacion.invalidar_vuelo(vuelo.id))
+    transaction.on_commit(lambda: incrementar_version('reservas'))
+    for reserva in reservas:
+        reserva._original = (reserva.vuelo_id, reserva.asiento_id, activa)
+        reserva._estado_original = reserva.estado
+    return reservas
+
+
+def retener_asientos(vuelo, pasajero, asiento_ids):
+    """Reservas pendientes que retienen los asientos elegidos por TTL_RETENCION"""
+    return reservar_asientos(vuelo, pasajero, asiento_ids, estado='pendiente')
+
+
+def confirmar_reservas(reservas, estado='confirmada'):
+    """
+    Confirma reservas pendientes cuya retención sigue vigente. Cada asiento
+    pasa de retenido a reservado solo si la retención es la de esa reserva
+    (mismo vencimiento); si venció y otro lo tomó, no se confirma ninguna.
+    """
+    ahora = timezone.now()
+    for reserva in reservas:
+        if reserva.estado != 'pendiente':
+            raise ReservaError(f'La reserva {reserva.codigo_reserva} no está pendiente de confirmación.')
+        if reserva.vence is None or reserva.vence <= ahora:
+            raise RetencionVencida('La retención de los asientos venció. Elegí los asientos nuevamente.')
+    with transaction.atomic():
+        for reserva in reservas:
+            propia = AsientoVuelo.objects.filter(
+                vuelo_id=reserva.vuelo_id, asiento_id=reserva.asiento_id,
+                estado='retenido', retenido_hasta=reserva.vence,
+            )
+            if not propia.update(estado='reservado', retenido_hasta=None):
+                raise RetencionVencida('La retención de los asientos venció. Elegí los asientos nuevamente.')
+            reserva.estado = estado
+            reserva._inventario_al_dia = True
+            reserva.save()
+    return reservas
+
+
+def liberar_retenciones_vencidas(ahora=None, lote=TAMANO_LOTE_RETENCIONES):
+    """
+    Cancela las reservas pendientes con la retención vencida y devuelve sus
+    asientos al inventario. Trabaja por lotes: cada uno lee `lote` filas por
+    los índices parciales de vencimiento y las actualiza con un UPDATE por
+    tabla, en su propia transacción para no bloquear la venta.
+
+    Devuelve (reservas canceladas, asientos liberados).
+    """
+    ahora = ahora or timezone.now()
+    canceladas = liberados = 0
+    while True:
+        with transaction.atomic():
+            vencidas = list(
+                Reserva.objects.select_for_update(skip_locked=True)
+                .filter(estado='pendiente', vence__lte=ahora)
+                .order_by('vence')
+                .values_list('id', 'fecha_reserva')[:lote]
+            )
+            if vencidas:
+                Reserva.objects.filter(id__in=[id_ for id_, _ in vencidas]).update(estado='cancelada')
+                # update() no pasa por Reserva.save(): ajustar el resumen por día
+                por_dia = {}
+                for _, fecha in vencidas:
+                    dia = ResumenReporte.dia(fecha)
+                    momento, cantidad = por_dia.get(dia, (fecha, 0))
+                    por_dia[dia] = (momento, cantidad + 1)
+                for momento, cantidad in por_dia.values():
+                    ResumenReporte.ajustar('reserva', 'pendiente', momento, -cantidad)
+                    ResumenReporte.ajustar('reserva', 'cancelada', momento, cantidad)
+                metricas.incrementar_al_confirmar('aerolinea_reservas_canceladas_total', len(vencidas))
+
+            filas = list(
+                AsientoVuelo.objects.select_for_update(skip_locked=True)
+                .filter(estado='retenido', retenido_hasta__lte=ahora)
+                .order_by('retenido_hasta')
+                .values_list('id', 'vuelo_id')[:lote]
+            )
+            if filas:
+                AsientoVuelo.liberar(AsientoVuelo.objects.filter(id__in=[id_ for id_, _ in filas]))
+                for vuelo_id in {vuelo_id for _, vuelo_id in filas}:
+                    transaction.on_commit(lambda vuelo_id=vuelo_id: ocupacion.invalidar_vuelo(vuelo_id))
+        canceladas += len(vencidas)
+        liberados += len(filas)
+        if len(vencidas) < lote and len(filas) < lote:
+            return canceladas, liberados
+
+
+def emitir_boletos(vuelo_ids):
+    """
+    Emite en lote los boletos de todas las reservas confirmadas o pagadas
+    de los vuelos que todavía no tienen uno. Los códigos de barras se
+    generan en memoria (Boleto.generar_codigo) y se insertan con
+    bulk_create: un vuelo de 300 asientos son una lectura y un puñado de
+    INSERT. Si otra emisión gana la carrera por alguna reserva, el lote se
+    revierte y se vuelve a calcular una vez.
+
+    Devuelve la cantidad de boletos nuevos.
+    """
+    for intento in range(2):
+        reserva_ids = (
+            Reserva.objects.filter(vuelo_id__in=vuelo_ids, estado__in=Reserva.ESTADOS_ACTIVOS, boleto__isnull=True)
+            .values_list('id', flat=True)
+        )
+        boletos = [
+            Boleto(reserva_id=reserva_id, codigo_barra=Boleto.generar_codigo(reserva_id))
+            for reserva_id in reserva_ids
+        ]
+        try:
+            with transaction.atomic():
+                Boleto.objects.bulk_create(boletos, batch_size=TAMANO_LOTE_BOLETOS)
+                metricas.incrementar_al_confirmar('aerolinea_boletos_emitidos_total', len(boletos))
+        except IntegrityError:
+            if intento:
+                raise
+        else:
+            return len(boletos)
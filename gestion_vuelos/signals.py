@@ -0,0 +1,64 @@
+"""
+Receptores de señales de los modelos.
+
+- Borrados para el resumen de reportes y para los asientos vendidos y el
+  inventario de cada vuelo. Se usan señales y no delete() porque los
+  borrados en cascada (un vuelo con sus reservas, un pasajero con las
+  suyas, un avión con sus vuelos) y los de QuerySet.delete() no llaman al
+  delete() de cada instancia, pero sí emiten post_delete.
+- Versiones de la cache de páginas públicas (ver cache_paginas).
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import ocupacion
+from .cache_paginas import incrementar_version
+from .models import AsientoVuelo, Avion, Paquete, Pasajero, Reserva, ResumenReporte, Vuelo
+
+# Grupo de versión de cache que invalida cada modelo. Un cambio de avión
+# altera la capacidad que muestran las tarjetas de sus vuelos.
+GRUPOS_CACHE = {
+    Avion: 'vuelos',
+    Vuelo: 'vuelos',
+    Reserva: 'reservas',
+    Paquete: 'paquetes',
+}
+
+
+@receiver(post_delete, sender=Vuelo)
+def descontar_vuelo(sender, instance, **kwargs):
+    estado, fecha_salida = getattr(instance, '_resumen_original', (instance.estado, instance.fecha_salida))
+    ResumenReporte.ajustar('vuelo', estado, fecha_salida, -1)
+
+
+@receiver(post_delete, sender=Reserva)
+def descontar_reserva(sender, instance, **kwargs):
+    estado = getattr(instance, '_estado_original', instance.estado)
+    ResumenReporte.ajustar('reserva', estado, instance.fecha_reserva, -1)
+    # El asiento que ocupaba deja de contarse como vendido y vuelve a
+    # venderse: se libera en el inventario del vuelo y en el mapa cacheado
+    vuelo_id, asiento_id, ocupaba = getattr(
+        instance, '_original', (instance.vuelo_id, instance.asiento_id, instance.estado in Reserva.ESTADOS_ACTIVOS)
+    )
+    if ocupaba:
+        Reserva.mover_contador(vuelo_id, -1)
+        AsientoVuelo.marcar(vuelo_id, [asiento_id], False)
+        transaction.on_commit(lambda: ocupacion.invalidar_vuelo(vuelo_id))
+    elif estado == 'pendiente':
+        instance._soltar_retencion()
+
+
+@receiver(post_delete, sender=Pasajero)
+def descontar_pasajero(sender, instance, **kwargs):
+    ResumenReporte.ajustar('pasajero', '', instance.fecha_registro, -1)
+
+
+def invalidar_cache_publica(sender, **kwargs):
+    grupo = GRUPOS_CACHE[sender]
+    transaction.on_commit(lambda: incrementar_version(grupo))
+
+
+for modelo in GRUPOS_CACHE:
+    post_save.connect(invalidar_cache_publica, sender=modelo, dispatch_uid=f'cache_publica_save_{modelo.__name__}')
+    post_delete.connect(invalidar_cache_publica, sender=modelo, dispatch_uid=f'cache_publica_delete_{modelo.__name__}')
@@ -0,0 +1,523 @@
+"""
+Tests de gestion_vuelos.
+
+    python manage.py test gestion_vuelos.tests
+    python manage.py test gestion_vuelos.tests --settings=aerolinea_project.settings_test
+
+Los de la réplica necesitan el alias 'replica' en otro archivo SQLite (la
+segunda forma); sin él se saltean. Cada uno copia el primario sobre la
+réplica y después escribe solo en el primario; lo que se lea de la réplica
+no ve esas filas.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import embarque, ocupacion
+from .cache_paginas import versiones
+from .models import AsientoVuelo, Avion, Boleto, Paquete, Pasajero, Reserva, ResumenReporte, Vuelo
+from .replicas import ALIAS_REPLICA, CLAVE_SESION, hay_replica, solo_primario
+from .services import (
+    TTL_RETENCION, AsientoOcupado, RetencionVencida, confirmar_reservas, emitir_boletos, liberar_retenciones_vencidas,
+    pasajero_para_usuario, reservar_asiento, retener_asientos,
+)
+
+
+def crear_vuelo(codigo='TS001', filas=4, columnas=4, dias=10):
+    avion = Avion(modelo='Test 320', filas=filas, columnas=columnas)
+    avion.save()
+    salida = timezone.now() + timedelta(days=dias)
+    vuelo = Vuelo(
+        avion=avion, origen='Buenos Aires', destino='Córdoba',
+        fecha_salida=salida, fecha_llegada=salida + timedelta(hours=2),
+        precio_base=Decimal('100.00'), codigo_vuelo=codigo,
+    )
+    vuelo.save()
+    return vuelo
+
+
+def crear_pasajero(nombre, email, documento):
+    return Pasajero.objects.create(
+        nombre=nombre, email=email, documento=documento, telefono='123',
+        fecha_nacimiento=timezone.localdate() - timedelta(days=10000),
+    )
+
+
+def crear_reserva(vuelo, pasajero, asiento, estado='confirmada'):
+    reserva = Reserva(vuelo=vuelo, pasajero=pasajero, asiento=asiento, estado=estado, precio=Decimal('100.00'))
+    reserva.save()
+    return reserva
+
+
+def asientos_de(vuelo):
+    return list(vuelo.avion.asientos.order_by('fila', 'columna'))
+
+
+class AccesoReporteVueloTests(TestCase):
+    def setUp(self):
+        self.vuelo = crear_vuelo()
+        pasajero = crear_pasajero('Ana Reporte', 'ana@reporte.test', 'DOC-REPORTE')
+        self.reserva = crear_reserva(self.vuelo, pasajero, asientos_de(self.vuelo)[0])
+        self.url = reverse('gestion_vuelos:reporte_vuelo', args=[self.vuelo.id])
+
+    def test_anonimo_va_al_login(self):
+        respuesta = self.client.get(self.url)
+        self.assertRedirects(respuesta, f'/login/?next={self.url}', fetch_redirect_response=False)
+
+    def test_cliente_no_ve_los_pasajeros(self):
+        self.client.force_login(User.objects.create_user('cliente_reporte', 'otro@reporte.test', 'clave'))
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertNotIn(b'DOC-REPORTE', respuesta.content)
+
+    def test_admin_ve_los_pasajeros(self):
+        self.client.force_login(User.objects.create_superuser('admin_reporte', 'admin@reporte.test', 'clave'))
+        with solo_primario():
+            respuesta = self.client.get(self.url)
+        self.assertContains(respuesta, 'DOC-REPORTE')
+        self.assertContains(respuesta, self.reserva.codigo_reserva)
+
+
+class ConfirmarReservaTests(TestCase):
+    def setUp(self):
+        self.vuelo = crear_vuelo()
+        self.titular = User.objects.create_user('titular', 'titular@reservas.test', 'clave')
+        pasajero = pasajero_para_usuario(self.titular)
+        self.retenida, = retener_asientos(self.vuelo, pasajero, [asientos_de(self.vuelo)[0].id])
+        self.url = reverse('gestion_vuelos:confirmar_reserva', args=[self.retenida.id])
+
+    def test_otro_usuario_no_confirma_la_retencion_ajena(self):
+        self.client.force_login(User.objects.create_user('ajeno', 'ajeno@reservas.test', 'clave'))
+        respuesta = self.client.post(self.url)
+        self.assertEqual(respuesta.status_code, 404)
+        self.retenida.refresh_from_db()
+        self.assertEqual(self.retenida.estado, 'pendiente')
+
+    def test_el_titular_confirma(self):
+        self.client.force_login(self.titular)
+        self.client.post(self.url)
+        self.retenida.refresh_from_db()
+        self.assertEqual(self.retenida.estado, 'confirmada')
+
+
+class ResumenReporteTests(TestCase):
+    def setUp(self):
+        self.vuelo = crear_vuelo()
+        self.pasajero = crear_pasajero('Ana Resumen', 'ana@resumen.test', 'DOC-RESUMEN')
+
+    def cantidad(self, entidad, estado, momento):
+        fila = ResumenReporte.objects.filter(entidad=entidad, estado=estado, fecha=ResumenReporte.dia(momento)).first()
+        return fila.cantidad if fila else 0
+
+    def total(self, entidad, estado):
+        return dict(((e, s), t) for e, s, t in ResumenReporte.totales()).get((entidad, estado), 0)
+
+    def test_reserva_cuenta_en_su_dia_y_cambia_de_estado(self):
+        antes = self.total('reserva', 'confirmada')
+        reserva = crear_reserva(self.vuelo, self.pasajero, asientos_de(self.vuelo)[0])
+        dia = reserva.fecha_reserva
+        confirmadas = self.cantidad('reserva', 'confirmada', dia)
+        self.assertEqual(self.total('reserva', 'confirmada'), antes + 1)
+
+        reserva.estado = 'cancelada'
+        reserva.save()
+        self.assertEqual(self.cantidad('reserva', 'confirmada', dia), confirmadas - 1)
+        self.assertEqual(self.cantidad('reserva', 'cancelada', dia), 1)
+
+        reserva.delete()
+        self.assertEqual(self.cantidad('reserva', 'cancelada', dia), 0)
+        self.assertEqual(self.total('reserva', 'confirmada'), antes)
+
+    def test_vuelo_reprogramado_cambia_de_dia(self):
+        salida, nueva = self.vuelo.fecha_salida, self.vuelo.fecha_salida + timedelta(days=3)
+        en_salida, en_nueva = self.cantidad('vuelo', 'programado', salida), self.cantidad('vuelo', 'programado', nueva)
+        self.vuelo.fecha_salida, self.vuelo.fecha_llegada = nueva, nueva + timedelta(hours=2)
+        self.vuelo.save()
+        self.assertEqual(self.cantidad('vuelo', 'programado', salida), en_salida - 1)
+        self.assertEqual(self.cantidad('vuelo', 'programado', nueva), en_nueva + 1)
+
+    def test_pasajero_nuevo_suma_en_el_dia_de_registro(self):
+        registrados = self.cantidad('pasajero', '', self.pasajero.fecha_registro)
+        total = self.total('pasajero', '')
+        crear_pasajero('Beto Resumen', 'beto@resumen.test', 'DOC-RESUMEN-2')
+        self.assertEqual(self.cantidad('pasajero', '', self.pasajero.fecha_registro), registrados + 1)
+        self.assertEqual(self.total('pasajero', ''), total + 1)
+
+    def test_coincide_con_la_reconstruccion(self):
+        crear_reserva(self.vuelo, self.pasajero, asientos_de(self.vuelo)[0])
+        salida = StringIO()
+        call_command('reconstruir_resumenes', dry_run=True, stdout=salida)
+        self.assertIn('al día', salida.getvalue())
+
+
+class CachePaginasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('gestion_vuelos:lista_paquetes')
+
+    def crear_paquete(self, titulo):
+        return Paquete.objects.create(
+            titulo=titulo, destino='Bariloche', descripcion='-', precio_desde=Decimal('500.00'), incluye='-',
+        )
+
+    def test_la_version_sube_al_confirmarse_el_cambio(self):
+        antes = versiones('paquetes')
+        with self.captureOnCommitCallbacks() as pendientes:
+            self.crear_paquete('Paquete sin confirmar')
+        # Hasta el commit (o para siempre, si hay rollback) la versión no cambia
+        self.assertEqual(versiones('paquetes'), antes)
+        for callback in pendientes:
+            callback()
+        self.assertNotEqual(versiones('paquetes'), antes)
+
+    def test_cada_modelo_sube_su_grupo(self):
+        antes = {grupo: versiones(grupo) for grupo in ('vuelos', 'reservas', 'paquetes')}
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_vuelo()
+        self.assertNotEqual(versiones('vuelos'), antes['vuelos'])
+        self.assertEqual(versiones('reservas'), antes['reservas'])
+        self.assertEqual(versiones('paquetes'), antes['paquetes'])
+
+    def test_la_pagina_cacheada_se_renueva_despues_del_commit(self):
+        self.assertNotContains(self.client.get(self.url), 'Paquete nuevo')
+        with self.captureOnCommitCallbacks() as pendientes:
+            self.crear_paquete('Paquete nuevo')
+        self.assertNotContains(self.client.get(self.url), 'Paquete nuevo')
+        for callback in pendientes:
+            callback()
+        self.assertContains(self.client.get(self.url), 'Paquete nuevo')
+
+
+class ApiAsientosTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vuelo = crear_vuelo()
+        self.asientos = asientos_de(self.vuelo)
+        self.pasajero = crear_pasajero('Ana Api', 'ana@api.test', 'DOC-API')
+        self.url = reverse('gestion_vuelos:api_asientos_vuelo', args=[self.vuelo.id])
+
+    def test_sin_cambios_responde_304(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_una_reserva_confirmada_cambia_el_etag(self):
+        respuesta = self.client.get(self.url)
+        etag = respuesta['ETag']
+        self.assertEqual(respuesta.json()['filas'][0], 'LLLL')
+        with self.captureOnCommitCallbacks(execute=True):
+            reservar_asiento(self.vuelo, self.pasajero, self.asientos[0].id)
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+        self.assertEqual(respuesta.json()['filas'][0], 'OLLL')
+
+    def test_una_retencion_cambia_el_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            retener_asientos(self.vuelo, self.pasajero, [self.asientos[1].id])
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['filas'][0], 'LOLL')
+
+
+class ContadorEInventarioTests(TestCase):
+    def setUp(self):
+        self.vuelo = crear_vuelo()
+        self.asientos = asientos_de(self.vuelo)
+        self.pasajero = crear_pasajero('Ana Contador', 'ana@contador.test', 'DOC-CONTADOR')
+
+    def vendidos(self):
+        self.vuelo.refresh_from_db(fields=['asientos_vendidos'])
+        return self.vuelo.asientos_vendidos
+
+    def inventario(self, asiento):
+        return AsientoVuelo.objects.get(vuelo=self.vuelo, asiento=asiento).estado
+
+    def test_reservar_y_cancelar(self):
+        reserva = reservar_asiento(self.vuelo, self.pasajero, self.asientos[0].id)
+        self.assertEqual(self.vendidos(), 1)
+        self.assertEqual(self.inventario(self.asientos[0]), 'reservado')
+
+        reserva.estado = 'cancelada'
+        reserva.save()
+        self.assertEqual(self.vendidos(), 0)
+        self.assertEqual(self.inventario(self.asientos[0]), 'disponible')
+
+    def test_un_asiento_tomado_no_se_vende_dos_veces(self):
+        reservar_asiento(self.vuelo, self.pasajero, self.asientos[0].id)
+        with self.assertRaises(AsientoOcupado):
+            reservar_asiento(self.vuelo, self.pasajero, self.asientos[0].id)
+        self.assertEqual(self.vendidos(), 1)
+        self.assertEqual(Reserva.objects.filter(vuelo=self.vuelo, asiento=self.asientos[0]).count(), 1)
+
+    def test_crear_reserva_con_asiento_tomado_avisa_sin_error(self):
+        reservar_asiento(self.vuelo, self.pasajero, self.asientos[0].id)
+        self.client.force_login(User.objects.create_user('tarde', 'tarde@contador.test', 'clave'))
+        url = reverse('gestion_vuelos:crear_reserva', args=[self.vuelo.id])
+        respuesta = self.client.post(url, {'asiento_id': [self.asientos[0].id]})
+        self.assertRedirects(respuesta, url, fetch_redirect_response=False)
+        self.assertEqual(self.vendidos(), 1)
+
+    def test_borrados_sueltos_por_queryset_y_en_cascada(self):
+        primera, segunda, _ = (
+            reservar_asiento(self.vuelo, self.pasajero, asiento.id) for asiento in self.asientos[:3]
+        )
+        primera.delete()
+        self.assertEqual(self.vendidos(), 2)
+        Reserva.objects.filter(id=segunda.id).delete()
+        self.assertEqual(self.vendidos(), 1)
+        self.pasajero.delete()
+        self.assertEqual(self.vendidos(), 0)
+        self.assertFalse(AsientoVuelo.objects.filter(vuelo=self.vuelo).exclude(estado='disponible').exists())
+
+
+class RetencionesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vuelo = crear_vuelo()
+        self.asientos = asientos_de(self.vuelo)
+        self.pasajero = crear_pasajero('Ana Retencion', 'ana@retencion.test', 'DOC-RETENCION')
+        self.despues = timezone.now() + TTL_RETENCION + timedelta(minutes=1)
+
+    def inventario(self):
+        return dict(
+            AsientoVuelo.objects.filter(vuelo=self.vuelo, asiento__in=self.asientos[:2])
+            .values_list('asiento_id', 'estado')
+        )
+
+    def test_retener_no_vende(self):
+        retener_asientos(self.vuelo, self.pasajero, [self.asientos[0].id])
+        self.vuelo.refresh_from_db()
+        self.assertEqual(self.vuelo.asientos_vendidos, 0)
+        self.assertEqual(self.inventario()[self.asientos[0].id], 'retenido')
+
+    def test_el_barrido_cancela_el_grupo_vencido_y_libera_sus_asientos(self):
+        grupo = retener_asientos(self.vuelo, self.pasajero, [asiento.id for asiento in self.asientos[:2]])
+        dia = grupo[0].fecha_reserva
+        pendientes = ResumenReporte.objects.get(entidad='reserva', estado='pendiente', fecha=ResumenReporte.dia(dia))
+
+        self.assertEqual(liberar_retenciones_vencidas(), (0, 0))
+        self.assertEqual(liberar_retenciones_vencidas(ahora=self.despues), (2, 2))
+        self.assertEqual(set(self.inventario().values()), {'disponible'})
+        self.assertEqual(
+            set(Reserva.objects.filter(id__in=[r.id for r in grupo]).values_list('estado', flat=True)), {'cancelada'}
+        )
+        pendientes.refresh_from_db()
+        self.assertEqual(pendientes.cantidad, 0)
+
+    def test_no_se_confirma_una_retencion_vencida(self):
+        reserva, = retener_asientos(self.vuelo, self.pasajero, [self.asientos[0].id])
+        reserva.vence = timezone.now() - timedelta(seconds=1)
+        with self.assertRaises(RetencionVencida):
+            confirmar_reservas([reserva])
+
+    def test_otro_comprador_toma_un_asiento_con_la_retencion_vencida(self):
+        retener_asientos(self.vuelo, self.pasajero, [self.asientos[0].id])
+        AsientoVuelo.objects.filter(vuelo=self.vuelo, asiento=self.asientos[0]).update(
+            retenido_hasta=timezone.now() - timedelta(seconds=1)
+        )
+        otro = crear_pasajero('Beto Retencion', 'beto@retencion.test', 'DOC-RETENCION-2')
+        reservar_asiento(self.vuelo, otro, self.asientos[0].id)
+        self.assertEqual(self.inventario()[self.asientos[0].id], 'reservado')
+
+
+class EmisionBoletosTests(TestCase):
+    def setUp(self):
+        self.vuelo = crear_vuelo()
+        asientos = asientos_de(self.vuelo)
+        pasajero = crear_pasajero('Ana Boletos', 'ana@boletos.test', 'DOC-BOLETOS')
+        self.confirmada = crear_reserva(self.vuelo, pasajero, asientos[0])
+        self.pagada = crear_reserva(self.vuelo, pasajero, asientos[1], estado='pagada')
+        crear_reserva(self.vuelo, pasajero, asientos[2], estado='cancelada')
+        retener_asientos(self.vuelo, pasajero, [asientos[3].id])
+
+    def test_emite_solo_para_reservas_activas_y_una_vez(self):
+        self.assertEqual(emitir_boletos([self.vuelo.id]), 2)
+        boletos = Boleto.objects.filter(reserva__vuelo=self.vuelo)
+        self.assertEqual({boleto.reserva_id for boleto in boletos}, {self.confirmada.id, self.pagada.id})
+        self.assertEqual(len({boleto.codigo_barra for boleto in boletos}), 2)
+        self.assertEqual(emitir_boletos([self.vuelo.id]), 0)
+
+    def test_el_comando_rechaza_vuelos_inexistentes(self):
+        with self.assertRaises(CommandError):
+            call_command('emitir_boletos', self.vuelo.codigo_vuelo, 'NO-EXISTE', stdout=StringIO())
+        self.assertFalse(Boleto.objects.filter(reserva__vuelo=self.vuelo).exists())
+        call_command('emitir_boletos', self.vuelo.codigo_vuelo, stdout=StringIO())
+        self.assertEqual(Boleto.objects.filter(reserva__vuelo=self.vuelo).count(), 2)
+
+
+class EmbarqueTests(TestCase):
+    def setUp(self):
+        self.vuelo = crear_vuelo()
+        asientos = asientos_de(self.vuelo)
+        pasajero = crear_pasajero('Ana Embarque', 'ana@embarque.test', 'DOC-EMBARQUE')
+        for asiento in asientos[:2]:
+            crear_reserva(self.vuelo, pasajero, asiento)
+        emitir_boletos([self.vuelo.id])
+        self.primero, self.segundo = Boleto.objects.filter(reserva__vuelo=self.vuelo).order_by('id')
+        self.url = reverse('gestion_vuelos:api_escanear_boleto')
+        self.client.force_login(User.objects.create_superuser('admin_embarque', 'admin@embarque.test', 'clave'))
+
+    def escanear(self, codigo, vuelo_id=None):
+        return self.client.post(
+            self.url, {'codigo': codigo, 'vuelo': vuelo_id or self.vuelo.id}, content_type='application/json'
+        )
+
+    def test_el_segundo_escaneo_es_duplicado(self):
+        respuesta = self.escanear(self.primero.codigo_barra)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['resultado'], 'valido')
+        respuesta = self.escanear(self.primero.codigo_barra)
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json()['resultado'], 'duplicado')
+        self.primero.refresh_from_db()
+        self.assertEqual(self.primero.estado, 'usado')
+
+    def test_codigo_desconocido_y_de_otro_vuelo(self):
+        self.assertEqual(self.escanear('NO-EXISTE').status_code, 404)
+        otro = crear_vuelo(codigo='TS002')
+        respuesta = self.escanear(self.primero.codigo_barra, otro.id)
+        self.assertEqual(respuesta.json()['resultado'], 'otro_vuelo')
+        self.primero.refresh_from_db()
+        self.assertEqual(self.primero.estado, 'emitido')
+
+    def test_solo_el_personal_escanea(self):
+        self.client.force_login(User.objects.create_user('pasajero_embarque', 'p@embarque.test', 'clave'))
+        self.assertEqual(self.escanear(self.primero.codigo_barra).status_code, 403)
+
+    def test_sincronizar_marca_repetidos_como_duplicados(self):
+        codigos = [self.primero.codigo_barra, self.primero.codigo_barra, self.segundo.codigo_barra]
+        resultados = [escaneo.resultado for escaneo in embarque.sincronizar(codigos, self.vuelo.id)]
+        self.assertEqual(resultados, ['valido', 'duplicado', 'valido'])
+        self.assertEqual(embarque.escanear(self.segundo.codigo_barra, self.vuelo.id).resultado, 'duplicado')
+
+
+class MapaOcupacionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vuelo = crear_vuelo()
+        self.asientos = asientos_de(self.vuelo)
+        self.pasajero = crear_pasajero('Ana Mapa', 'ana@mapa.test', 'DOC-MAPA')
+
+    def ocupados(self):
+        vuelo = Vuelo.objects.select_related('avion').get(id=self.vuelo.id)
+        return {
+            asiento['asiento'].numero
+            for fila in ocupacion.mapa_de_vuelo(vuelo).filas_asientos() for asiento in fila['asientos']
+            if asiento['ocupado']
+        }
+
+    def test_el_mapa_cacheado_sigue_retenciones_reservas_y_cancelaciones(self):
+        primero, segundo = self.asientos[0], self.asientos[1]
+        self.assertEqual(self.ocupados(), set())
+        with self.captureOnCommitCallbacks(execute=True):
+            retener_asientos(self.vuelo, self.pasajero, [primero.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva = crear_reserva(self.vuelo, self.pasajero, segundo)
+        self.assertEqual(self.ocupados(), {primero.numero, segundo.numero})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.estado = 'cancelada'
+            reserva.save()
+        self.assertEqual(self.ocupados(), {primero.numero})
+
+    def test_borrar_una_reserva_libera_el_asiento(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva = crear_reserva(self.vuelo, self.pasajero, self.asientos[0])
+        self.assertEqual(self.ocupados(), {self.asientos[0].numero})
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.delete()
+        self.assertEqual(self.ocupados(), set())
+
+    def test_una_reconstruccion_vieja_no_pisa_una_retencion(self):
+        # Un lector arma el mapa con la versión de antes de la retención y lo
+        # guarda después de que la retención se confirmó
+        version = versiones(f'asientos:{self.vuelo.id}')
+        vieja = ocupacion._construir_ocupacion([], 4, 4, version)
+        with self.captureOnCommitCallbacks(execute=True):
+            retener_asientos(self.vuelo, self.pasajero, [self.asientos[0].id])
+        cache.set(ocupacion._clave_ocupacion(self.vuelo.id), vieja)
+        self.assertEqual(self.ocupados(), {self.asientos[0].numero})
+
+
+@skipUnless(hay_replica(), "Correr con --settings=aerolinea_project.settings_test")
+class LecturasEnReplicaTests(TransactionTestCase):
+    # Sin réplica la clase se saltea, pero el runner igual revisa los alias que declara
+    databases = {'default', ALIAS_REPLICA} if hay_replica() else {'default'}
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin_replica', 'admin@replica.test', 'clave')
+        self.cliente = User.objects.create_user('cliente_replica', 'cliente@replica.test', 'clave')
+        self.vuelo = crear_vuelo()
+        self.asientos = asientos_de(self.vuelo)
+        self.pasajero = crear_pasajero('Ana Copiada', 'cliente@replica.test', 'R1000')
+        self.copiada = crear_reserva(self.vuelo, self.pasajero, self.asientos[0])
+        call_command('sincronizar_replica', stdout=StringIO())
+
+        # Esto queda solo en el primario
+        self.nuevo = crear_pasajero('Beto Nuevo', 'beto@replica.test', 'R2000')
+        self.nueva = crear_reserva(self.vuelo, self.pasajero, self.asientos[1])
+
+    def _total_primario(self, entidad):
+        return ResumenReporte.objects.using('default').filter(
+            entidad=entidad
+        ).aggregate(total=Sum('cantidad'))['total']
+
+    def test_reportes_leen_de_replica(self):
+        self.client.force_login(self.admin)
+        respuesta = self.client.get(reverse('gestion_vuelos:reporte_vuelo', args=[self.vuelo.id]))
+        self.assertEqual(respuesta.context['total_pasajeros'], 1)
+        # El resumen del primario ya cuenta al pasajero y la reserva nuevos
+        respuesta = self.client.get(reverse('gestion_vuelos:reportes'))
+        self.assertEqual(respuesta.context['total_pasajeros'], self._total_primario('pasajero') - 1)
+        self.assertEqual(respuesta.context['total_reservas'], self._total_primario('reserva') - 1)
+
+    def test_listado_de_admin_lee_de_replica(self):
+        self.client.force_login(self.admin)
+        respuesta = self.client.get(reverse('gestion_vuelos:lista_pasajeros'), {'q': 'replica.test'})
+        nombres = [pasajero.nombre for pasajero in respuesta.context['page_obj']]
+        self.assertEqual(nombres, ['Ana Copiada'])
+
+    def test_exportacion_lee_de_replica(self):
+        self.client.force_login(self.admin)
+        respuesta = self.client.get(
+            reverse('gestion_vuelos:exportar_datos', args=['reservas', 'csv'])
+        )
+        contenido = b''.join(respuesta.streaming_content).decode()
+        self.assertIn(self.copiada.codigo_reserva, contenido)
+        self.assertNotIn(self.nueva.codigo_reserva, contenido)
+
+    def test_escrituras_van_al_primario(self):
+        self.client.force_login(self.cliente)
+        respuesta = self.client.post(
+            reverse('gestion_vuelos:crear_reserva', args=[self.vuelo.id]),
+            {'asiento_id': [self.asientos[2].id]},
+        )
+        self.assertEqual(respuesta.status_code, 302)
+        filtro = {'pasajero': self.pasajero.id, 'asiento': self.asientos[2].id}
+        self.assertTrue(Reserva.objects.using('default').filter(**filtro).exists())
+        self.assertFalse(Reserva.objects.using(ALIAS_REPLICA).filter(**filtro).exists())
+
+    def test_mis_reservas_lee_del_primario_despues_de_reservar(self):
+        self.client.force_login(self.cliente)
+        url = reverse('gestion_vuelos:mis_reservas')
+        codigos = {reserva.codigo_reserva for reserva in self.client.get(url).context['page_obj']}
+        self.assertEqual(codigos, {self.copiada.codigo_reserva})
+
+        self.client.post(
+            reverse('gestion_vuelos:crear_reserva', args=[self.vuelo.id]),
+            {'asiento_id': [self.asientos[2].id]},
+        )
+        self.assertIn(CLAVE_SESION, self.client.session)
+        codigos = {reserva.codigo_reserva for reserva in self.client.get(url).context['page_obj']}
+        self.assertEqual(len(codigos), 3)
+        self.assertIn(self.nueva.codigo_reserva, codigos)
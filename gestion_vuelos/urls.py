@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 from django.contrib.auth import views as auth_views
 from . import views
 
@@ -12,14 +12,27 @@ urlpatterns = [
     path('vuelos/', views.lista_vuelos, name='lista_vuelos'),
     path('vuelos/<int:vuelo_id>/', views.detalle_vuelo, name='detalle_vuelo'),
     path('buscar-vuelos/', views.buscar_vuelos, name='buscar_vuelos'),
+    path('metrics', views.exponer_metricas, name='metricas'),
+    path('api/lugares/', views.autocompletar_lugares, name='autocompletar_lugares'),
+    path('api/vuelos/', views.api_buscar_vuelos, name='api_buscar_vuelos'),
+    path('api/vuelos/<int:vuelo_id>/', views.api_detalle_vuelo, name='api_detalle_vuelo'),
+    path('api/vuelos/<int:vuelo_id>/asientos/', views.api_asientos_vuelo, name='api_asientos_vuelo'),
+    path('api/vuelos/<int:vuelo_id>/embarque/', views.api_manifiesto_embarque, name='api_manifiesto_embarque'),
+    path('api/embarque/escanear/', views.api_escanear_boleto, name='api_escanear_boleto'),
+    path('api/embarque/sincronizar/', views.api_sincronizar_embarque, name='api_sincronizar_embarque'),
     path('reservar/<int:vuelo_id>/', views.crear_reserva, name='crear_reserva'),
     path('mis-reservas/', views.mis_reservas, name='mis_reservas'),
     path('reserva/<int:reserva_id>/', views.detalle_reserva, name='detalle_reserva'),
+    path('confirmar-reserva/<int:reserva_id>/', views.confirmar_reserva, name='confirmar_reserva'),
     path('cancelar-reserva/<int:reserva_id>/', views.cancelar_reserva, name='cancelar_reserva'),
     path('pasajeros/', views.lista_pasajeros, name='lista_pasajeros'),
     path('reportes/', views.reportes, name='reportes'),
+    path('reportes/sql/', views.diagnostico_sql, name='diagnostico_sql'),
     path('reporte-vuelo/<int:vuelo_id>/', views.reporte_vuelo, name='reporte_vuelo'),
+    re_path(r'^reporte-vuelo/(?P<vuelo_id>\d+)/manifiesto\.(?P<formato>csv|pdf)$', views.manifiesto_vuelo, name='manifiesto_vuelo'),
+    re_path(r'^exportar/(?P<entidad>reservas|pasajeros|vuelos)\.(?P<formato>csv|jsonl)$', views.exportar_datos, name='exportar_datos'),
     path('boleto/<int:boleto_id>/', views.ver_boleto, name='ver_boleto'),
+    re_path(r'^boleto/(?P<boleto_id>\d+)/pase\.(?P<formato>pdf|png)$', views.pase_abordar, name='pase_abordar'),
     path('generar-boleto/<int:reserva_id>/', views.generar_boleto, name='generar_boleto'),
     path('paquetes/', views.lista_paquetes, name='lista_paquetes'),
 ]
@@ -2,43 +2,78 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import login
 from django.contrib import messages
-from django.db.models import Q, Count
-from django.http import JsonResponse
-from django.core.paginator import Paginator
+from django.db.models import Q, Count, Sum
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse,
+    StreamingHttpResponse,
+)
 from django.contrib.auth.forms import UserCreationForm
 from django.utils import timezone
-from datetime import timedelta
-from .models import Vuelo, Pasajero, Reserva, Asiento, Boleto, Avion, PerfilUsuario, Paquete
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import require_GET, require_POST
+from datetime import datetime, time, timedelta
+from functools import wraps
+import hashlib
+import json
+from .models import Vuelo, Pasajero, Reserva, Asiento, Boleto, Avion, PerfilUsuario, Paquete, Aeropuerto, ResumenReporte, LETRAS_COLUMNA
 from .forms import PasajeroForm, ReservaForm, BusquedaVueloForm
-
-
-def es_admin(user):
-    """Es admin si tiene perfil admin o es staff/superuser."""
-    if not user.is_authenticated:
-        return False
-    try:
-        return getattr(user, 'perfil', None) and user.perfil.rol == 'admin' or user.is_staff or user.is_superuser
-    except PerfilUsuario.DoesNotExist:
-        return user.is_staff or user.is_superuser
-
-
+from . import embarque, instrumentacion, metricas
+from .cache_paginas import acontexto_tarjetas, cache_pagina_publica, contexto_tarjetas, versiones
+from .exportacion import ExportacionError, exportar, leer_fecha
+from .manifiesto import csv_manifiesto, pdf_manifiesto
+from .ocupacion import amapa_de_vuelo, mapa_de_vuelo
+from .paginacion import KeysetPaginator, apaginar, paginar
+from .pases import FORMATOS as FORMATOS_PASE, pase
+from .replicas import lee_de_replica
+from .roles import ausuario, es_admin
+from .services import (
+    MAXIMO_ASIENTOS_GRUPO, TTL_RETENCION, AsientoOcupado, ReservaError, confirmar_reservas, email_de_pasajero,
+    pasajero_para_usuario, retener_asientos,
+)
+
+
+def rango_del_dia(fecha):
+    """
+    Inicio y fin del día en la zona horaria actual. Filtrar por rango en vez
+    de `fecha_salida__date` permite usar los índices sobre fecha_salida.
+    """
+    inicio = timezone.make_aware(datetime.combine(fecha, time.min))
+    return inicio, inicio + timedelta(days=1) - timedelta(microseconds=1)
+
+
+def vuelos_buscados(filtros):
+    """Vuelos programados futuros según los datos limpios de un BusquedaVueloForm"""
+    vuelos = Vuelo.objects.filter(fecha_salida__gte=timezone.now(), estado='programado').select_related('avion')
+    if filtros.get('origen'):
+        vuelos = vuelos.filter(aeropuerto_origen__in=Aeropuerto.buscar(filtros['origen']))
+    if filtros.get('destino'):
+        vuelos = vuelos.filter(aeropuerto_destino__in=Aeropuerto.buscar(filtros['destino']))
+    if filtros.get('fecha_salida'):
+        vuelos = vuelos.filter(fecha_salida__range=rango_del_dia(filtros['fecha_salida']))
+    return vuelos
+
+
+@cache_pagina_publica('vuelos', 'reservas')
 def home(request):
     """Página principal: simple para público/cliente, completa para admin"""
-    if request.user.is_authenticated and es_admin(request.user):
+    if es_admin(request.user):
         total_vuelos = Vuelo.objects.count()
-        vuelos_hoy = Vuelo.objects.filter(fecha_salida__date=timezone.now().date()).count()
+        vuelos_hoy = Vuelo.objects.filter(fecha_salida__range=rango_del_dia(timezone.localdate())).count()
         total_pasajeros = Pasajero.objects.count()
-        reservas_activas = Reserva.objects.filter(estado__in=['confirmada', 'pagada']).count()
+        reservas_activas = Reserva.objects.filter(estado__in=Reserva.ESTADOS_ACTIVOS).count()
         proximos_vuelos = Vuelo.objects.filter(
             fecha_salida__gte=timezone.now()
-        ).order_by('fecha_salida')[:10]
+        ).select_related('avion').order_by('fecha_salida')[:10]
     else:
         total_vuelos = Vuelo.objects.filter(
             fecha_salida__gte=timezone.now(),
             estado='programado'
         ).count()
         vuelos_hoy = Vuelo.objects.filter(
-            fecha_salida__date=timezone.now().date(),
+            fecha_salida__range=rango_del_dia(timezone.localdate()),
             estado='programado'
         ).count()
         total_pasajeros = None
@@ -46,7 +81,7 @@ def home(request):
         proximos_vuelos = Vuelo.objects.filter(
             fecha_salida__gte=timezone.now(),
             estado='programado'
-        ).order_by('fecha_salida')[:10]
+        ).select_related('avion').order_by('fecha_salida')[:10]
     
     context = {
         'total_vuelos': total_vuelos,
@@ -54,7 +89,8 @@ def home(request):
         'total_pasajeros': total_pasajeros,
         'reservas_activas': reservas_activas,
         'proximos_vuelos': proximos_vuelos,
-        'es_admin': request.user.is_authenticated and es_admin(request.user),
+        'es_admin': es_admin(request.user),
+        **contexto_tarjetas(),
     }
     return render(request, 'gestion_vuelos/home.html', context)
 
@@ -74,81 +110,286 @@ def registro(request):
     return render(request, 'registration/registro.html', {'form': form})
 
 
-def lista_vuelos(request):
+# Vistas async (ver aerolinea_project/asgi.py): la navegación de vuelos es
+# lo que más concurrencia recibe. Resuelven el usuario con ausuario() y
+# cargan todo con el ORM async antes de render(), que no debe consultar la base.
+
+@cache_pagina_publica('vuelos', 'reservas')
+async def lista_vuelos(request):
     """Lista todos los vuelos (público: programados futuros)"""
-    if request.user.is_authenticated and es_admin(request.user):
-        vuelos = Vuelo.objects.all().order_by('fecha_salida')
+    usuario = await ausuario(request)
+    if es_admin(usuario):
+        vuelos = Vuelo.objects.select_related('avion')
     else:
         vuelos = Vuelo.objects.filter(
             fecha_salida__gte=timezone.now(),
             estado='programado'
-        ).order_by('fecha_salida')
-    paginator = Paginator(vuelos, 10)
-    page_obj = paginator.get_page(request.GET.get('page'))
+        ).select_related('avion')
+    page_obj = await apaginar(request, vuelos, 10, ('fecha_salida', 'id'))
     return render(request, 'gestion_vuelos/lista_vuelos.html', {
         'page_obj': page_obj,
-        'es_admin': request.user.is_authenticated and es_admin(request.user)
+        'es_admin': es_admin(usuario),
+        **await acontexto_tarjetas(),
     })
 
 
-def detalle_vuelo(request, vuelo_id):
+async def detalle_vuelo(request, vuelo_id):
     """Detalle con selector de butacas"""
-    vuelo = get_object_or_404(Vuelo, id=vuelo_id)
-    if not (request.user.is_authenticated and es_admin(request.user)) and vuelo.estado != 'programado':
+    usuario = await ausuario(request)
+    try:
+        vuelo = await Vuelo.objects.select_related('avion').aget(id=vuelo_id)
+    except Vuelo.DoesNotExist:
+        raise Http404('No existe el vuelo.')
+    if not es_admin(usuario) and vuelo.estado != 'programado':
         messages.error(request, 'No tienes permisos para ver este vuelo.')
         return redirect('gestion_vuelos:lista_vuelos')
     
-    asientos = vuelo.avion.asientos.all().order_by('fila', 'columna')
-    asientos_reservados = Reserva.objects.filter(
-        vuelo=vuelo,
-        estado__in=['confirmada', 'pagada']
-    ).values_list('asiento_id', flat=True)
-    
-    matriz = {}
-    for a in asientos:
-        matriz.setdefault(a.fila, {})
-        matriz[a.fila][a.columna] = {
-            'asiento': a,
-            'ocupado': a.id in asientos_reservados,
-            'disponible': a.estado == 'disponible' and a.id not in asientos_reservados
-        }
-    filas_ordenadas = []
-    for f in sorted(matriz.keys()):
-        cols = [matriz[f][c] for c in sorted(matriz[f].keys())]
-        filas_ordenadas.append({'numero': f, 'asientos': cols})
-    
+    mapa = await amapa_de_vuelo(vuelo)
     return render(request, 'gestion_vuelos/detalle_vuelo.html', {
         'vuelo': vuelo,
-        'filas_asientos': filas_ordenadas,
-        'puede_reservar': request.user.is_authenticated and vuelo.estado == 'programado',
-        'es_admin': request.user.is_authenticated and es_admin(request.user),
+        'filas_asientos': mapa.filas_asientos(),
+        'puede_reservar': usuario.is_authenticated and vuelo.estado == 'programado',
+        'es_admin': es_admin(usuario),
     })
 
 
-def buscar_vuelos(request):
+@cache_pagina_publica('vuelos', 'reservas')
+async def buscar_vuelos(request):
     """Búsqueda simple con filtros"""
+    await ausuario(request)
     form = BusquedaVueloForm(request.GET or None)
-    vuelos = Vuelo.objects.filter(fecha_salida__gte=timezone.now(), estado='programado')
-    if form.is_valid():
-        origen = form.cleaned_data.get('origen')
-        destino = form.cleaned_data.get('destino')
-        fecha_salida = form.cleaned_data.get('fecha_salida')
-        if origen:
-            vuelos = vuelos.filter(origen__icontains=origen)
-        if destino:
-            vuelos = vuelos.filter(destino__icontains=destino)
-        if fecha_salida:
-            vuelos = vuelos.filter(fecha_salida__date=fecha_salida)
-    vuelos = vuelos.order_by('fecha_salida')
-    paginator = Paginator(vuelos, 10)
-    page_obj = paginator.get_page(request.GET.get('page'))
-    return render(request, 'gestion_vuelos/buscar_vuelos.html', {'form': form, 'page_obj': page_obj})
+    vuelos = vuelos_buscados(form.cleaned_data if form.is_valid() else {})
+    page_obj = await apaginar(request, vuelos, 10, ('fecha_salida', 'id'))
+    return render(request, 'gestion_vuelos/buscar_vuelos.html', {
+        'form': form,
+        'page_obj': page_obj,
+        **await acontexto_tarjetas(),
+    })
+
+
+def autocompletar_lugares(request):
+    """Sugerencias de ciudades/aeropuertos para los campos de búsqueda (JSON)"""
+    aeropuertos = Aeropuerto.buscar(request.GET.get('q', '')).order_by('nombre_normalizado')
+    return JsonResponse({
+        'resultados': list(aeropuertos.values('nombre', 'codigo_iata')[:10]),
+    })
+
+
+def _vuelo_json(vuelo):
+    return {
+        'id': vuelo.id,
+        'codigo': vuelo.codigo_vuelo,
+        'origen': vuelo.origen,
+        'destino': vuelo.destino,
+        'salida': vuelo.fecha_salida.isoformat(),
+        'llegada': vuelo.fecha_llegada.isoformat(),
+        'estado': vuelo.estado,
+        'precio_base': str(vuelo.precio_base),
+        'asientos_disponibles': vuelo.asientos_disponibles,
+    }
+
+
+def _respuesta_condicional(request, etag, ultima_modificacion, construir):
+    """
+    Responde 304 si el cliente ya tiene la versión `etag`/`ultima_modificacion`;
+    si no, llama a `construir()`. El payload solo se arma cuando hace falta.
+    """
+    etag = quote_etag(etag)
+    marca = int(ultima_modificacion.timestamp()) if ultima_modificacion else None
+    respuesta = get_conditional_response(request, etag=etag, last_modified=marca) or construir()
+    respuesta['ETag'] = etag
+    if marca is not None:
+        respuesta['Last-Modified'] = http_date(marca)
+    # Se puede guardar, pero hay que revalidar en cada uso
+    respuesta['Cache-Control'] = 'no-cache'
+    return respuesta
+
+
+def _vuelo_visible(request, vuelo_id):
+    vuelos = Vuelo.objects.select_related('avion')
+    if not es_admin(request.user):
+        vuelos = vuelos.filter(estado='programado')
+    return get_object_or_404(vuelos, id=vuelo_id)
+
+
+@require_GET
+def api_buscar_vuelos(request):
+    """Búsqueda de vuelos (JSON), con los filtros de BusquedaVueloForm y cursor de paginación"""
+    form = BusquedaVueloForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errores': form.errors}, status=400)
+    # Los resultados cambian con cualquier vuelo o reserva, y con el paso del
+    # tiempo (los vuelos que salen dejan de listarse): bloques de 5 minutos
+    bloque = int(timezone.now().timestamp()) // 300
+    etag = hashlib.md5(
+        f"{versiones('vuelos', 'reservas')}:{bloque}:{request.GET.urlencode()}".encode()
+    ).hexdigest()
+
+    def construir():
+        pagina = KeysetPaginator(vuelos_buscados(form.cleaned_data), 20, ('fecha_salida', 'id')).get_page(
+            request.GET.get('cursor'), request.GET
+        )
+        return JsonResponse({
+            'resultados': [_vuelo_json(vuelo) for vuelo in pagina],
+            'siguiente': pagina.cursor_siguiente,
+            'anterior': pagina.cursor_anterior,
+        })
+    return _respuesta_condicional(request, etag, None, construir)
+
+
+@require_GET
+def api_detalle_vuelo(request, vuelo_id):
+    """Detalle de un vuelo (JSON)"""
+    vuelo = _vuelo_visible(request, vuelo_id)
+    etag = f'{vuelo.id}-{vuelo.actualizado.timestamp():.6f}-{vuelo.avion.capacidad}'
+
+    def construir():
+        datos = _vuelo_json(vuelo)
+        datos['duracion_minutos'] = int(vuelo.duracion.total_seconds() // 60) if vuelo.duracion else None
+        datos['avion'] = {
+            'modelo': vuelo.avion.modelo,
+            'filas': vuelo.avion.filas,
+            'columnas': vuelo.avion.columnas,
+            'capacidad': vuelo.avion.capacidad,
+        }
+        return JsonResponse(datos)
+    return _respuesta_condicional(request, etag, vuelo.actualizado, construir)
+
+
+@require_GET
+def api_asientos_vuelo(request, vuelo_id):
+    """
+    Disponibilidad compacta de asientos (JSON): una cadena por fila con
+    L libre, O ocupado, M mantenimiento y - sin asiento.
+    """
+    vuelo = _vuelo_visible(request, vuelo_id)
+    mapa = mapa_de_vuelo(vuelo)
+
+    def construir():
+        return JsonResponse({
+            'vuelo': vuelo.id,
+            'columnas': LETRAS_COLUMNA[:mapa.columnas],
+            'filas': mapa.filas_compactas(),
+            'disponibles': vuelo.asientos_disponibles,
+        })
+    return _respuesta_condicional(request, mapa.huella(), vuelo.actualizado, construir)
+
+
+def _api_admin(vista):
+    """Como user_passes_test(es_admin), pero responde 403 en JSON en lugar de redirigir"""
+    @wraps(vista)
+    def envuelta(request, *args, **kwargs):
+        if not es_admin(request.user):
+            return JsonResponse({'error': 'Acceso restringido al personal de la aerolínea.'}, status=403)
+        return vista(request, *args, **kwargs)
+    return envuelta
+
+
+def _datos_embarque(request):
+    """Parámetros de un escaneo: cuerpo JSON o formulario"""
+    if request.content_type == 'application/json':
+        try:
+            datos = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return datos if isinstance(datos, dict) else None
+    return {'codigo': request.POST.get('codigo'), 'codigos': request.POST.getlist('codigos'),
+            'vuelo': request.POST.get('vuelo')}
+
+
+def _vuelo_embarque(datos):
+    vuelo = datos.get('vuelo')
+    if vuelo in (None, ''):
+        return None
+    return int(vuelo)
+
+
+def _escaneo_json(escaneo):
+    return {
+        'codigo': escaneo.codigo,
+        'resultado': escaneo.resultado,
+        'asiento': escaneo.asiento,
+        'pasajero': escaneo.pasajero,
+        'usado': escaneo.usado.isoformat() if escaneo.usado else None,
+    }
+
+
+# Código HTTP de cada resultado de escaneo
+ESTADOS_HTTP_ESCANEO = {'valido': 200, 'desconocido': 404}
+
+
+@require_POST
+@_api_admin
+def api_escanear_boleto(request):
+    """
+    Escaneo en la puerta (JSON): {"codigo": ..., "vuelo": id opcional}.
+    Responde 200 si el boleto pasa a usado, 404 si no existe y 409 si ya se
+    usó, está cancelado o es de otro vuelo.
+    """
+    datos = _datos_embarque(request)
+    if not datos or not isinstance(datos.get('codigo'), str) or not datos['codigo']:
+        return JsonResponse({'error': 'Falta el código de barras.'}, status=400)
+    try:
+        vuelo_id = _vuelo_embarque(datos)
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Vuelo inválido.'}, status=400)
+    escaneo = embarque.escanear(datos['codigo'].strip(), vuelo_id)
+    return JsonResponse(_escaneo_json(escaneo), status=ESTADOS_HTTP_ESCANEO.get(escaneo.resultado, 409))
+
+
+@require_POST
+@_api_admin
+def api_sincronizar_embarque(request):
+    """
+    Escaneos acumulados sin conexión (JSON): {"vuelo": id, "codigos": [...]},
+    en el orden en que se leyeron. Devuelve el resultado de cada uno.
+    """
+    datos = _datos_embarque(request)
+    codigos = datos.get('codigos') if datos else None
+    if not isinstance(codigos, list) or not all(isinstance(codigo, str) for codigo in codigos):
+        return JsonResponse({'error': "Se esperaba una lista de códigos en 'codigos'."}, status=400)
+    try:
+        vuelo_id = _vuelo_embarque(datos)
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Vuelo inválido.'}, status=400)
+    try:
+        resultados = embarque.sincronizar([codigo.strip() for codigo in codigos], vuelo_id)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse({
+        'resultados': [_escaneo_json(escaneo) for escaneo in resultados],
+        'validos': sum(escaneo.resultado == 'valido' for escaneo in resultados),
+    })
+
+
+@require_GET
+@_api_admin
+@ensure_csrf_cookie
+def api_manifiesto_embarque(request, vuelo_id):
+    """
+    Manifiesto compacto de embarque (JSON) para validar sin conexión. Fija
+    la cookie CSRF que el lector necesita para sincronizar después.
+    """
+    vuelo = get_object_or_404(Vuelo, id=vuelo_id)
+    etag, ultima_modificacion = embarque.version_manifiesto(vuelo)
+
+    def construir():
+        return JsonResponse(embarque.manifiesto_embarque(vuelo))
+    return _respuesta_condicional(request, etag, ultima_modificacion, construir)
+
+
+@require_GET
+def exponer_metricas(request):
+    """Métricas del proceso en formato de texto de Prometheus (admin o red permitida)"""
+    if not (es_admin(request.user) or request.META.get('REMOTE_ADDR') in settings.METRICAS_IPS_PERMITIDAS):
+        return HttpResponseForbidden('Acceso restringido.')
+    return HttpResponse(metricas.exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 @login_required
 def crear_reserva(request, vuelo_id):
     """Crear reserva seleccionando asiento"""
-    vuelo = get_object_or_404(Vuelo, id=vuelo_id)
+    vuelo = get_object_or_404(Vuelo.objects.select_related('avion'), id=vuelo_id)
     if vuelo.estado != 'programado':
         messages.error(request, 'No se pueden hacer reservas en este vuelo.')
         return redirect('gestion_vuelos:detalle_vuelo', vuelo_id=vuelo.id)
@@ -157,74 +398,85 @@ def crear_reserva(request, vuelo_id):
         return redirect('gestion_vuelos:detalle_vuelo', vuelo_id=vuelo.id)
     
     if request.method == 'POST':
-        asiento_id = request.POST.get('asiento_id')
-        if asiento_id:
+        asiento_ids = request.POST.getlist('asiento_id')
+        if asiento_ids:
+            pasajero = pasajero_para_usuario(request.user)
             try:
-                asiento = Asiento.objects.get(id=asiento_id, avion=vuelo.avion)
-                # Ocupado?
-                if Reserva.objects.filter(vuelo=vuelo, asiento=asiento, estado__in=['confirmada', 'pagada']).exists():
-                    messages.error(request, 'Este asiento ya está reservado.')
-                    return redirect('gestion_vuelos:crear_reserva', vuelo_id=vuelo.id)
-                # Pasajero del user (si no existe lo creamos minimal)
-                pasajero, _ = Pasajero.objects.get_or_create(
-                    email=request.user.email or f"user{request.user.id}@example.com",
-                    defaults={
-                        'nombre': request.user.get_full_name() or request.user.username,
-                        'documento': f'USER_{request.user.id}',
-                        'tipo_documento': 'dni',
-                        'telefono': '',
-                        'fecha_nacimiento': timezone.now().date(),
-                    }
+                # Los asientos elegidos quedan retenidos hasta que se confirme la reserva
+                reservas = retener_asientos(vuelo, pasajero, asiento_ids)
+            except AsientoOcupado as e:
+                metricas.incrementar('aerolinea_conflictos_reserva_total')
+                messages.error(request, str(e))
+                return redirect('gestion_vuelos:crear_reserva', vuelo_id=vuelo.id)
+            except ReservaError as e:
+                messages.error(request, str(e))
+            else:
+                asientos = ', '.join(reserva.asiento.numero for reserva in reservas)
+                vence = timezone.localtime(reservas[0].vence)
+                messages.success(
+                    request,
+                    f'Asientos {asientos} retenidos hasta las {vence:%H:%M}. '
+                    'Confirmá la reserva antes de esa hora para no perderlos.'
                 )
-                reserva = Reserva.objects.create(
-                    vuelo=vuelo,
-                    pasajero=pasajero,
-                    asiento=asiento,
-                    precio=vuelo.precio_base,
-                    estado='confirmada'
-                )
-                messages.success(request, f'Reserva creada. Código: {reserva.codigo_reserva}')
-                return redirect('gestion_vuelos:detalle_reserva', reserva_id=reserva.id)
-            except Asiento.DoesNotExist:
-                messages.error(request, 'Asiento no válido.')
+                return redirect('gestion_vuelos:detalle_reserva', reserva_id=reservas[0].id)
         else:
             messages.error(request, 'Debe seleccionar un asiento.')
     
-    asientos = vuelo.avion.asientos.all().order_by('fila', 'columna')
-    asientos_reservados = Reserva.objects.filter(vuelo=vuelo, estado__in=['confirmada', 'pagada']).values_list('asiento_id', flat=True)
-    matriz = {}
-    for a in asientos:
-        matriz.setdefault(a.fila, {})
-        matriz[a.fila][a.columna] = {
-            'asiento': a,
-            'ocupado': a.id in asientos_reservados,
-            'disponible': a.estado == 'disponible' and a.id not in asientos_reservados
-        }
-    filas_ordenadas = []
-    for f in sorted(matriz.keys()):
-        cols = [matriz[f][c] for c in sorted(matriz[f].keys())]
-        filas_ordenadas.append({'numero': f, 'asientos': cols})
-    return render(request, 'gestion_vuelos/crear_reserva.html', {'vuelo': vuelo, 'filas_asientos': filas_ordenadas})
+    return render(request, 'gestion_vuelos/crear_reserva.html', {
+        'vuelo': vuelo,
+        'filas_asientos': mapa_de_vuelo(vuelo).filas_asientos(),
+        'maximo_asientos': MAXIMO_ASIENTOS_GRUPO,
+        'minutos_retencion': int(TTL_RETENCION.total_seconds() // 60),
+    })
 
 
 @login_required
+@lee_de_replica
 def mis_reservas(request):
     """Reservas del usuario (si tiene pasajero asociado por email)"""
     try:
         pasajero = Pasajero.objects.get(email=request.user.email)
-        reservas = pasajero.reservas.all().order_by('-fecha_reserva')
+        reservas = pasajero.reservas.select_related('vuelo', 'asiento', 'pasajero')
     except Pasajero.DoesNotExist:
         reservas = Reserva.objects.none()
         messages.info(request, 'No tienes reservas registradas aún.')
-    paginator = Paginator(reservas, 10)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj = paginar(request, reservas, 10, ('-fecha_reserva', 'id'))
     return render(request, 'gestion_vuelos/mis_reservas.html', {'page_obj': page_obj})
 
 
 def detalle_reserva(request, reserva_id):
     """Detalle de una reserva"""
     reserva = get_object_or_404(Reserva, id=reserva_id)
-    return render(request, 'gestion_vuelos/detalle_reserva.html', {'reserva': reserva})
+    return render(request, 'gestion_vuelos/detalle_reserva.html', {
+        'reserva': reserva,
+        'retencion_vigente': reserva.estado == 'pendiente' and reserva.vence and reserva.vence > timezone.now(),
+    })
+
+
+@login_required
+@require_POST
+def confirmar_reserva(request, reserva_id):
+    """Confirmar una reserva pendiente junto con los asientos retenidos con ella (del titular o un admin)"""
+    reservas = Reserva.objects.all()
+    if not es_admin(request.user):
+        # La de otro pasajero da 404, igual que una inexistente
+        reservas = reservas.filter(pasajero__email=email_de_pasajero(request.user))
+    reserva = get_object_or_404(reservas, id=reserva_id)
+    grupo = [reserva]
+    if reserva.estado == 'pendiente' and reserva.vence:
+        # Los asientos elegidos juntos comparten pasajero, vuelo y vencimiento
+        grupo = list(Reserva.objects.select_related('asiento', 'vuelo').filter(
+            pasajero_id=reserva.pasajero_id, vuelo_id=reserva.vuelo_id,
+            estado='pendiente', vence=reserva.vence,
+        ))
+    try:
+        confirmar_reservas(grupo)
+    except ReservaError as e:
+        messages.error(request, str(e))
+    else:
+        codigos = ', '.join(r.codigo_reserva for r in grupo)
+        messages.success(request, f'Reserva confirmada. Códigos: {codigos}')
+    return redirect('gestion_vuelos:detalle_reserva', reserva_id=reserva.id)
 
 
 @login_required
@@ -240,59 +492,149 @@ def cancelar_reserva(request, reserva_id):
 
 
 @user_passes_test(es_admin)
+@lee_de_replica
 def lista_pasajeros(request):
     """Lista de pasajeros (admin)"""
-    pasajeros = Pasajero.objects.all().order_by('nombre')
+    pasajeros = Pasajero.objects.all()
     q = request.GET.get('q')
     if q:
         pasajeros = pasajeros.filter(
             Q(nombre__icontains=q) | Q(documento__icontains=q) | Q(email__icontains=q)
         )
-    paginator = Paginator(pasajeros, 15)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj = paginar(request, pasajeros, 15, ('nombre', 'id'))
     return render(request, 'gestion_vuelos/lista_pasajeros.html', {'page_obj': page_obj, 'query': q})
 
 
 @user_passes_test(es_admin)
+@lee_de_replica
 def reportes(request):
-    """Reportes (admin)"""
-    total_vuelos = Vuelo.objects.count()
-    total_reservas = Reserva.objects.count()
-    total_pasajeros = Pasajero.objects.count()
-    vuelos_por_estado = Vuelo.objects.values('estado').annotate(count=Count('id'))
-    reservas_por_estado = Reserva.objects.values('estado').annotate(count=Count('id'))
+    """Reportes (admin), leídos del resumen precalculado y no de las tablas completas"""
+    nombres_estado = {
+        'vuelo': dict(Vuelo.ESTADOS_VUELO),
+        'reserva': dict(Reserva.ESTADOS_RESERVA),
+    }
+    totales = {'vuelo': 0, 'reserva': 0, 'pasajero': 0}
+    por_estado = {'vuelo': [], 'reserva': []}
+    for entidad, estado, cantidad in ResumenReporte.totales():
+        totales[entidad] += cantidad
+        if entidad in por_estado:
+            por_estado[entidad].append({
+                'estado': estado,
+                'nombre': nombres_estado[entidad].get(estado, estado),
+                'count': cantidad,
+            })
+    # Últimos 14 días de reservas y próximos 14 de salidas, por día
+    hoy = timezone.localdate()
+    reservas_por_dia = ResumenReporte.objects.filter(
+        entidad='reserva', fecha__range=(hoy - timedelta(days=13), hoy)
+    ).values('fecha').annotate(count=Sum('cantidad')).order_by('-fecha')
+    vuelos_por_dia = ResumenReporte.objects.filter(
+        entidad='vuelo', fecha__range=(hoy, hoy + timedelta(days=13))
+    ).values('fecha').annotate(count=Sum('cantidad')).order_by('fecha')
     vuelos_proximos = Vuelo.objects.filter(
         fecha_salida__gte=timezone.now(),
         fecha_salida__lte=timezone.now() + timedelta(days=7)
-    ).order_by('fecha_salida')
+    ).select_related('avion').order_by('fecha_salida')
     return render(request, 'gestion_vuelos/reportes.html', {
-        'total_vuelos': total_vuelos,
-        'total_reservas': total_reservas,
-        'total_pasajeros': total_pasajeros,
-        'vuelos_por_estado': vuelos_por_estado,
-        'reservas_por_estado': reservas_por_estado,
+        'total_vuelos': totales['vuelo'],
+        'total_reservas': totales['reserva'],
+        'total_pasajeros': totales['pasajero'],
+        'vuelos_por_estado': por_estado['vuelo'],
+        'reservas_por_estado': por_estado['reserva'],
+        'reservas_por_dia': reservas_por_dia,
+        'vuelos_por_dia': vuelos_por_dia,
         'vuelos_proximos': vuelos_proximos,
     })
 
 
+@user_passes_test(es_admin)
+def diagnostico_sql(request):
+    """Consultas SQL por vista según la muestra del middleware de instrumentación (admin)"""
+    if request.method == 'POST':
+        instrumentacion.registro.vaciar()
+        messages.success(request, 'Se vaciaron las mediciones.')
+        return redirect('gestion_vuelos:diagnostico_sql')
+    mediciones = instrumentacion.registro.mediciones()
+    return render(request, 'gestion_vuelos/diagnostico_sql.html', {
+        'vistas': instrumentacion.resumen_por_vista(mediciones),
+        'peores': instrumentacion.peores_requests(mediciones),
+        'total_mediciones': len(mediciones),
+        'capacidad': instrumentacion.registro.capacidad,
+        'muestreo': instrumentacion.muestreo(),
+    })
+
+
+@user_passes_test(es_admin)
+@lee_de_replica
 def reporte_vuelo(request, vuelo_id):
-    """Reporte detallado de un vuelo (admin o público si programado)"""
-    vuelo = get_object_or_404(Vuelo, id=vuelo_id)
-    reservas = vuelo.reservas.filter(estado__in=['confirmada', 'pagada']).order_by('asiento__fila', 'asiento__columna')
+    """Reporte detallado de un vuelo con la lista de pasajeros (admin)"""
+    vuelo = get_object_or_404(Vuelo.objects.select_related('avion'), id=vuelo_id)
+    reservas = vuelo.reservas.filter(estado__in=Reserva.ESTADOS_ACTIVOS)
+    totales = reservas.aggregate(total_pasajeros=Count('id'), ingresos_totales=Sum('precio'))
     return render(request, 'gestion_vuelos/reporte_vuelo.html', {
         'vuelo': vuelo,
-        'reservas': reservas,
-        'total_pasajeros': reservas.count(),
-        'ingresos_totales': sum(r.precio for r in reservas),
+        'reservas': reservas.select_related('pasajero', 'asiento').order_by('asiento__fila', 'asiento__columna'),
+        'total_pasajeros': totales['total_pasajeros'],
+        'ingresos_totales': totales['ingresos_totales'] or 0,
     })
 
 
+@user_passes_test(es_admin)
+@lee_de_replica
+def manifiesto_vuelo(request, vuelo_id, formato):
+    """Descarga del manifiesto de pasajeros (CSV o PDF), generado en streaming"""
+    vuelo = get_object_or_404(Vuelo, id=vuelo_id)
+    if formato == 'pdf':
+        respuesta = StreamingHttpResponse(pdf_manifiesto(vuelo), content_type='application/pdf')
+    else:
+        respuesta = StreamingHttpResponse(csv_manifiesto(vuelo), content_type='text/csv; charset=utf-8')
+    respuesta['Content-Disposition'] = f'attachment; filename="manifiesto-{vuelo.codigo_vuelo}.{formato}"'
+    return respuesta
+
+
+@user_passes_test(es_admin)
+@lee_de_replica
+def exportar_datos(request, entidad, formato):
+    """Exportación en streaming de reservas, pasajeros o vuelos (admin)"""
+    try:
+        lineas = exportar(
+            entidad, formato,
+            desde=leer_fecha(request.GET.get('desde'), 'desde'),
+            hasta=leer_fecha(request.GET.get('hasta'), 'hasta'),
+            estado=request.GET.get('estado'),
+        )
+    except ExportacionError as e:
+        return HttpResponseBadRequest(str(e))
+    tipo = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    respuesta = StreamingHttpResponse(lineas, content_type=f'{tipo}; charset=utf-8')
+    respuesta['Content-Disposition'] = f'attachment; filename="{entidad}.{formato}"'
+    return respuesta
+
+
 def ver_boleto(request, boleto_id):
     """Mostrar boleto"""
     boleto = get_object_or_404(Boleto, id=boleto_id)
     return render(request, 'gestion_vuelos/ver_boleto.html', {'boleto': boleto})
 
 
+@login_required
+def pase_abordar(request, boleto_id, formato):
+    """Pase de abordar en PDF o PNG, servido desde la cache en disco (del titular o un admin)"""
+    boletos = Boleto.objects.all()
+    if not es_admin(request.user):
+        # El de otro pasajero da 404, igual que uno inexistente
+        boletos = boletos.filter(reserva__pasajero__email=email_de_pasajero(request.user))
+    boleto = get_object_or_404(boletos, id=boleto_id)
+    if boleto.estado == 'cancelado':
+        messages.error(request, 'El boleto está cancelado.')
+        return redirect('gestion_vuelos:ver_boleto', boleto_id=boleto.id)
+    ruta = pase(boleto, formato)
+    return FileResponse(
+        open(ruta, 'rb'), content_type=FORMATOS_PASE[formato],
+        filename=f'pase-{boleto.codigo_barra}.{formato}',
+    )
+
+
 @login_required
 def generar_boleto(request, reserva_id):
     """Generar boleto si no existe"""
@@ -308,6 +650,7 @@ def generar_boleto(request, reserva_id):
     return redirect('gestion_vuelos:ver_boleto', boleto_id=boleto.id)
 
 
+@cache_pagina_publica('paquetes')
 def lista_paquetes(request):
     """Listado de paquetes turísticos (visible a todos)"""
     paquetes = Paquete.objects.filter(activo=True).order_by('-creado')